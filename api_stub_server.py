@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧪 خادم بديل محلي لخدمات ip-api و Open-Meteo و aladhan
+Local API Stand-In Server with Fault Injection
+
+يعيد ردوداً مسجلة (api_recordings.json) بنفس مسارات الخدمات الحقيقية، مع حقن
+أعطال عند الطلب لقياس زمن التحديث وسرعة البدائل بدون إنترنت:
+• تأخير ثابت + عشوائي (latency و jitter)
+• انتهاء مهلة: الخادم لا يرد ويغلق الاتصال بعد hang ثانية (timeout_rate)
+• أخطاء الخادم: حالة 5xx (error_rate و error_status)
+• JSON تالف: رد 200 بمحتوى مقطوع (malformed_rate)
+
+كل نسبة بين 0 و 1، ويمكن قصر الأعطال على مسارات معينة (location، weather، hijri، timings).
+الردود السليمة تحمل ETag، وطلب بـ If-None-Match مطابق يرد 304 بدون محتوى.
+
+الاستخدام:
+    python api_stub_server.py --port 8770 --latency 0.3 --error-rate 0.2
+    PRAYER_API_BASE=http://127.0.0.1:8770 python prayer_app_fixed.py
+
+تغيير الأعطال أثناء التشغيل:
+    curl "http://127.0.0.1:8770/_stub/faults?timeout_rate=1&route=weather"
+    curl "http://127.0.0.1:8770/_stub/faults?reset=1"
+    curl "http://127.0.0.1:8770/_stub/stats"
+
+تسجيل ردود حقيقية (ما لا يوجد في الملف يُجلب من الخدمة الحقيقية ويُحفظ):
+    python api_stub_server.py --record
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8770
+DEFAULT_HANG = 30.0
+RECORDINGS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api_recordings.json')
+
+# المسار ← اسمه، والخدمة الحقيقية لكل مسار (لوضع التسجيل)
+ROUTES = (
+    ('/json', 'location'),
+    ('/v1/forecast', 'weather'),
+    ('/v1/gToH', 'hijri'),
+    ('/v1/timingsByCity', 'timings')
+)
+UPSTREAMS = {
+    'location': 'http://ip-api.com',
+    'weather': 'https://api.open-meteo.com',
+    'hijri': 'http://api.aladhan.com',
+    'timings': 'http://api.aladhan.com'
+}
+
+
+def route_for(path):
+    """اسم المسار (location، weather...) أو None"""
+    for prefix, name in ROUTES:
+        if path == prefix or path.startswith(prefix + '/'):
+            return name
+    return None
+
+
+def request_key(path, query):
+    """مفتاح الرد المسجل: المسار والمعاملات مرتبة"""
+    query = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+    return f"{path}?{query}" if query else path
+
+
+class FaultConfig:
+    """إعدادات حقن الأعطال"""
+
+    FIELDS = ('latency', 'jitter', 'error_rate', 'error_status', 'timeout_rate', 'hang', 'malformed_rate')
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503,
+                 timeout_rate=0.0, hang=DEFAULT_HANG, malformed_rate=0.0, routes=None):
+        self.latency = float(latency)
+        self.jitter = float(jitter)
+        self.error_rate = float(error_rate)
+        self.error_status = int(error_status)
+        self.timeout_rate = float(timeout_rate)
+        self.hang = float(hang)
+        self.malformed_rate = float(malformed_rate)
+        self.routes = set(routes) if routes else None
+
+        for name in ('error_rate', 'timeout_rate', 'malformed_rate'):
+            if not 0 <= getattr(self, name) <= 1:
+                raise ValueError(f"{name} يجب أن يكون بين 0 و 1")
+        if not 500 <= self.error_status <= 599:
+            raise ValueError(f"error_status يجب أن يكون 5xx: {self.error_status}")
+
+    @classmethod
+    def from_params(cls, params):
+        """من معاملات رابط التحكم (route يمكن أن تكون مفصولة بفواصل)"""
+        options = {name: params[name] for name in cls.FIELDS if name in params}
+        if params.get('route'):
+            options['routes'] = params['route'].split(',')
+        return cls(**options)
+
+    def applies_to(self, route):
+        return self.routes is None or route in self.routes
+
+    def as_dict(self):
+        data = {name: getattr(self, name) for name in self.FIELDS}
+        data['routes'] = sorted(self.routes) if self.routes else None
+        return data
+
+
+class Recordings:
+    """الردود المسجلة: مطابقة تامة للمسار والمعاملات، وإلا أول رد لنفس المسار"""
+
+    def __init__(self, path=RECORDINGS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            self.entries = []
+        self._index()
+
+    def _index(self):
+        self._by_key = {}
+        self._by_route = {}
+        for entry in self.entries:
+            self._by_key.setdefault(entry['key'], entry)
+            self._by_route.setdefault(entry['route'], entry)
+
+    def find(self, key, route):
+        with self._lock:
+            return self._by_key.get(key) or self._by_route.get(route)
+
+    def exact(self, key):
+        with self._lock:
+            return self._by_key.get(key)
+
+    def add(self, key, route, status, body):
+        """إضافة رد مسجل وحفظ الملف"""
+        entry = {'key': key, 'route': route, 'status': status, 'body': body}
+        with self._lock:
+            self.entries.append(entry)
+            self._index()
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=2)
+                f.write('\n')
+            os.replace(temp_path, self.path)
+        return entry
+
+
+class StubService:
+    """منطق الخادم البديل بدون HTTP"""
+
+    def __init__(self, recordings=None, faults=None, record=False, seed=None):
+        self.recordings = recordings or Recordings()
+        self.faults = faults or FaultConfig()
+        self.record = record
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._transport = None
+
+    def _roll(self, rate):
+        with self._lock:
+            return rate > 0 and self._random.random() < rate
+
+    def _jitter(self, jitter):
+        with self._lock:
+            return self._random.uniform(0, jitter) if jitter > 0 else 0.0
+
+    def _count(self, *names):
+        with self._lock:
+            for name in names:
+                self.stats[name] += 1
+
+    def control(self, path, params):
+        """مسارات التحكم /_stub/..."""
+        if path == '/_stub/faults':
+            if params.get('reset'):
+                self.faults = FaultConfig()
+            elif params:
+                try:
+                    self.faults = FaultConfig.from_params(params)
+                except (TypeError, ValueError) as e:
+                    return 400, {'error': str(e)}
+            return 200, self.faults.as_dict()
+        if path == '/_stub/stats':
+            return 200, dict(self.stats)
+        return 404, {'error': f"مسار تحكم غير معروف: {path}"}
+
+    def fault_for(self, route):
+        """العطل المطلوب لهذا الطلب: (التأخير بالثواني، نوع العطل أو None)"""
+        faults = self.faults
+        if not faults.applies_to(route):
+            return 0.0, None
+
+        delay = faults.latency + self._jitter(faults.jitter)
+        if self._roll(faults.timeout_rate):
+            return delay, 'timeout'
+        if self._roll(faults.error_rate):
+            return delay, 'error'
+        if self._roll(faults.malformed_rate):
+            return delay, 'malformed'
+        return delay, None
+
+    def response_for(self, route, path, query):
+        """الرد المسجل (الحالة، محتوى JSON) أو 404"""
+        key = request_key(path, query)
+        entry = self.recordings.exact(key) if self.record else self.recordings.find(key, route)
+        if entry is None and self.record:
+            entry = self._record(route, key)
+        if entry is None:
+            return 404, {'error': f"لا يوجد رد مسجل للمسار {route}"}
+        return entry['status'], entry['body']
+
+    def _record(self, route, key):
+        """جلب الرد من الخدمة الحقيقية وحفظه"""
+        if self._transport is None:
+            from http_transport import HttpTransport
+            self._transport = HttpTransport()
+
+        status, _, body = self._transport.get(UPSTREAMS[route] + key)
+        entry = self.recordings.add(key, route, status, json.loads(body.decode('utf-8')))
+        print(f"💾 تم تسجيل {route}: {key}")
+        return entry
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """معالج HTTP/1.1 يطبق الأعطال ثم يعيد الرد المسجل"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'PrayerApiStub/1.0'
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        service = self.server.service
+        parts = urlsplit(self.path)
+
+        if parts.path.startswith('/_stub/'):
+            status, data = service.control(parts.path, dict(parse_qsl(parts.query)))
+            return self._send(status, json.dumps(data, ensure_ascii=False).encode('utf-8'))
+
+        route = route_for(parts.path)
+        if route is None:
+            service._count('not_found')
+            return self._send(404, b'{"error": "not found"}')
+
+        delay, fault = service.fault_for(route)
+        service._count('requests', f'route:{route}', f'fault:{fault or "none"}')
+        if delay:
+            time.sleep(delay)
+
+        if fault == 'timeout':
+            # لا رد: العميل ينتظر حتى تنتهي مهلته، ثم يُغلق الاتصال
+            time.sleep(service.faults.hang)
+            self.close_connection = True
+            return None
+        if fault == 'error':
+            return self._send(service.faults.error_status, b'{"error": "injected server error"}')
+
+        status, data = service.response_for(route, parts.path, parts.query)
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        if fault == 'malformed':
+            return self._send(status, body[:len(body) // 2])
+        if status != 200:
+            return self._send(status, body)
+
+        etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        if self.headers.get('If-None-Match') == etag:
+            service._count('not_modified')
+            return self._send(304, b'', etag)
+        return self._send(status, body, etag)
+
+    def _send(self, status, body, etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+        if status != 304:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class StubServer(ThreadingHTTPServer):
+    """خادم بخيط لكل اتصال وخدمة بديلة مشتركة"""
+
+    daemon_threads = True
+
+    def __init__(self, address, service=None, verbose=False):
+        super().__init__(address, StubRequestHandler)
+        self.service = service or StubService()
+        self.verbose = verbose
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_in_thread(service=None, host=DEFAULT_HOST, port=0):
+    """تشغيل الخادم في خيط خلفي (المنفذ 0 = أي منفذ متاح) وإرجاعه"""
+    server = StubServer((host, port), service)
+    threading.Thread(target=server.serve_forever, name='api-stub', daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="خادم بديل محلي لخدمات التطبيق الخارجية مع حقن أعطال")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="عنوان الاستماع")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="منفذ الاستماع")
+    parser.add_argument('--recordings', default=RECORDINGS_PATH, help="ملف الردود المسجلة")
+    parser.add_argument('--record', action='store_true', help="جلب ما لا يوجد من الخدمات الحقيقية وتسجيله")
+    parser.add_argument('--latency', type=float, default=0.0, help="تأخير ثابت بالثواني")
+    parser.add_argument('--jitter', type=float, default=0.0, help="تأخير عشوائي إضافي حتى هذه القيمة")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="نسبة ردود 5xx")
+    parser.add_argument('--error-status', type=int, default=503, help="حالة الخطأ")
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help="نسبة الطلبات بدون رد")
+    parser.add_argument('--hang', type=float, default=DEFAULT_HANG, help="مدة الانتظار قبل إغلاق طلب بلا رد")
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help="نسبة ردود JSON التالفة")
+    parser.add_argument('--route', action='append', help="قصر الأعطال على مسار (يتكرر)")
+    parser.add_argument('--seed', type=int, default=None, help="بذرة العشوائية لتكرار نفس الأعطال")
+    parser.add_argument('--verbose', action='store_true', help="طباعة كل طلب")
+    args = parser.parse_args(argv)
+
+    try:
+        faults = FaultConfig(args.latency, args.jitter, args.error_rate, args.error_status,
+                             args.timeout_rate, args.hang, args.malformed_rate, args.route)
+    except ValueError as e:
+        parser.error(str(e))
+
+    service = StubService(Recordings(args.recordings), faults, args.record, args.seed)
+    server = StubServer((args.host, args.port), service, args.verbose)
+    print(f"🧪 الخادم البديل يعمل على {server.base_url} ({len(service.recordings.entries)} رد مسجل)")
+    print(f"   PRAYER_API_BASE={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("⏹️ تم إيقاف الخادم")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🏎️ قياس أداء المسارات الحسابية الساخنة
+Hot-Path Micro-Benchmarks
+
+يقيس دوال التطبيق التي تُنفذ باستمرار، بدون نافذة:
+• calculate_local_prayer_times - حساب أوقات يوم محلياً
+• calculate_qibla_direction - اتجاه القبلة
+• update_next_prayer - الصلاة القادمة والوقت المتبقي (كل دقيقة)
+• check_prayer_notifications - جدولة أحداث الصلوات
+• update_prayers_display - تحديث بطاقات الصلوات (بدون تغيير، ومع تغيير كل الأوقات)
+• compute_prayer_times - محرك الحساب مباشرة
+• compute_prayer_times_batch - الحساب المتجه لسنة كاملة لعدة مواقع (إن وجدت numpy)
+
+لكل مسار: عدد العمليات في الثانية (أفضل عدة جولات) والذاكرة عبر tracemalloc
+(ذروة التخصيص لكل عملية والمتبقي بعدها). النتائج تُقارن بخط الأساس المحفوظ في
+hot_paths_baseline.json، والخروج برمز 1 إذا تراجع أي مسار أكثر من الحد.
+
+السرعة تُقارن نسبةً إلى حمل مرجعي ثابت يُقاس بالتناوب مع كل مسار (relative)،
+فلا يتأثر القياس كثيراً بسرعة الجهاز أو انشغاله في نفس اللحظة.
+
+Tk بديل صامت افتراضياً (--tk stub)، أو Tk حقيقي تحت DISPLAY أو Xvfb (--tk real):
+    python benchmarks/hot_paths_benchmark.py
+    python benchmarks/hot_paths_benchmark.py --threshold 0.3 --only update_next_prayer
+    python benchmarks/hot_paths_benchmark.py --update-baseline
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from datetime import date, datetime, timedelta
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hot_paths_baseline.json')
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_MIN_TIME = 0.2
+DEFAULT_ROUNDS = 5
+ALLOC_CALLS = 200
+# عدد المواقع في قياس الحساب المتجه (كل منها لسنة كاملة)
+BATCH_LOCATIONS = 64
+
+# الرياض
+LATITUDE = 24.7136
+LONGITUDE = 46.6753
+
+
+class _NullWriter:
+    """مخرج صامت لطباعات التطبيق (لا يحتفظ بشيء فلا يظهر في قياس الذاكرة)"""
+
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+class _StubVar:
+    def __init__(self, master=None, value=None):
+        self._value = value
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        self._value = value
+
+
+class _StubWidget:
+    """عنصر واجهة صامت: يحفظ الخيارات ويتجاهل كل ما عداها"""
+
+    def __init__(self, master=None, **options):
+        self.options = options
+
+    def configure(self, **options):
+        self.options.update(options)
+
+    config = configure
+
+    def cget(self, key):
+        return self.options.get(key)
+
+    def after(self, ms, func=None, *args):
+        return 'after#stub'
+
+    def after_idle(self, func, *args):
+        return 'after#stub'
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def install_tk_stub():
+    """تسجيل tkinter بديل في sys.modules قبل استيراد التطبيق"""
+    tkinter = types.ModuleType('tkinter')
+    for name in ('StringVar', 'DoubleVar', 'BooleanVar', 'IntVar'):
+        setattr(tkinter, name, _StubVar)
+    for name in ('Tk', 'Frame', 'Label', 'Button', 'Canvas', 'Toplevel', 'Entry'):
+        setattr(tkinter, name, _StubWidget)
+
+    ttk = types.ModuleType('tkinter.ttk')
+    ttk.Scrollbar = _StubWidget
+    messagebox = types.ModuleType('tkinter.messagebox')
+    messagebox.showinfo = messagebox.showerror = messagebox.showwarning = lambda *args, **kwargs: None
+
+    tkinter.ttk = ttk
+    tkinter.messagebox = messagebox
+    sys.modules.update({'tkinter': tkinter, 'tkinter.ttk': ttk, 'tkinter.messagebox': messagebox})
+
+
+def ensure_display():
+    """شاشة X لوضع --tk real (نفس سلوك startup_benchmark)"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from startup_benchmark import ensure_display as start_display
+    return start_display()
+
+
+def create_app():
+    """إنشاء التطبيق في مجلد مؤقت بموقع وأوقات جاهزة (بدون شبكة)"""
+    sys.path.insert(0, REPO_DIR)
+    import prayer_app_fixed
+
+    with contextlib.redirect_stdout(_NullWriter()):
+        app = prayer_app_fixed.PrayerTimesApp(prayer_app_fixed.tk.Tk())
+        app.latitude.set(LATITUDE)
+        app.longitude.set(LONGITUDE)
+        today = datetime.now().date()
+        app.apply_prayer_times(app.calculate_local_prayer_times(LATITUDE, LONGITUDE, today),
+                               app.calculate_local_prayer_times(LATITUDE, LONGITUDE, today + timedelta(days=1)))
+    return app
+
+
+def hot_paths(app):
+    """المسارات المقاسة: الاسم ← دالة بدون معاملات"""
+    from prayer_engine import NUMPY_AVAILABLE, compute_prayer_times, compute_prayer_times_batch
+
+    today = datetime.now().date()
+    schedules = [app.calculate_local_prayer_times(LATITUDE, LONGITUDE, today + timedelta(days=i))
+                 for i in range(2)]
+    state = {'turn': 0}
+
+    def display_changed():
+        # تبديل الأوقات بين يومين حتى تتغير كل البطاقات في كل مرة
+        state['turn'] ^= 1
+        app.prayer_times = schedules[state['turn']]
+        app.update_prayers_display()
+
+    paths = {
+        'compute_prayer_times': lambda: compute_prayer_times(LATITUDE, LONGITUDE, today, 3.0),
+        'calculate_local_prayer_times': lambda: app.calculate_local_prayer_times(LATITUDE, LONGITUDE, today),
+        'calculate_qibla_direction': app.calculate_qibla_direction,
+        'update_next_prayer': app.update_next_prayer,
+        'check_prayer_notifications': app.check_prayer_notifications,
+        'update_prayers_display': app.update_prayers_display,
+        'update_prayers_display_changed': display_changed,
+    }
+
+    if NUMPY_AVAILABLE:
+        import numpy as np
+
+        # شبكة مواقع بين خطي العرض 60 جنوباً و 60 شمالاً × كل أيام السنة
+        lats = np.linspace(-60, 60, BATCH_LOCATIONS)
+        lons = np.linspace(-180, 180, BATCH_LOCATIONS)
+        year = np.arange(f'{today.year}-01-01', f'{today.year + 1}-01-01', dtype='datetime64[D]')
+        paths['compute_prayer_times_batch'] = lambda: compute_prayer_times_batch(
+            lats, lons, year, np.round(lons / 15), 3)
+    return paths
+
+
+def reference_work():
+    """حمل مرجعي ثابت من بايثون خالص (حساب وقواميس ونصوص)"""
+    table = {}
+    for i in range(200):
+        table[i % 17] = table.get(i % 17, 0) + i * i
+    return ','.join(str(v) for v in table.values())
+
+
+def _calibrate(func, min_time):
+    """عدد التكرارات الذي يستغرق حوالي min_time ثانية"""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / 10:
+            break
+        loops *= 2
+    return max(1, int(loops * min_time / max(elapsed, 1e-9)))
+
+
+def _ops_per_sec(func, loops):
+    started = time.perf_counter()
+    for _ in range(loops):
+        func()
+    return loops / (time.perf_counter() - started)
+
+
+def measure_speed(func, min_time=DEFAULT_MIN_TIME, rounds=DEFAULT_ROUNDS):
+    """أفضل عمليات في الثانية للمسار وللحمل المرجعي، بجولات متناوبة"""
+    loops = _calibrate(func, min_time)
+    reference_loops = _calibrate(reference_work, min_time / 4)
+
+    best = reference = 0.0
+    for _ in range(rounds):
+        reference = max(reference, _ops_per_sec(reference_work, reference_loops))
+        best = max(best, _ops_per_sec(func, loops))
+    return best, reference
+
+
+def measure_allocations(func, calls=ALLOC_CALLS):
+    """ذروة التخصيص لكل عملية والذاكرة المتبقية بعدها (بالبايت) عبر tracemalloc"""
+    func()  # تسخين (ذاكرات مؤقتة داخلية)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        peak = 0
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            start = tracemalloc.get_traced_memory()[0]
+            func()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - start)
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return peak, retained / calls
+
+
+def run(names=None, min_time=DEFAULT_MIN_TIME, rounds=DEFAULT_ROUNDS):
+    """تشغيل القياسات وإرجاع {المسار: النتائج}"""
+    app = create_app()
+    results = {}
+    with contextlib.redirect_stdout(_NullWriter()):
+        for name, func in hot_paths(app).items():
+            if names and name not in names:
+                continue
+            ops, reference = measure_speed(func, min_time, rounds)
+            peak, retained = measure_allocations(func)
+            results[name] = {
+                'ops_per_sec': round(ops, 1),
+                'relative': round(ops / reference, 4),
+                'peak_alloc_bytes': peak,
+                'retained_bytes_per_op': round(retained, 1)
+            }
+    return results
+
+
+def compare(results, baseline, threshold):
+    """مقارنة بخط الأساس: قائمة التراجعات (المسار، المقياس، القديم، الجديد)"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['relative'] < base['relative'] * (1 - threshold):
+            regressions.append((name, 'relative', base['relative'], result['relative']))
+        # هامش ثابت 1 كيلوبايت حتى لا تفشل المسارات الصغيرة بسبب تفاصيل المفسر
+        if result['peak_alloc_bytes'] > base['peak_alloc_bytes'] * (1 + threshold) + 1024:
+            regressions.append((name, 'peak_alloc_bytes', base['peak_alloc_bytes'], result['peak_alloc_bytes']))
+    return regressions
+
+
+def load_baseline(path, backend):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get(backend, {})
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path, backend, results):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        data = {}
+    # --only يحدث مساراته فقط ويبقي الباقي
+    data.setdefault(backend, {}).update(results)
+    data['_meta'] = {
+        'python': sys.version.split()[0],
+        'platform': sys.platform,
+        'updated': date.today().isoformat()
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="قياس أداء المسارات الساخنة في تطبيق أوقات الصلاة")
+    parser.add_argument('--tk', choices=('stub', 'real'), default='stub',
+                        help="Tk بديل صامت أو Tk حقيقي (يحتاج DISPLAY أو Xvfb)")
+    parser.add_argument('--only', nargs='+', help="قياس مسارات معينة فقط")
+    parser.add_argument('--min-time', type=float, default=DEFAULT_MIN_TIME, help="أقل زمن لكل جولة بالثواني")
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS, help="عدد الجولات (تؤخذ الأفضل)")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="أقصى تراجع مسموح (0.25 = 25%%)")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="ملف خط الأساس")
+    parser.add_argument('--update-baseline', action='store_true', help="حفظ النتائج كخط أساس جديد")
+    parser.add_argument('--json', action='store_true', help="إخراج النتائج بصيغة JSON")
+    args = parser.parse_args(argv)
+
+    xvfb = None
+    if args.tk == 'stub':
+        install_tk_stub()
+    else:
+        xvfb = ensure_display()
+
+    # قاعدة بيانات الإحصائيات والإعدادات في مجلد مؤقت لا في مجلد العمل
+    with tempfile.TemporaryDirectory() as work_dir:
+        cwd = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            results = run(args.only, args.min_time, args.rounds)
+        finally:
+            os.chdir(cwd)
+            if xvfb is not None:
+                xvfb.terminate()
+
+    if args.update_baseline:
+        save_baseline(args.baseline, args.tk, results)
+
+    baseline = load_baseline(args.baseline, args.tk)
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.json:
+        print(json.dumps({'results': results, 'regressions': regressions}, ensure_ascii=False, indent=2))
+    else:
+        print(f"🏎️ المسارات الساخنة (Tk: {args.tk}):")
+        for name, result in results.items():
+            base = baseline.get(name)
+            change = (f" ({result['relative'] / base['relative'] - 1:+.0%})" if base else "")
+            print(f"   {name:32s} {result['ops_per_sec']:12,.0f} عملية/ث{change:8s} | "
+                  f"ذروة {result['peak_alloc_bytes']:7,d} بايت | متبقي {result['retained_bytes_per_op']:6.1f} بايت/عملية")
+
+        if args.update_baseline:
+            print(f"💾 تم حفظ خط الأساس في {args.baseline}")
+        for name, metric, old, new in regressions:
+            print(f"❌ تراجع {name}.{metric}: {old:,} ← {new:,}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
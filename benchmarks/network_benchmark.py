@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📡 قياس زمن التحديث والبدائل تحت ظروف شبكة مختلفة
+Network Refresh & Fallback Benchmark
+
+يشغل api_stub_server.py في خيط خلفي ويوجه التطبيق إليه عبر PRAYER_API_BASE،
+ثم لكل سيناريو أعطال يقيس الزمن من بدء العمليات الخلفية (start_operations)
+حتى انتهاء كل العمليات وظهور نتائجها في الواجهة، وما انتهت إليه (بيانات الخدمة
+أو البديل). كل تشغيل في مجلد مؤقت جديد، فلا ذاكرة مؤقتة ولا آخر موقع محفوظ.
+
+السيناريوهات:
+• healthy - بدون أعطال
+• slow - تأخير 0.5 ثانية + حتى 0.5 عشوائية لكل طلب
+• errors - كل الطلبات 503
+• timeout - لا رد (العميل ينتظر مهلته كاملة)
+• malformed - JSON مقطوع
+
+    python benchmarks/network_benchmark.py
+    python benchmarks/network_benchmark.py --only slow errors --runs 3
+"""
+
+import argparse
+import contextlib
+import heapq
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+DEFAULT_MAX_WAIT = 30.0
+
+sys.path.insert(0, BENCHMARKS_DIR)
+sys.path.insert(0, REPO_DIR)
+from hot_paths_benchmark import _NullWriter, _StubWidget, install_tk_stub  # noqa: E402
+
+SCENARIOS = {
+    'healthy': {},
+    'slow': {'latency': 0.5, 'jitter': 0.5},
+    'errors': {'error_rate': 1.0},
+    'timeout': {'timeout_rate': 1.0, 'hang': 15.0},
+    'malformed': {'malformed_rate': 1.0}
+}
+
+
+class PumpedRoot(_StubWidget):
+    """نافذة بديلة تنفذ after فعلياً عند استدعاء pump() (بدلاً من mainloop)"""
+
+    def __init__(self, master=None, **options):
+        super().__init__(master, **options)
+        self._queue = []
+        self._counter = 0
+
+    def after(self, ms, func=None, *args):
+        self._counter += 1
+        heapq.heappush(self._queue, (time.monotonic() + ms / 1000, self._counter, func, args))
+        return f'after#{self._counter}'
+
+    def after_idle(self, func, *args):
+        return self.after(0, func, *args)
+
+    def after_cancel(self, after_id):
+        number = int(after_id.split('#')[1])
+        self._queue = [item for item in self._queue if item[1] != number]
+        heapq.heapify(self._queue)
+
+    def pump(self):
+        """تنفيذ كل ما حان وقته"""
+        now = time.monotonic()
+        while self._queue and self._queue[0][0] <= now:
+            _, _, func, args = heapq.heappop(self._queue)
+            func(*args)
+
+
+def settled(app):
+    """انتهت كل العمليات الخلفية ووصلت نتائجها لخيط الواجهة"""
+    return (not app.results_polling and app.orchestrator.pending == 0
+            and app.orchestrator.results.empty() and app.ui.pending == 0)
+
+
+def run_once(server, faults, max_wait=DEFAULT_MAX_WAIT):
+    """تشغيل التطبيق مرة تحت أعطال معينة: الزمن والنتيجة"""
+    import prayer_app_fixed
+    from api_stub_server import FaultConfig
+
+    server.service.faults = FaultConfig(**faults)
+    work_dir = tempfile.mkdtemp(prefix='prayer_net_')
+    previous_dir = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        with contextlib.redirect_stdout(_NullWriter()):
+            root = prayer_app_fixed.tk.Tk()
+            app = prayer_app_fixed.PrayerTimesApp(root)
+
+            # start_operations مؤجلة بـ after_idle، والقياس يبدأ معها
+            start = time.perf_counter()
+            deadline = start + max_wait
+            root.pump()
+            while not settled(app) and time.perf_counter() < deadline:
+                time.sleep(0.002)
+                root.pump()
+            elapsed = time.perf_counter() - start
+
+            stats = app.orchestrator.stats()
+            result = {
+                'seconds': elapsed,
+                'settled': settled(app),
+                'completed': stats['completed'],
+                'failed': stats['failed'],
+                'timed_out': stats['timed_out'],
+                'location': app.location_info.get(),
+                'weather': app.weather_info.get()
+            }
+            app.orchestrator.shutdown()
+            app.transport.close()
+            app.prayer_log.close()
+    finally:
+        os.chdir(previous_dir)
+    return result
+
+
+def run(names, runs=1, max_wait=DEFAULT_MAX_WAIT):
+    from api_stub_server import start_in_thread
+
+    server = start_in_thread()
+    os.environ['PRAYER_API_BASE'] = server.base_url
+    try:
+        results = {}
+        for name in names:
+            attempts = [run_once(server, SCENARIOS[name], max_wait) for _ in range(runs)]
+            best = min(attempts, key=lambda r: r['seconds'])
+            best['median_seconds'] = sorted(r['seconds'] for r in attempts)[len(attempts) // 2]
+            results[name] = best
+        results['_requests'] = dict(server.service.stats)
+        return results
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="زمن التحديث والبدائل تحت أعطال شبكة محاكاة")
+    parser.add_argument('--only', nargs='+', choices=sorted(SCENARIOS), help="سيناريوهات معينة فقط")
+    parser.add_argument('--runs', type=int, default=1, help="عدد مرات تشغيل كل سيناريو")
+    parser.add_argument('--max-wait', type=float, default=DEFAULT_MAX_WAIT, help="أقصى انتظار بالثواني")
+    parser.add_argument('--json', action='store_true', help="إخراج النتائج كـ JSON")
+    args = parser.parse_args(argv)
+
+    install_tk_stub()
+    sys.modules['tkinter'].Tk = PumpedRoot
+
+    results = run(args.only or list(SCENARIOS), args.runs, args.max_wait)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"📡 زمن التحديث من بدء العمليات حتى ظهور كل النتائج ({args.runs} تشغيل لكل سيناريو):")
+    for name, result in results.items():
+        if name.startswith('_'):
+            continue
+        status = "" if result['settled'] else " ⚠️ لم تنته"
+        print(f"   {name:<10} {result['seconds'] * 1000:8.0f} ms{status} | "
+              f"نجاح {result['completed']} فشل {result['failed']} مهلة {result['timed_out']}")
+        print(f"   {'':<10} {result['location']} | {result['weather']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⏱️ قياس زمن بدء تشغيل التطبيق
+Startup Time Benchmark (cold / warm)
+
+يشغل التطبيق عدة مرات في عمليات مستقلة ويقيس:
+• import_ms - زمن استيراد prayer_app_fixed وكل ما يستورده
+• construct_ms - زمن إنشاء PrayerTimesApp (بناء الواجهة والرسم الأول)
+• first_paint_ms - من بداية الاستيراد حتى أول حدث Expose للنافذة
+• process_ms - من تشغيل العملية حتى أول رسم (يشمل بدء Python نفسه)
+
+cold: نسخة جديدة من ملفات التطبيق بدون __pycache__، ومجلد عمل بدون إعدادات أو ذاكرة مؤقتة.
+warm: نفس النسخة بعد تشغيل سابق (pycache جاهز وحالة التطبيق محفوظة).
+
+يحتاج شاشة X؛ إذا لم يوجد DISPLAY يُشغل Xvfb تلقائياً إن كان مثبتاً:
+    python benchmarks/startup_benchmark.py --runs 5
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULT_MARKER = 'STARTUP_RESULT '
+APP_DIR_ENV = 'PRAYER_APP_DIR'
+METRICS = ('import_ms', 'construct_ms', 'first_paint_ms', 'process_ms')
+
+
+def child():
+    """عملية القياس: استيراد التطبيق وإنشاؤه حتى أول رسم ثم الخروج"""
+    started = time.perf_counter()
+    sys.path.insert(0, os.environ.get(APP_DIR_ENV, REPO_DIR))
+
+    import prayer_app_fixed
+    imported = time.perf_counter()
+
+    root = prayer_app_fixed.tk.Tk()
+    result = {}
+
+    def on_expose(event):
+        if 'first_paint_ms' not in result:
+            result['first_paint_ms'] = (time.perf_counter() - started) * 1000
+            root.after_idle(root.destroy)
+
+    root.bind('<Expose>', on_expose)
+    prayer_app_fixed.PrayerTimesApp(root)
+    constructed = time.perf_counter()
+
+    # حد أقصى حتى لا يعلق القياس إذا لم يصل حدث الرسم
+    root.after(10000, root.destroy)
+    root.mainloop()
+
+    result['import_ms'] = (imported - started) * 1000
+    result['construct_ms'] = (constructed - imported) * 1000
+    sys.stdout.write(RESULT_MARKER + json.dumps(result) + '\n')
+    sys.stdout.flush()
+
+
+def copy_app(target_dir):
+    """نسخ ملفات التطبيق وبياناته (بدون __pycache__) إلى مجلد جديد"""
+    for name in os.listdir(REPO_DIR):
+        if name.endswith(('.py', '.csv.gz')):
+            shutil.copy2(os.path.join(REPO_DIR, name), target_dir)
+
+
+def run_once(work_dir, app_dir):
+    """تشغيل عملية قياس واحدة وإرجاع نتائجها"""
+    env = dict(os.environ, **{APP_DIR_ENV: app_dir})
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child'],
+        cwd=work_dir, env=env, capture_output=True, text=True, timeout=60
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith(RESULT_MARKER):
+            result = json.loads(line[len(RESULT_MARKER):])
+            result.setdefault('first_paint_ms', float('nan'))
+            result['process_ms'] = (time.perf_counter() - started) * 1000
+            return result
+
+    raise RuntimeError(f"فشلت عملية القياس:\n{proc.stderr[-2000:]}")
+
+
+def ensure_display():
+    """التأكد من وجود شاشة X أو تشغيل Xvfb (يرجع العملية لإيقافها لاحقاً)"""
+    if os.environ.get('DISPLAY'):
+        return None
+
+    xvfb = shutil.which('Xvfb')
+    if not xvfb:
+        sys.exit("❌ لا توجد شاشة (DISPLAY) ولا Xvfb؛ شغّل القياس تحت xvfb-run")
+
+    display = ':99'
+    proc = subprocess.Popen([xvfb, display, '-nolisten', 'tcp'],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ['DISPLAY'] = display
+    time.sleep(0.5)
+    return proc
+
+
+def summarize(runs):
+    """الوسيط والأقل لكل مقياس"""
+    return {
+        metric: {
+            'median': statistics.median(r[metric] for r in runs),
+            'min': min(r[metric] for r in runs)
+        }
+        for metric in METRICS
+    }
+
+
+def benchmark(runs):
+    """تشغيل قياسات cold و warm"""
+    results = {'cold': [], 'warm': []}
+
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as work_dir, tempfile.TemporaryDirectory() as app_dir:
+            copy_app(app_dir)
+            results['cold'].append(run_once(work_dir, app_dir))
+
+    with tempfile.TemporaryDirectory() as work_dir, tempfile.TemporaryDirectory() as app_dir:
+        copy_app(app_dir)
+        run_once(work_dir, app_dir)  # تجهيز pycache وحالة التطبيق
+        for _ in range(runs):
+            results['warm'].append(run_once(work_dir, app_dir))
+
+    return {mode: summarize(mode_runs) for mode, mode_runs in results.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="قياس زمن بدء تشغيل تطبيق أوقات الصلاة")
+    parser.add_argument('--runs', type=int, default=5, help="عدد مرات التشغيل لكل وضع")
+    parser.add_argument('--json', action='store_true', help="إخراج النتائج بصيغة JSON")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child()
+        return
+
+    xvfb = ensure_display()
+    try:
+        summary = benchmark(args.runs)
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    for mode, metrics in summary.items():
+        print(f"⏱️ {mode}:")
+        for metric in METRICS:
+            values = metrics[metric]
+            print(f"   {metric:15s} الوسيط {values['median']:8.1f} ms | الأقل {values['min']:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🏭 توليد جداول أوقات الصلاة لآلاف المدن
+Bulk Multi-City Timetable Generator
+
+يقرأ قائمة مواقع (CSV: name,lat,lon,tz) ويكتب الجداول لفترة زمنية
+باستخدام الحساب الفلكي المحلي (prayer_engine) بدلاً من طلب API لكل مدينة.
+
+• المواقع تُقسم إلى دفعات وتُوزع على كل الأنوية (ProcessPoolExecutor)
+• عدد الدفعات قيد التنفيذ محدود، والنتائج تُكتب بالترتيب فور جاهزيتها،
+  فالذاكرة لا تكبر مع عدد المدن
+• صيغ الإخراج: csv أو jsonl أو bin (ملف timetable_store لكل مدينة وسنة)
+• qibla=True (csv و jsonl): اتجاه القبلة والمسافة إلى الكعبة لكل موقع
+
+التشغيل عبر التطبيق:
+    python prayer_app_fixed.py generate cities.csv --start 2026-01-01 --end 2026-12-31 -o out.csv
+"""
+
+import csv
+import io
+import json
+import math
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+from prayer_engine import (
+    DEFAULT_METHOD, NUMPY_AVAILABLE, PRAYER_KEYS, SCHOOL_SHAFI, compute_prayer_times,
+    compute_prayer_times_batch, format_minutes, hour_to_minutes, hours_to_minutes, qibla_batch,
+    qibla_info
+)
+from timetable_store import write_timetable
+
+FORMATS = ('csv', 'jsonl', 'bin')
+DEFAULT_CHUNK_SIZE = 256
+
+# نصوص HH:MM جاهزة لكل دقائق اليوم (الفهرس -1 للوقت غير المعرف)
+TIME_STRINGS = [format_minutes(m) for m in range(1440)] + ['']
+
+
+def read_locations(path, default_tz=None):
+    """قراءة المواقع سطراً بسطر (name, lat, lon, tz)
+
+    الموقع بدون قيمة في عمود tz يأخذ default_tz، وبدونها ValueError (لا UTC بصمت).
+    غياب العمود كله يُكتشف هنا قبل بدء التوليد.
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        columns = csv.DictReader(f).fieldnames or []
+    if 'tz' not in columns and default_tz is None:
+        raise ValueError(f"ملف المواقع {path} بدون عمود tz: أضفه أو حدد فرق توقيت افتراضياً (--tz)")
+    return _iter_locations(path, default_tz)
+
+
+def _iter_locations(path, default_tz):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            tz = row.get('tz')
+            if not tz:
+                if default_tz is None:
+                    raise ValueError(f"السطر {line}: الموقع {row['name']} بدون فرق توقيت (tz)")
+                tz = default_tz
+            yield (
+                row['name'],
+                float(row['lat']),
+                float(row['lon']),
+                float(tz)
+            )
+
+
+def chunked(iterable, size):
+    """تقسيم مولد إلى قوائم بحجم ثابت"""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def date_range(start, end):
+    """كل الأيام من start إلى end (شاملة)"""
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def compute_chunk_minutes(chunk, days, method=DEFAULT_METHOD, school=SCHOOL_SHAFI):
+    """دقائق الصلوات لدفعة مواقع: قائمة (موقع) من قوائم (يوم) من صفوف"""
+    if NUMPY_AVAILABLE:
+        import numpy as np
+        lats = [loc[1] for loc in chunk]
+        lons = [loc[2] for loc in chunk]
+        tzs = [loc[3] for loc in chunk]
+        dates = np.array(days, dtype='datetime64[D]')
+        return hours_to_minutes(compute_prayer_times_batch(lats, lons, dates, tzs, method, school)).tolist()
+
+    result = []
+    for _, lat, lon, tz in chunk:
+        result.append([
+            [hour_to_minutes(t) if math.isfinite(t) else -1
+             for t in compute_prayer_times(lat, lon, day, tz, method, school)]
+            for day in days
+        ])
+    return result
+
+
+def compute_chunk_qibla(chunk):
+    """(الاتجاه، المسافة بالكيلومتر) لكل موقع في الدفعة، مقربة لمنزلة واحدة"""
+    if NUMPY_AVAILABLE:
+        bearings, distances, _ = qibla_batch([loc[1] for loc in chunk], [loc[2] for loc in chunk])
+        return list(zip(bearings.round(1).tolist(), distances.round(1).tolist()))
+    return [tuple(round(value, 1) for value in qibla_info(lat, lon)[:2]) for _, lat, lon, _ in chunk]
+
+
+def render_csv(chunk, days, minutes, qibla=None):
+    """تحويل دفعة إلى أسطر CSV (مع عمودي القبلة إن وُجدت)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    day_strings = [day.isoformat() for day in days]
+    for i, ((name, lat, lon, _), rows) in enumerate(zip(chunk, minutes)):
+        extra = list(qibla[i]) if qibla else []
+        writer.writerows(
+            [name, day, lat, lon] + [TIME_STRINGS[m] for m in row] + extra
+            for day, row in zip(day_strings, rows)
+        )
+    return buffer.getvalue()
+
+
+def render_jsonl(chunk, days, minutes, qibla=None):
+    """تحويل دفعة إلى أسطر JSON Lines (مع القبلة إن وُجدت)"""
+    lines = []
+    for i, ((name, lat, lon, _), rows) in enumerate(zip(chunk, minutes)):
+        for day, row in zip(days, rows):
+            record = {
+                'name': name,
+                'date': day.isoformat(),
+                'lat': lat,
+                'lon': lon,
+                'times': {key: (TIME_STRINGS[m] or None) for key, m in zip(PRAYER_KEYS, row)}
+            }
+            if qibla:
+                record['qibla'] = {'bearing': qibla[i][0], 'distance_km': qibla[i][1]}
+            lines.append(json.dumps(record, ensure_ascii=False))
+    return '\n'.join(lines) + '\n'
+
+
+def binary_path(out_dir, name, lat, lon, year):
+    """مسار ملف الجدول الثنائي لمدينة وسنة (الإحداثيات تميز المدن المتشابهة الأسماء)"""
+    safe_name = re.sub(r'[^\w\-]+', '_', name, flags=re.UNICODE).strip('_') or 'location'
+    return os.path.join(out_dir, f"{safe_name}_{lat:.4f}_{lon:.4f}_{year}.ptt")
+
+
+def unique_binary_paths(locations, out_dir, year):
+    """تمرير المواقع مع رفض أي موقعين يكتبان نفس الملف
+
+    العمال يكتبون بالتوازي، فبدون هذا الفحص يبقى أحد الجدولين عشوائياً بلا خطأ.
+    """
+    seen = {}
+    for line, location in enumerate(locations, start=1):
+        path = binary_path(out_dir, location[0], location[1], location[2], year)
+        if path in seen:
+            raise ValueError(f"الموقعان رقم {seen[path]} و {line} ({location[0]}) "
+                             f"يكتبان نفس الملف {os.path.basename(path)}")
+        seen[path] = line
+        yield location
+
+
+def process_chunk(chunk, start, end, fmt, out_dir=None, method=DEFAULT_METHOD, school=SCHOOL_SHAFI,
+                  qibla=False):
+    """عمل العامل: حساب دفعة وإرجاع النص الجاهز للكتابة (أو كتابة الملفات الثنائية)"""
+    if fmt == 'bin':
+        for name, lat, lon, tz in chunk:
+            for year in range(start.year, end.year + 1):
+                path = binary_path(out_dir, name, lat, lon, year)
+                write_timetable(path, lat, lon, year, tz, method, school)
+        return ''
+
+    days = date_range(start, end)
+    minutes = compute_chunk_minutes(chunk, days, method, school)
+    qibla = compute_chunk_qibla(chunk) if qibla else None
+    if fmt == 'csv':
+        return render_csv(chunk, days, minutes, qibla)
+    return render_jsonl(chunk, days, minutes, qibla)
+
+
+def generate(locations, out, start, end, fmt='csv', workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+             method=DEFAULT_METHOD, school=SCHOOL_SHAFI, qibla=False):
+    """توليد الجداول لكل المواقع بالتوازي مع كتابة متدفقة
+
+    locations: مولد (name, lat, lon, tz)
+    out: ملف نصي مفتوح (csv/jsonl) أو مجلد (bin)
+    method و school: طريقة الحساب (أرقام aladhan) ومذهب العصر
+    qibla: إضافة اتجاه القبلة والمسافة إلى الكعبة (csv و jsonl فقط)
+    يرجع عدد المواقع المعالجة.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"صيغة غير مدعومة: {fmt}")
+    if qibla and fmt == 'bin':
+        raise ValueError("القبلة غير مدعومة في صيغة bin")
+
+    workers = workers or os.cpu_count() or 1
+    out_dir = out if fmt == 'bin' else None
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+        locations = unique_binary_paths(locations, out_dir, start.year)
+    elif fmt == 'csv':
+        columns = ['name', 'date', 'lat', 'lon'] + list(PRAYER_KEYS)
+        if qibla:
+            columns += ['qibla', 'qibla_km']
+        csv.writer(out, lineterminator='\n').writerow(columns)
+
+    # عدد محدود من الدفعات قيد التنفيذ حتى تبقى الذاكرة ثابتة
+    max_pending = workers * 2
+    pending = deque()
+    processed = 0
+
+    def drain_one():
+        future, count = pending.popleft()
+        text = future.result()
+        if text:
+            out.write(text)
+        return count
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in chunked(locations, chunk_size):
+            pending.append((executor.submit(process_chunk, chunk, start, end, fmt, out_dir,
+                                            method, school, qibla), len(chunk)))
+            if len(pending) >= max_pending:
+                processed += drain_one()
+        while pending:
+            processed += drain_one()
+
+    return processed
+
+
+def parse_date(value):
+    """تحليل تاريخ بصيغة YYYY-MM-DD"""
+    return date.fromisoformat(value)
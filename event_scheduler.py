@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⏲️ مجدول أحداث بكومة مؤقتات (Timer Heap)
+Event-Driven Scheduler
+
+بدلاً من الاستيقاظ كل ثانية وفحص الوقت، تُحفظ الأحداث القادمة (الصلاة
+التالية، تغير الدقيقة، منتصف الليل) في كومة مرتبة بالوقت، وينام المجدول
+حتى أقرب حدث فقط عبر root.after.
+
+أي حدث تأخر تنفيذه (مثلاً بسبب انشغال الواجهة) يُنفذ عند أول استيقاظ، فلا
+تضيع الأحداث كما كان يحدث مع شرط now.second == 0.
+"""
+
+import heapq
+import itertools
+from datetime import datetime, timedelta
+
+from metrics import log
+
+# أقصى مدة نوم، حتى يُكتشف تغيير ساعة النظام أو الاستيقاظ من السكون
+MAX_SLEEP_MS = 5 * 60 * 1000
+
+# أقل عدد أحداث ملغاة قبل إعادة بناء الكومة
+COMPACT_MIN_CANCELLED = 32
+
+
+class EventScheduler:
+    """جدولة دوال في أوقات محددة (datetime) فوق حلقة Tk"""
+
+    def __init__(self, root, clock=datetime.now):
+        self.root = root
+        self.clock = clock
+        self.wakeups = 0
+        self.fired = 0
+        self._heap = []
+        self._counter = itertools.count()
+        self._cancelled = set()
+        self._names = {}
+        self._after_id = None
+        self._armed_for = None
+
+    def schedule(self, when, callback, name=None):
+        """جدولة callback في الوقت when (يُلغى أي حدث سابق بنفس الاسم)"""
+        if name is not None:
+            self.cancel(name)
+
+        event_id = next(self._counter)
+        heapq.heappush(self._heap, (when, event_id, name, callback))
+        if name is not None:
+            self._names[name] = event_id
+        self._arm()
+        return event_id
+
+    def schedule_in(self, delay_seconds, callback, name=None):
+        """جدولة callback بعد عدد من الثواني"""
+        return self.schedule(self.clock() + timedelta(seconds=delay_seconds), callback, name)
+
+    def cancel(self, name_or_id):
+        """إلغاء حدث بالاسم أو بالرقم"""
+        event_id = self._names.pop(name_or_id, name_or_id)
+        if isinstance(event_id, int):
+            self._cancelled.add(event_id)
+            self._compact()
+
+    def _compact(self):
+        """إعادة بناء الكومة بدون الأحداث الملغاة إذا أصبحت أكثر من نصفها
+        (الإلغاء لا يحذف الحدث من وسط الكومة، فتتراكم مع إعادة الجدولة)"""
+        if len(self._cancelled) <= max(COMPACT_MIN_CANCELLED, len(self._heap) // 2):
+            return
+        self._heap = [event for event in self._heap if event[1] not in self._cancelled]
+        heapq.heapify(self._heap)
+        self._cancelled.clear()
+
+    def cancel_prefix(self, prefix):
+        """إلغاء كل الأحداث التي يبدأ اسمها بـ prefix"""
+        for name in [n for n in self._names if isinstance(n, str) and n.startswith(prefix)]:
+            self.cancel(name)
+
+    def next_event_time(self):
+        """وقت أقرب حدث قائم (أو None)"""
+        self._discard_cancelled()
+        return self._heap[0][0] if self._heap else None
+
+    def _discard_cancelled(self):
+        while self._heap and self._heap[0][1] in self._cancelled:
+            self._cancelled.discard(heapq.heappop(self._heap)[1])
+
+    def _arm(self):
+        """ضبط مؤقت Tk واحد على أقرب حدث"""
+        next_time = self.next_event_time()
+        if next_time is None or next_time == self._armed_for:
+            return
+
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+
+        delay = (next_time - self.clock()).total_seconds() * 1000
+        delay = int(min(max(delay, 0), MAX_SLEEP_MS))
+        self._armed_for = next_time
+        self._after_id = self.root.after(delay, self._wake)
+
+    def _wake(self):
+        """تنفيذ كل الأحداث المستحقة ثم النوم حتى الحدث التالي"""
+        self._after_id = None
+        self._armed_for = None
+        self.wakeups += 1
+
+        now = self.clock()
+        while True:
+            self._discard_cancelled()
+            if not self._heap or self._heap[0][0] > now:
+                break
+
+            _, event_id, name, callback = heapq.heappop(self._heap)
+            if name is not None and self._names.get(name) == event_id:
+                del self._names[name]
+
+            self.fired += 1
+            try:
+                callback()
+            except Exception as e:
+                log.warning(f"⚠️ خطأ في تنفيذ الحدث {name}: {e}")
+
+        self._arm()
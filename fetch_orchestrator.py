@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🎼 منسق عمليات الجلب (asyncio)
+Asyncio Fetch Orchestrator
+
+حلقة asyncio واحدة في خيط خلفي تدير كل عمليات الإدخال/الإخراج:
+• عدد محدود من العمليات المتزامنة (Semaphore + مجمع خيوط ثابت)
+• مهلة لكل عملية
+• إلغاء مجموعة عمليات دفعة واحدة (مثلاً عند تغير الموقع)
+• النتائج تعود لخيط الواجهة عبر طابور واحد (results) يفرغه Tk
+
+الحلقة وخيطها يبدآن مع أول عملية فقط، فلا يتأخر رسم الواجهة عند بدء التطبيق.
+last_batch_seconds يقيس زمن آخر دفعة عمليات كاملة (من أول عملية حتى فراغ الطابور).
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import log
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TIMEOUT = 15
+
+
+class FetchOrchestrator:
+    """تشغيل العمليات الحاجبة عبر حلقة asyncio بتزامن محدود"""
+
+    def __init__(self, max_concurrency=DEFAULT_CONCURRENCY, default_timeout=DEFAULT_TIMEOUT):
+        self.default_timeout = default_timeout
+        self.results = queue.Queue()
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self.durations = {}
+        self.last_batch_seconds = None
+
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency,
+                                            thread_name_prefix='fetch')
+        self._groups = defaultdict(set)
+        self._pending = 0
+        self._batch_started = None
+        self._lock = threading.Lock()
+
+        self.loop = None
+        self._semaphore = None
+        self._thread = None
+
+    def _ensure_started(self):
+        """تشغيل حلقة asyncio في خيطها عند أول عملية"""
+        with self._lock:
+            if self.loop is not None:
+                return
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run_loop, name='fetch-loop', daemon=True)
+            self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @property
+    def pending(self):
+        """عدد العمليات التي لم تنته بعد"""
+        with self._lock:
+            return self._pending
+
+    def submit(self, fn, name='task', group=None, timeout=None,
+               on_done=None, on_error=None, on_cancel=None):
+        """جدولة fn (دالة حاجبة) وإرجاع concurrent.futures.Future
+
+        on_done(result) و on_error(exception) تُنفذ لاحقاً في خيط الواجهة عبر drain().
+        on_cancel() تُنفذ فور إلغاء العملية (في الخيط الذي ألغاها أو خيط الحلقة).
+        """
+        timeout = timeout or self.default_timeout
+        self._ensure_started()
+        with self._lock:
+            if self._pending == 0:
+                self._batch_started = time.perf_counter()
+            self._pending += 1
+
+        future = asyncio.run_coroutine_threadsafe(
+            self._run(fn, name, timeout, on_done, on_error), self.loop)
+
+        if group is not None:
+            with self._lock:
+                self._groups[group].add(future)
+        future.add_done_callback(lambda f: self._future_done(f, group, on_cancel))
+        return future
+
+    def _future_done(self, future, group, on_cancel):
+        """تحديث العدادات عند انتهاء العملية بأي طريقة (حتى لو أُلغيت قبل أن تبدأ)"""
+        with self._lock:
+            if group is not None:
+                self._groups[group].discard(future)
+            self._pending -= 1
+            if self._pending == 0 and self._batch_started is not None:
+                self.last_batch_seconds = time.perf_counter() - self._batch_started
+                self._batch_started = None
+
+        if future.cancelled():
+            self.cancelled += 1
+            if on_cancel:
+                on_cancel()
+
+    async def _run(self, fn, name, timeout, on_done, on_error):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        started = time.perf_counter()
+        try:
+            async with self._semaphore:
+                result = await asyncio.wait_for(
+                    self.loop.run_in_executor(self._executor, fn), timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            if on_error:
+                self.results.put((on_error, TimeoutError(f"انتهت مهلة {name} ({timeout} ث)")))
+            return None
+        except Exception as e:
+            self.failed += 1
+            if on_error:
+                self.results.put((on_error, e))
+            return None
+        else:
+            self.completed += 1
+            if on_done:
+                self.results.put((on_done, result))
+            return result
+        finally:
+            self.durations[name] = time.perf_counter() - started
+
+    def cancel_group(self, group):
+        """إلغاء كل عمليات مجموعة لم تنته بعد"""
+        with self._lock:
+            futures = list(self._groups.pop(group, ()))
+        for future in futures:
+            future.cancel()
+        return len(futures)
+
+    def drain(self, max_items=100):
+        """تنفيذ نتائج العمليات المنتهية (يُستدعى من خيط الواجهة فقط)"""
+        handled = 0
+        while handled < max_items:
+            try:
+                callback, value = self.results.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(value)
+            except Exception as e:
+                # معالج فاشل لا يوقف تفريغ بقية النتائج
+                log.warning(f"⚠️ خطأ في معالجة نتيجة عملية: {e!r}")
+            handled += 1
+        return handled
+
+    def stats(self):
+        """إحصائيات العمليات وزمن آخر دفعة"""
+        return {
+            'pending': self.pending,
+            'completed': self.completed,
+            'failed': self.failed,
+            'timed_out': self.timed_out,
+            'cancelled': self.cancelled,
+            'last_batch_seconds': self.last_batch_seconds,
+            'durations': dict(self.durations)
+        }
+
+    def shutdown(self):
+        """إيقاف الحلقة والخيوط"""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🗺️ تحديد المدينة من الإحداثيات بدون إنترنت
+Offline Reverse Geocoder
+
+قائمة مدن العالم (GeoNames، المدن التي يزيد سكانها عن 50 ألفاً) مضمنة في
+world_cities.csv.gz، ومفهرسة بشجرة KD على إحداثيات ثلاثية على كرة الوحدة
+(فلا مشكلة عند خط التاريخ أو القطبين). أقرب مدينة ومنطقتها الزمنية لأي
+إحداثيات في ميكروثوانٍ، والقائمة تُحمل عند أول استخدام فقط.
+
+بيانات المدن من GeoNames (https://www.geonames.org) برخصة CC BY 4.0.
+
+الاستخدام:
+    python geocoder.py lookup 24.7136 46.6753
+    python geocoder.py build cities15000.txt countryInfo.txt --min-population 50000
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import math
+import os
+import sys
+import threading
+from collections import namedtuple
+from datetime import datetime, time
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'world_cities.csv.gz')
+DEFAULT_MIN_POPULATION = 50000
+EARTH_RADIUS_KM = 6371.0088
+
+City = namedtuple('City', 'name country country_code latitude longitude timezone population')
+
+
+def _unit_vector(lat, lon):
+    """نقطة على كرة الوحدة (x, y, z)"""
+    phi = math.radians(lat)
+    lam = math.radians(lon)
+    cos_phi = math.cos(phi)
+    return (cos_phi * math.cos(lam), cos_phi * math.sin(lam), math.sin(phi))
+
+
+def _chord_to_km(chord_squared):
+    """مربع طول الوتر على كرة الوحدة → المسافة على سطح الأرض بالكيلومتر"""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(chord_squared) / 2))
+
+
+class KDTree:
+    """شجرة KD ضمنية: النقاط مرتبة بحيث يكون وسط كل مدى هو عقدة التقسيم"""
+
+    def __init__(self, points):
+        self._points = list(points)
+        self.order = list(range(len(self._points)))
+        self._build(0, len(self.order), 0)
+
+    def _build(self, lo, hi, axis):
+        if hi - lo <= 1:
+            return
+        mid = (lo + hi) // 2
+        points = self._points
+        self.order[lo:hi] = sorted(self.order[lo:hi], key=lambda i: points[i][axis])
+        next_axis = (axis + 1) % 3
+        self._build(lo, mid, next_axis)
+        self._build(mid + 1, hi, next_axis)
+
+    def nearest(self, point):
+        """رقم أقرب نقطة ومربع المسافة إليها"""
+        best = [None, math.inf]
+        if self.order:
+            self._search(point, 0, len(self.order), 0, best)
+        return best[0], best[1]
+
+    def _search(self, point, lo, hi, axis, best):
+        if lo >= hi:
+            return
+        mid = (lo + hi) // 2
+        index = self.order[mid]
+        other = self._points[index]
+
+        dx = point[0] - other[0]
+        dy = point[1] - other[1]
+        dz = point[2] - other[2]
+        distance = dx * dx + dy * dy + dz * dz
+        if distance < best[1]:
+            best[0] = index
+            best[1] = distance
+
+        diff = point[axis] - other[axis]
+        next_axis = (axis + 1) % 3
+        near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+        self._search(point, near[0], near[1], next_axis, best)
+        if diff * diff < best[1]:
+            self._search(point, far[0], far[1], next_axis, best)
+
+
+class Gazetteer:
+    """قائمة مدن مفهرسة للبحث عن أقرب مدينة"""
+
+    def __init__(self, cities):
+        self.cities = list(cities)
+        self._tree = KDTree(_unit_vector(c.latitude, c.longitude) for c in self.cities)
+        self._by_timezone = {}
+        for city in self.cities:
+            largest = self._by_timezone.get(city.timezone)
+            if largest is None or city.population > largest.population:
+                self._by_timezone[city.timezone] = city
+
+    @classmethod
+    def load(cls, path=GAZETTEER_PATH):
+        """تحميل القائمة من ملف CSV (مضغوط أو لا)"""
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8', newline='') as f:
+            cities = [City(row[0], row[1], row[2], float(row[3]), float(row[4]), row[5], int(row[6]))
+                      for row in csv.reader(f)]
+        return cls(cities)
+
+    def __len__(self):
+        return len(self.cities)
+
+    def nearest(self, lat, lon):
+        """أقرب مدينة والمسافة إليها بالكيلومتر (أو (None, None) لقائمة فارغة)"""
+        index, chord_squared = self._tree.nearest(_unit_vector(lat, lon))
+        if index is None:
+            return None, None
+        return self.cities[index], _chord_to_km(chord_squared)
+
+    def largest_in_timezone(self, timezone):
+        """أكبر مدينة في منطقة زمنية (مثلاً Asia/Riyadh) أو None"""
+        return self._by_timezone.get(timezone)
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer():
+    """القائمة المضمنة (تُحمل مرة واحدة عند أول استخدام، من أي خيط)"""
+    global _gazetteer
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            _gazetteer = Gazetteer.load()
+        return _gazetteer
+
+
+def nearest_city(lat, lon):
+    """أقرب مدينة من القائمة المضمنة والمسافة إليها بالكيلومتر"""
+    return get_gazetteer().nearest(lat, lon)
+
+
+def utc_offset(timezone, day):
+    """فرق توقيت منطقة زمنية عن UTC بالساعات ظهر يوم معين (أو None إن لم تُعرف)"""
+    try:
+        from zoneinfo import ZoneInfo
+        zone = ZoneInfo(timezone)
+    except Exception:
+        # بايثون أقدم من 3.9، أو لا توجد قاعدة مناطق زمنية (ويندوز بدون tzdata)
+        return None
+    return datetime.combine(day, time(12), tzinfo=zone).utcoffset().total_seconds() / 3600
+
+
+def system_timezone_name():
+    """اسم المنطقة الزمنية للجهاز (مثلاً Asia/Riyadh) أو None"""
+    name = os.environ.get('TZ', '').lstrip(':')
+    if '/' in name and not os.path.isabs(name):
+        return name
+
+    try:
+        target = os.path.realpath('/etc/localtime')
+    except OSError:
+        return None
+    marker = 'zoneinfo' + os.sep
+    if marker in target:
+        return target.split(marker, 1)[1]
+    return None
+
+
+def build_gazetteer(cities_path, countries_path, out=GAZETTEER_PATH, min_population=DEFAULT_MIN_POPULATION):
+    """توليد world_cities.csv.gz من ملفات GeoNames (cities15000.txt و countryInfo.txt)"""
+    countries = {}
+    with open(countries_path, encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('#'):
+                continue
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) > 4:
+                countries[fields[0]] = fields[4]
+
+    rows = []
+    with open(cities_path, encoding='utf-8') as f:
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) < 18:
+                continue
+            population = int(fields[14] or 0)
+            if population < min_population:
+                continue
+            code = fields[8]
+            rows.append((fields[1], countries.get(code, code), code,
+                         round(float(fields[4]), 4), round(float(fields[5]), 4),
+                         fields[17], population))
+
+    rows.sort(key=lambda row: -row[6])
+    # mtime=0 حتى يكون الملف نفسه بايت ببايت عند إعادة التوليد من نفس البيانات
+    with gzip.GzipFile(out, 'wb', compresslevel=9, mtime=0) as raw:
+        with io.TextIOWrapper(raw, encoding='utf-8', newline='') as f:
+            csv.writer(f, lineterminator='\n').writerows(rows)
+    return len(rows)
+
+
+def main(argv=None):
+    """أداة سطر الأوامر: البحث عن أقرب مدينة، أو توليد القائمة من GeoNames"""
+    parser = argparse.ArgumentParser(description="تحديد المدينة من الإحداثيات بدون إنترنت")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    lookup = commands.add_parser('lookup', help="أقرب مدينة لإحداثيات")
+    lookup.add_argument('lat', type=float, help="خط العرض")
+    lookup.add_argument('lon', type=float, help="خط الطول")
+
+    build = commands.add_parser('build', help="توليد القائمة المضمنة من ملفات GeoNames")
+    build.add_argument('cities', help="ملف cities15000.txt")
+    build.add_argument('countries', help="ملف countryInfo.txt")
+    build.add_argument('--min-population', type=int, default=DEFAULT_MIN_POPULATION,
+                       help="أقل عدد سكان للمدينة")
+    build.add_argument('-o', '--output', default=GAZETTEER_PATH, help="ملف الإخراج")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        count = build_gazetteer(args.cities, args.countries, args.output, args.min_population)
+        print(f"✅ تم حفظ {count} مدينة في {args.output}")
+        return 0
+
+    city, distance = nearest_city(args.lat, args.lon)
+    if city is None:
+        print("⚠️ قائمة المدن فارغة")
+        return 1
+    offset = utc_offset(city.timezone, datetime.now().date())
+    print(f"📍 {city.name}, {city.country} ({distance:.1f} كم) | 🕐 {city.timezone}"
+          + (f" (UTC{offset:+g})" if offset is not None else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📅 التقويم الهجري (أم القرى) بدون اتصال
+Offline Umm al-Qura Hijri Calendar
+
+تحويل ميلادي ↔ هجري من جدول بدايات الشهور الرسمي لتقويم أم القرى
+(1343-1500 هـ، أي 1924-08-01 إلى 2077-11-16).
+
+الجدول مضغوط: لكل سنة هجرية 6 خانات hex، كل شهر بخانتين ثنائيتين
+تمثلان (طول الشهر - 28). البيانات مأخوذة من جداول أم القرى المنشورة
+في مكتبة hijri-converter (رخصة MIT).
+
+• gregorian_to_hijri - تحويل يوم واحد بفهرسة مباشرة O(1)
+• hijri_to_gregorian - التحويل العكسي
+• gregorian_to_hijri_batch - تحويل متجه لمدى تواريخ (numpy إن توفرت)
+"""
+
+import importlib.util
+from array import array
+from datetime import date
+
+# numpy اختيارية، ولا تُستورد إلا عند أول حساب متجه (استيرادها يبطئ بدء التطبيق)
+NUMPY_AVAILABLE = importlib.util.find_spec('numpy') is not None
+
+FIRST_YEAR = 1343
+FIRST_ORDINAL = date(1924, 8, 1).toordinal()  # 1 محرم 1343
+
+HIJRI_MONTHS_AR = (
+    'محرم', 'صفر', 'ربيع الأول', 'ربيع الآخر', 'جمادى الأولى', 'جمادى الآخرة',
+    'رجب', 'شعبان', 'رمضان', 'شوال', 'ذو القعدة', 'ذو الحجة'
+)
+
+# أطوال الشهور مضغوطة (6 خانات hex لكل سنة، من 1343 حتى 1500)
+_MONTH_LENGTHS = (
+    'a8a9a66666659a27666969a55a69a535a666b2a6669a65999a56666666669699a6666999'
+    '9a666665a665a6666669659a65966aa66666666666666666a666666a2666a66666666666'
+    '666666a6666669a666666666a99966a65999999999a5a666696666666a59a69996666666'
+    '9999996666666659a69969a66666996666666a65a6a6665aa66665666669a6666659a666'
+    'a66666a66665a665666966666659a69966a666669999a666699999a6659a66599999666a'
+    '6599a9966a696669a59a66669999999966666599a69666a659a69966a696a69a599a9965'
+    '9a6599996666599a66666a669a69999aa6599aa5659a95969996666659a66699a69a6999'
+    '69a665a6a596a696599999699666695999a96669a65a69999a66669999999665a66596a6'
+    '9666a6599a99669a66669999a666669996999659a95969a96666a699a69969a665699966'
+    '66659a99966a6665a99999a96699a59a9996a696599a596669659aa5999a6666999a6666'
+    '69a659a99966a965999996666659a69999a65a69a56a669669a6596996666659a699669a'
+    '659a99969a995a9a659a69969a6659999969659a699669a659a9a569a696a99a59a66665'
+    'a659999966696599a99669a6a669999a66659a599699965a66599a99666a665a69999a66'
+    '699999a9965a'
+)
+
+
+def _build_month_starts():
+    """بدايات كل الشهور كأرقام أيام (ordinal) + بداية ما بعد آخر شهر"""
+    starts = array('l', [FIRST_ORDINAL])
+    for i in range(0, len(_MONTH_LENGTHS), 6):
+        packed = int(_MONTH_LENGTHS[i:i + 6], 16)
+        for month in range(12):
+            starts.append(starts[-1] + 28 + ((packed >> (2 * month)) & 3))
+    return starts
+
+
+MONTH_STARTS = _build_month_starts()
+LAST_YEAR = FIRST_YEAR + (len(MONTH_STARTS) - 1) // 12 - 1
+LAST_ORDINAL = MONTH_STARTS[-1] - 1
+
+# فهرس مباشر: لكل يوم رقم شهره (يُبنى عند أول استخدام)
+_day_months = None
+
+
+def _day_month_index():
+    global _day_months
+    if _day_months is None:
+        index = array('H')
+        for month, (start, end) in enumerate(zip(MONTH_STARTS, MONTH_STARTS[1:])):
+            index.extend([month] * (end - start))
+        _day_months = index
+    return _day_months
+
+
+def gregorian_to_hijri(day):
+    """تحويل تاريخ ميلادي إلى (سنة، شهر، يوم) هجري"""
+    ordinal = day.toordinal()
+    if not FIRST_ORDINAL <= ordinal <= LAST_ORDINAL:
+        raise ValueError(f"التاريخ {day} خارج مدى تقويم أم القرى")
+
+    month_index = (_day_months or _day_month_index())[ordinal - FIRST_ORDINAL]
+    year, month = divmod(month_index, 12)
+    return (FIRST_YEAR + year, month + 1, ordinal - MONTH_STARTS[month_index] + 1)
+
+
+def hijri_to_gregorian(year, month, day):
+    """تحويل تاريخ هجري إلى date ميلادي"""
+    month_index = (year - FIRST_YEAR) * 12 + month - 1
+    if not 0 <= month_index < len(MONTH_STARTS) - 1 or not 1 <= month <= 12:
+        raise ValueError(f"التاريخ {year}-{month} خارج مدى تقويم أم القرى")
+
+    start = MONTH_STARTS[month_index]
+    if not 1 <= day <= MONTH_STARTS[month_index + 1] - start:
+        raise ValueError(f"اليوم {day} غير موجود في الشهر {month}/{year}")
+    return date.fromordinal(start + day - 1)
+
+
+def month_length(year, month):
+    """عدد أيام شهر هجري"""
+    month_index = (year - FIRST_YEAR) * 12 + month - 1
+    return MONTH_STARTS[month_index + 1] - MONTH_STARTS[month_index]
+
+
+def gregorian_to_hijri_batch(dates):
+    """تحويل مصفوفة تواريخ ميلادية دفعة واحدة
+
+    مع numpy: dates مصفوفة datetime64، والنتيجة ثلاث مصفوفات (سنوات، شهور، أيام).
+    بدون numpy: dates قائمة date، والنتيجة قائمة صفوف (سنة، شهر، يوم).
+    """
+    if not NUMPY_AVAILABLE:
+        return [gregorian_to_hijri(day) for day in dates]
+
+    import numpy as np
+
+    # ordinal لـ 1970-01-01 هو 719163
+    ordinals = np.asarray(dates, dtype='datetime64[D]').astype(np.int64) + 719163
+    if ordinals.size and (ordinals.min() < FIRST_ORDINAL or ordinals.max() > LAST_ORDINAL):
+        raise ValueError("بعض التواريخ خارج مدى تقويم أم القرى")
+
+    starts = np.asarray(MONTH_STARTS, dtype=np.int64)
+    month_index = np.searchsorted(starts, ordinals, side='right') - 1
+    years, months = np.divmod(month_index, 12)
+    return FIRST_YEAR + years, months + 1, ordinals - starts[month_index] + 1
+
+
+def format_hijri(day):
+    """نص التاريخ الهجري بالعربية، مثل: 7 جمادى الأولى 1448 هـ"""
+    year, month, day_of_month = gregorian_to_hijri(day)
+    return f"{day_of_month} {HIJRI_MONTHS_AR[month - 1]} {year} هـ"
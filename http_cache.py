@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🗄️ ذاكرة تخزين مؤقت دائمة لاستجابات HTTP
+Persistent On-Disk HTTP Response Cache
+
+• المفتاح هو الرابط بعد توحيده (ترتيب المعاملات، أحرف صغيرة للمضيف...)
+• لكل نوع من البيانات مدة صلاحية خاصة (TTL_POLICIES)
+• حجم المجلد محدود، ويُحذف الأقدم استخداماً أولاً (LRU حسب وقت التعديل)
+• إن أرسلت الخدمة ETag أو Last-Modified يبقى المدخل بعد انتهاء صلاحيته، ويُتحقق منه
+  بطلب مشروط (revalidation)؛ رد 304 يجدد صلاحيته (renew) بدون تنزيل المحتوى من جديد
+
+كل مدخل ملف JSON مستقل، فتلف مدخل لا يؤثر على غيره.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_CACHE_DIR = '.prayer_cache'
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+# تاريخ اليوم في مسارات aladhan: /v1/timingsByCity/18-10-2026 و /v1/gToH/18-10-2026
+URL_DAY_PATTERN = re.compile(r'/(\d{2})-(\d{2})-(\d{4})(?:[/?]|$)')
+
+
+def seconds_until_midnight(now=None):
+    """عدد الثواني حتى منتصف الليل القادم (بالتوقيت المحلي)"""
+    now = now or datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return (midnight - now).total_seconds()
+
+
+def seconds_until_end_of_day(now=None, url=None):
+    """عدد الثواني حتى نهاية اليوم المطلوب في الرابط (أو اليوم الحالي إن لم يوجد)
+
+    أوقات الغد تبقى صالحة حتى نهاية الغد، لا حتى منتصف الليل القادم
+    (حين تصبح أوقات اليوم فتُجلب من جديد).
+    """
+    now = now or datetime.now()
+    match = URL_DAY_PATTERN.search(url or '')
+    if match is None:
+        return seconds_until_midnight(now)
+    day, month, year = (int(part) for part in match.groups())
+    try:
+        end = datetime(year, month, day) + timedelta(days=1)
+    except ValueError:
+        return seconds_until_midnight(now)
+    return (end - now).total_seconds()
+
+
+# مدة الصلاحية لكل نوع: رقم بالثواني أو دالة تحسبها من الوقت الحالي والرابط
+TTL_POLICIES = {
+    'location': 6 * 3600,           # الموقع من ip-api
+    'forecast': 3 * 3600,           # توقعات الطقس بالساعة (تُحفظ أيضاً في forecast_file)
+    'prayer': seconds_until_end_of_day,  # أوقات يوم الرابط
+    'hijri': seconds_until_end_of_day    # التاريخ الهجري ليوم الرابط
+}
+
+
+def normalize_url(url):
+    """توحيد الرابط حتى تتطابق الطلبات المتكافئة"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or '/', query, ''))
+
+
+def cache_validators(headers):
+    """ETag و Last-Modified من ترويسات الرد (بغض النظر عن حالة الأحرف)"""
+    validators = {}
+    for name, value in (headers or {}).items():
+        lowered = name.lower()
+        if lowered == 'etag':
+            validators['etag'] = value
+        elif lowered == 'last-modified':
+            validators['last_modified'] = value
+    return validators
+
+
+def ttl_for(kind, now=None, url=None):
+    """مدة صلاحية نوع البيانات بالثواني"""
+    policy = TTL_POLICIES.get(kind, 0)
+    return policy(now, url) if callable(policy) else policy
+
+
+class HttpCache:
+    """ذاكرة مؤقتة على القرص بمدة صلاحية لكل نوع وحد أقصى للحجم"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._sizes = None
+
+    def _path(self, key):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def _load_index(self):
+        """حساب أحجام المدخلات الموجودة (مرة واحدة عند أول استخدام)"""
+        if self._sizes is not None:
+            return
+        self._sizes = {}
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                path = os.path.join(self.directory, name)
+                try:
+                    self._sizes[path] = os.path.getsize(path)
+                except OSError:
+                    pass
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        if self._sizes is not None:
+            self._sizes.pop(path, None)
+
+    def _read(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get(self, url):
+        """قراءة مدخل صالح أو None"""
+        path = self._path(normalize_url(url))
+        with self._lock:
+            entry = self._read(path)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry.get('expires', 0) <= time.time():
+                # المدخل المنتهي يبقى إن كان قابلاً للتحقق بطلب مشروط
+                if not entry.get('validators'):
+                    self._remove(path)
+                self.misses += 1
+                return None
+
+            # تحديث وقت الاستخدام من أجل LRU
+            try:
+                os.utime(path, None)
+            except OSError:
+                pass
+
+            self.hits += 1
+            return entry.get('data')
+
+    def revalidation(self, url):
+        """(المحتوى المحفوظ، ترويسات الطلب المشروط) لمدخل قابل للتحقق، أو (None, None)"""
+        with self._lock:
+            entry = self._read(self._path(normalize_url(url)))
+        validators = (entry or {}).get('validators')
+        if not validators:
+            return None, None
+
+        headers = {}
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        return entry.get('data'), headers
+
+    def put(self, url, data, kind, headers=None):
+        """حفظ استجابة بمدة صلاحية نوعها (مع ETag و Last-Modified من ترويسات الرد)"""
+        ttl = ttl_for(kind, url=url)
+        if ttl <= 0:
+            return
+
+        key = normalize_url(url)
+        entry = {
+            'url': key,
+            'kind': kind,
+            'expires': time.time() + ttl,
+            'data': data
+        }
+        validators = cache_validators(headers)
+        if validators:
+            entry['validators'] = validators
+
+        with self._lock:
+            self._write(self._path(key), entry)
+
+    def renew(self, url, kind, headers=None):
+        """تجديد صلاحية مدخل بعد رد 304 (المحتوى لم يتغير)"""
+        ttl = ttl_for(kind, url=url)
+        path = self._path(normalize_url(url))
+        with self._lock:
+            entry = self._read(path)
+            if entry is None or ttl <= 0:
+                return
+            entry['expires'] = time.time() + ttl
+            # الرد 304 قد يحمل ETag أحدث
+            entry.setdefault('validators', {}).update(cache_validators(headers))
+            self._write(path, entry)
+
+    def _write(self, path, entry):
+        """كتابة مدخل ذرياً ثم الحذف حتى حد الحجم (داخل القفل)"""
+        self._load_index()
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        self._sizes[path] = os.path.getsize(path)
+        self._evict()
+
+    def invalidate(self, url):
+        """حذف مدخل رابط معين"""
+        with self._lock:
+            self._remove(self._path(normalize_url(url)))
+
+    def _evict(self):
+        """حذف الأقدم استخداماً حتى يعود الحجم تحت الحد"""
+        total = sum(self._sizes.values())
+        if total <= self.max_bytes:
+            return
+
+        def last_used(path):
+            try:
+                return os.path.getmtime(path)
+            except OSError:
+                return 0
+
+        for path in sorted(self._sizes, key=last_used):
+            if total <= self.max_bytes:
+                break
+            total -= self._sizes.get(path, 0)
+            self._remove(path)
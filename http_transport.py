@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🔌 ناقل HTTP مشترك باتصالات دائمة (keep-alive)
+Pooled Keep-Alive HTTP Transport
+
+كائن واحد لكل التطبيق يعيد استخدام اتصالات TCP/TLS بدلاً من فتح اتصال
+جديد لكل طلب:
+• مع requests: جلسة requests.Session بمجمع اتصالات لكل مضيف
+• بدون requests: مجمع اتصالات http.client بسيط مع keep-alive
+
+stats() تعرض عدد الطلبات والاتصالات الجديدة والمعاد استخدامها.
+get_json_if_modified() ترسل If-None-Match / If-Modified-Since، ورد 304 لا يحمل محتوى.
+الجلسة (واستيراد requests) تُنشأ عند أول طلب فقط، فلا تبطئ بدء التطبيق.
+"""
+
+import http.client
+import importlib.util
+import json
+import threading
+from urllib.parse import urljoin, urlsplit
+
+# requests اختيارية، وتُستورد عند أول طلب فقط
+REQUESTS_AVAILABLE = importlib.util.find_spec('requests') is not None
+
+DEFAULT_TIMEOUT = 10
+DEFAULT_MAX_PER_HOST = 4
+MAX_REDIRECTS = 3
+USER_AGENT = 'PrayerTimesApp/2.0'
+
+# أخطاء تعني أن الاتصال المعاد استخدامه أُغلق من الطرف الآخر
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError
+)
+
+
+class HttpError(Exception):
+    """استجابة HTTP بحالة خطأ"""
+
+    def __init__(self, status, url):
+        super().__init__(f"HTTP {status}: {url}")
+        self.status = status
+        self.url = url
+
+
+class _ConnectionPool:
+    """مجمع اتصالات http.client لكل مضيف (بديل requests)"""
+
+    def __init__(self, max_per_host, timeout):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.new_connections = 0
+        self._idle = {}
+        self._limits = {}
+        self._lock = threading.Lock()
+
+    def _host_key(self, parts):
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        return (parts.scheme, parts.hostname, port)
+
+    def _limit(self, key):
+        with self._lock:
+            if key not in self._limits:
+                self._limits[key] = threading.BoundedSemaphore(self.max_per_host)
+            return self._limits[key]
+
+    def _checkout(self, key):
+        """اتصال خامل من المجمع أو اتصال جديد، مع علامة إعادة الاستخدام"""
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+            self.new_connections += 1
+
+        scheme, host, port = key
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout), False
+        return http.client.HTTPConnection(host, port, timeout=self.timeout), False
+
+    def _checkin(self, key, conn):
+        with self._lock:
+            self._idle.setdefault(key, []).append(conn)
+
+    def request(self, url, headers):
+        """طلب GET يرجع (الحالة، الترويسات، المحتوى، الرابط النهائي)"""
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            key = self._host_key(parts)
+            path = parts.path or '/'
+            if parts.query:
+                path = f"{path}?{parts.query}"
+
+            with self._limit(key):
+                conn, reused = self._checkout(key)
+                # أي فشل (في المحاولة الأولى أو إعادة المحاولة أو قراءة المحتوى) يغلق
+                # الاتصال الحالي، فلا يبقى مقبس مفتوح خارج المجمع
+                try:
+                    try:
+                        conn.request('GET', path, headers=headers)
+                        response = conn.getresponse()
+                    except STALE_CONNECTION_ERRORS:
+                        conn.close()
+                        if not reused:
+                            raise
+                        # الاتصال القديم أُغلق: إعادة المحاولة باتصال جديد مرة واحدة
+                        with self._lock:
+                            self.new_connections += 1
+                        conn = type(conn)(conn.host, conn.port, timeout=self.timeout)
+                        conn.request('GET', path, headers=headers)
+                        response = conn.getresponse()
+                    body = response.read()
+                except Exception:
+                    conn.close()
+                    raise
+
+                if response.will_close:
+                    conn.close()
+                else:
+                    self._checkin(key, conn)
+
+            location = response.getheader('Location')
+            if response.status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                continue
+
+            return response.status, dict(response.getheaders()), body, url
+
+        raise HttpError(response.status, url)
+
+    def close(self):
+        with self._lock:
+            for connections in self._idle.values():
+                for conn in connections:
+                    conn.close()
+            self._idle.clear()
+
+
+class HttpTransport:
+    """ناقل HTTP واحد مشترك بين كل عمليات الجلب"""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_per_host=DEFAULT_MAX_PER_HOST):
+        self.timeout = timeout
+        self.max_per_host = max_per_host
+        self.requests_made = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self._session = None
+        self._adapters = []
+        self._pool = None
+
+    def _ensure_backend(self):
+        """إنشاء جلسة requests أو مجمع http.client عند أول طلب"""
+        if self._session is not None or self._pool is not None:
+            return
+
+        if REQUESTS_AVAILABLE:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            session.headers['User-Agent'] = USER_AGENT
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=self.max_per_host, pool_block=True)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._adapters = [adapter]
+            self._session = session
+        else:
+            self._pool = _ConnectionPool(self.max_per_host, self.timeout)
+
+    def get(self, url, headers=None):
+        """طلب GET يرجع (الحالة، الترويسات، المحتوى بالبايت)"""
+        with self._lock:
+            self._ensure_backend()
+            self.requests_made += 1
+
+        if self._session is not None:
+            response = self._session.get(url, headers=headers, timeout=self.timeout)
+            return response.status_code, dict(response.headers), response.content
+
+        request_headers = {
+            'User-Agent': USER_AGENT,
+            'Accept-Encoding': 'identity',
+            'Connection': 'keep-alive'
+        }
+        request_headers.update(headers or {})
+        status, response_headers, body, _ = self._pool.request(url, request_headers)
+        return status, response_headers, body
+
+    def get_json(self, url, headers=None):
+        """طلب GET وتحليل JSON (يرفع HttpError لحالات الخطأ)"""
+        status, _, body = self.get(url, headers)
+        if status >= 400:
+            raise HttpError(status, url)
+        return json.loads(body.decode('utf-8'))
+
+    def get_json_if_modified(self, url, headers=None):
+        """طلب GET مشروط: (JSON أو None إن لم يتغير المحتوى (304)، ترويسات الرد)
+
+        headers ترويسات التحقق من HttpCache.revalidation() (أو None لطلب عادي).
+        """
+        status, response_headers, body = self.get(url, headers)
+        if status == 304 and headers:
+            with self._lock:
+                self.not_modified += 1
+            return None, response_headers
+        if status >= 300:
+            raise HttpError(status, url)
+        return json.loads(body.decode('utf-8')), response_headers
+
+    def _new_connections(self):
+        if self._pool is not None:
+            return self._pool.new_connections
+
+        total = 0
+        for adapter in self._adapters:
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    total += pool.num_connections
+        return total
+
+    def stats(self):
+        """إحصائيات إعادة استخدام الاتصالات"""
+        new_connections = self._new_connections()
+        reused = max(self.requests_made - new_connections, 0)
+        return {
+            'backend': 'requests' if REQUESTS_AVAILABLE else 'http.client',
+            'requests': self.requests_made,
+            'new_connections': new_connections,
+            'reused_connections': reused,
+            'not_modified': self.not_modified,
+            'reuse_ratio': reused / self.requests_made if self.requests_made else 0.0
+        }
+
+    def close(self):
+        """إغلاق كل الاتصالات المفتوحة"""
+        if self._session is not None:
+            self._session.close()
+        if self._pool is not None:
+            self._pool.close()
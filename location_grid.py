@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🔲 تكميم الموقع لمفاتيح الذاكرة المؤقتة
+Grid-Quantized Location Keys
+
+أوقات الصلاة والطقس والقبلة لا تتغير تقريباً خلال بضعة كيلومترات، فتُقرب
+الإحداثيات إلى مركز خلية قبل استخدامها في مفاتيح الذاكرة أو روابط الشبكة،
+وكل الأجهزة في نفس الخلية تشترك في نفس النتيجة.
+
+نوعان من الخلايا:
+• شبكة درجات ثابتة: '0.01' (حوالي 1.1 كم، الافتراضي)
+• geohash بدقة معينة: 'geohash:6' (حوالي 1.2 × 0.6 كم)
+
+الخطأ الناتج بالدقائق (الفرق بين أوقات الموقع الحقيقي ومركز خليته):
+    python location_grid.py --grid 0.05
+    python location_grid.py --grid geohash:5 --sample 2000
+"""
+
+import argparse
+import math
+import random
+from datetime import date
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+DEFAULT_GRID = '0.01'
+
+
+def geohash_encode(lat, lon, precision):
+    """ترميز geohash بعدد أحرف precision"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        bounds, coordinate = (lon_range, lon) if even else (lat_range, lat)
+        mid = (bounds[0] + bounds[1]) / 2
+        value <<= 1
+        if coordinate >= mid:
+            value |= 1
+            bounds[0] = mid
+        else:
+            bounds[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def geohash_bounds(geohash):
+    """حدود خلية geohash: (أدنى عرض، أعلى عرض، أدنى طول، أعلى طول)"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            bounds = lon_range if even else lat_range
+            mid = (bounds[0] + bounds[1]) / 2
+            if value >> shift & 1:
+                bounds[0] = mid
+            else:
+                bounds[1] = mid
+            even = not even
+    return lat_range[0], lat_range[1], lon_range[0], lon_range[1]
+
+
+class LocationGrid:
+    """تقريب الإحداثيات إلى خلية (شبكة درجات أو geohash)"""
+
+    def __init__(self, spec=DEFAULT_GRID):
+        self.spec = str(spec)
+        self.geohash_precision = None
+        self.cell_degrees = None
+
+        if self.spec.startswith('geohash:'):
+            self.geohash_precision = int(self.spec.split(':', 1)[1])
+            if not 1 <= self.geohash_precision <= 12:
+                raise ValueError(f"دقة geohash خارج المدى [1, 12]: {self.spec}")
+        else:
+            self.cell_degrees = float(self.spec)
+            if not 0 < self.cell_degrees <= 10:
+                raise ValueError(f"حجم خلية غير صحيح: {self.spec}")
+            # منازل التقريب حتى تبقى المراكز أرقاماً نظيفة (24.71 لا 24.709999)
+            self._decimals = max(0, -math.floor(math.log10(self.cell_degrees))) + 2
+
+    def key(self, lat, lon):
+        """مفتاح الخلية (نفس المفتاح لكل المواقع داخلها)"""
+        if self.geohash_precision:
+            return geohash_encode(lat, lon, self.geohash_precision)
+        return round(lat / self.cell_degrees), round(lon / self.cell_degrees)
+
+    def snap(self, lat, lon):
+        """مركز خلية الموقع: الإحداثيات المستخدمة في الحساب والروابط"""
+        if self.geohash_precision:
+            lat_min, lat_max, lon_min, lon_max = geohash_bounds(self.key(lat, lon))
+            return round((lat_min + lat_max) / 2, 6), round((lon_min + lon_max) / 2, 6)
+
+        row, column = self.key(lat, lon)
+        return (round(row * self.cell_degrees, self._decimals),
+                round(column * self.cell_degrees, self._decimals))
+
+    def __repr__(self):
+        return f"LocationGrid({self.spec!r})"
+
+
+def quantization_error(grid, lat, lon, day, tz_offset=0.0, **method):
+    """فرق أوقات الصلاة بالدقائق بين الموقع ومركز خليته (لكل صلاة بترتيب PRAYER_KEYS)"""
+    from prayer_engine import compute_prayer_times
+
+    exact = compute_prayer_times(lat, lon, day, tz_offset, **method)
+    snapped = compute_prayer_times(*grid.snap(lat, lon), day, tz_offset, **method)
+    return [abs(a - b) * 60 for a, b in zip(exact, snapped)]
+
+
+def error_report(grid, points, days, **method):
+    """أقصى ومتوسط الخطأ بالدقائق لكل صلاة على مجموعة مواقع وأيام"""
+    from prayer_engine import PRAYER_KEYS
+
+    maximum = [0.0] * len(PRAYER_KEYS)
+    total = [0.0] * len(PRAYER_KEYS)
+    counts = [0] * len(PRAYER_KEYS)
+    for lat, lon in points:
+        for day in days:
+            for i, error in enumerate(quantization_error(grid, lat, lon, day, **method)):
+                if math.isfinite(error):
+                    maximum[i] = max(maximum[i], error)
+                    total[i] += error
+                    counts[i] += 1
+
+    return {
+        key: {'max': maximum[i], 'mean': total[i] / counts[i] if counts[i] else None}
+        for i, key in enumerate(PRAYER_KEYS)
+    }
+
+
+def sample_points(count, seed=0):
+    """مواقع عشوائية داخل مدن العالم (من قائمة geocoder)، لتمثيل المستخدمين الفعليين"""
+    from geocoder import get_gazetteer
+
+    cities = get_gazetteer().cities
+    rng = random.Random(seed)
+    return [(c.latitude + rng.uniform(-0.1, 0.1), c.longitude + rng.uniform(-0.1, 0.1))
+            for c in rng.sample(cities, min(count, len(cities)))]
+
+
+def main(argv=None):
+    """تقرير خطأ التكميم بالدقائق"""
+    from prayer_engine import DEFAULT_METHOD
+
+    parser = argparse.ArgumentParser(description="خطأ أوقات الصلاة بالدقائق الناتج عن تكميم الموقع")
+    parser.add_argument('--grid', default=DEFAULT_GRID, help="حجم الخلية بالدرجات أو geohash:N")
+    parser.add_argument('--sample', type=int, default=500, help="عدد المواقع")
+    parser.add_argument('--year', type=int, default=date.today().year, help="السنة (يوم من كل شهر)")
+    parser.add_argument('--method', type=int, default=DEFAULT_METHOD, help="طريقة الحساب (أرقام aladhan)")
+    args = parser.parse_args(argv)
+
+    grid = LocationGrid(args.grid)
+    days = [date(args.year, month, 15) for month in range(1, 13)]
+    report = error_report(grid, sample_points(args.sample), days, method=args.method)
+
+    print(f"🔲 خطأ التكميم للخلية {grid.spec} ({args.sample} موقع × {len(days)} يوم)، بالدقائق:")
+    for key, error in report.items():
+        mean = f"{error['mean']:.2f}" if error['mean'] is not None else "-"
+        print(f"   {key:<8} أقصى {error['max']:6.2f} | متوسط {mean}")
+    return 0
+
+
+if __name__ == "__main__":
+    main()
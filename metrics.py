@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📈 قياس زمن العمليات وسجل بمستويات
+Lightweight Spans, Metrics & Level-Gated Logger
+
+كل عملية مهمة (تحديد الموقع، الجلب من الشبكة، الحسابات، تحديث البطاقات)
+تُغلف بـ span يسجل زمنها ونتيجتها وإصابة الذاكرة المؤقتة:
+
+    with span('fetch.weather') as s:
+        s.cache_hit = False
+        ...
+
+لكل اسم: العدد والنتائج (ok / error / غيرها) والزمن (الإجمالي والأقصى والأخير)
+وإصابات الذاكرة المؤقتة، مع آخر العمليات البطيئة. snapshot() ترجعها كقاموس،
+و write_snapshot() تحفظها JSON للتحليل لاحقاً.
+
+الرسائل عبر log (سجل بسيط بمستويات بدلاً من print)، والمستوى من PRAYER_LOG_LEVEL
+(DEBUG لزمن كل عملية، INFO افتراضياً، WARNING للتحذيرات فقط). الرسالة المعطلة
+تكلف مقارنة واحدة، فلا يتأثر زمن المسارات الساخنة.
+"""
+
+import functools
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+LOG_LEVEL_ENV = 'PRAYER_LOG_LEVEL'
+DEFAULT_LOG_LEVEL = 'INFO'
+DEFAULT_SLOW_MS = 500
+DEFAULT_RECENT_SLOW = 50
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVELS = {'DEBUG': DEBUG, 'INFO': INFO, 'WARNING': WARNING, 'ERROR': ERROR}
+
+
+class Logger:
+    """سجل بمستويات: الرسالة تُطبع كما هي (مثل print) إن كان مستواها مفعلاً"""
+
+    def __init__(self, level=INFO):
+        self.level = level
+
+    def is_enabled(self, level):
+        return level >= self.level
+
+    def debug(self, message):
+        if DEBUG >= self.level:
+            print(message)
+
+    def info(self, message):
+        if INFO >= self.level:
+            print(message)
+
+    def warning(self, message):
+        if WARNING >= self.level:
+            print(message)
+
+    def error(self, message):
+        if ERROR >= self.level:
+            print(message)
+
+
+log = Logger()
+
+
+def configure_logging(level=None):
+    """ضبط مستوى السجل: PRAYER_LOG_LEVEL، ثم المعامل (من الإعدادات)، ثم INFO"""
+    level = os.environ.get(LOG_LEVEL_ENV) or level or DEFAULT_LOG_LEVEL
+    if isinstance(level, str):
+        level = LEVELS.get(level.upper(), INFO)
+    log.level = level
+    return log
+
+
+class Span:
+    """عملية واحدة قيد القياس (تُستخدم مع with)"""
+
+    __slots__ = ('metrics', 'name', 'outcome', 'cache_hit', 'seconds', '_started')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.outcome = None
+        self.cache_hit = None
+        self.seconds = None
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._started
+        if exc_type is not None:
+            self.outcome = 'error'
+        self.metrics.record(self.name, self.seconds, self.outcome or 'ok', self.cache_hit)
+        return False
+
+
+class _SpanStats:
+    """إجماليات اسم واحد (بالثواني)"""
+
+    __slots__ = ('count', 'total', 'max', 'last', 'outcomes', 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.outcomes = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'outcomes': dict(self.outcomes),
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.total * 1000 / self.count, 3),
+            'max_ms': round(self.max * 1000, 3),
+            'last_ms': round(self.last * 1000, 3),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses
+        }
+
+
+class Metrics:
+    """سجل زمن العمليات ونتائجها (آمن للاستخدام من عدة خيوط)"""
+
+    def __init__(self, slow_ms=DEFAULT_SLOW_MS, recent_slow=DEFAULT_RECENT_SLOW):
+        self.slow_ms = slow_ms
+        self.started_at = datetime.now()
+        self._spans = {}
+        self._slow = deque(maxlen=recent_slow)
+        self._lock = threading.Lock()
+
+    def span(self, name):
+        """قياس عملية: with metrics.span('name') as s"""
+        return Span(self, name)
+
+    def timed(self, name):
+        """مزخرف يقيس كل استدعاء لدالة"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with Span(self, name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, name, seconds, outcome='ok', cache_hit=None):
+        """تسجيل عملية انتهت (لمن يقيس الزمن بنفسه)"""
+        # أقل عمل ممكن داخل القفل: تُستدعى من المسارات الساخنة
+        with self._lock:
+            stats = self._spans.get(name)
+            if stats is None:
+                stats = self._spans[name] = _SpanStats()
+            stats.count += 1
+            stats.total += seconds
+            stats.last = seconds
+            if seconds > stats.max:
+                stats.max = seconds
+            outcomes = stats.outcomes
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            if cache_hit is not None:
+                if cache_hit:
+                    stats.cache_hits += 1
+                else:
+                    stats.cache_misses += 1
+
+        if seconds * 1000 >= self.slow_ms:
+            self._slow.append({'name': name, 'ms': round(seconds * 1000, 1), 'outcome': outcome,
+                               'at': datetime.now().isoformat(timespec='seconds')})
+            log.warning(f"🐢 عملية بطيئة: {name} {seconds * 1000:.0f} ms ({outcome})")
+        elif DEBUG >= log.level:
+            cache = '' if cache_hit is None else (', من الذاكرة' if cache_hit else ', من المصدر')
+            log.debug(f"⏱️ {name}: {seconds * 1000:.1f} ms ({outcome}{cache})")
+
+    def snapshot(self):
+        """نسخة من كل القياسات (قابلة للتحويل إلى JSON)"""
+        with self._lock:
+            spans = {name: stats.as_dict() for name, stats in sorted(self._spans.items())}
+            slow = list(self._slow)
+
+        return {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'slow_ms': self.slow_ms,
+            'spans': spans,
+            'slow': slow
+        }
+
+    def write_snapshot(self, path):
+        """حفظ القياسات في ملف JSON (كتابة ذرية)"""
+        from persister import atomic_write_json
+        atomic_write_json(path, self.snapshot())
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._slow.clear()
+            self.started_at = datetime.now()
+
+
+# السجل المشترك للبرنامج كله
+metrics = Metrics()
+
+
+def span(name):
+    """قياس عملية في السجل المشترك"""
+    return metrics.span(name)
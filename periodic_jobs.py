@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🔁 مجدول المهام الدورية
+Periodic Job Scheduler
+
+فوق EventScheduler: لكل مهمة فترة (ساعة، يوم...) وتُنفذ في أوقات محاذاة لساعة
+الحائط، بدلاً من الاستيقاظ كل 5 دقائق وفحص now.minute == 0 (الذي يفوّت التحديث
+إن لم يوافق الاستيقاظ الدقيقة صفر):
+• المحاذاة: التنفيذ التالي عند أول مضاعف للفترة منذ منتصف الليل (بداية كل ساعة...)
+• إزاحة عشوائية ثابتة لكل مهمة حتى jitter ثانية، فلا تطلب كل الأجهزة الخدمة معاً
+• الفشل ← إعادة المحاولة بعد مهلة تتضاعف (backoff) حتى max_backoff، مع عشوائية
+  في كل مهلة، ثم تعود المحاذاة بعد أول نجاح
+• موعد فات (سكون الجهاز أو انشغال الواجهة) يُنفذ عند أول استيقاظ للمجدول
+
+نتيجة المهمة: False أو استثناء = فشل، True = نجاح، None = لا حكم الآن (العمليات
+الخلفية تبلغ لاحقاً بـ report_success أو report_failure).
+"""
+
+import math
+import random
+from datetime import datetime, timedelta
+
+from metrics import log, span
+
+HOUR = 3600
+DAY = 24 * HOUR
+DEFAULT_BACKOFF = 60.0
+
+
+class PeriodicJob:
+    """مهمة دورية واحدة وحالتها"""
+
+    def __init__(self, name, interval, func, offset=0.0, align=True,
+                 backoff=DEFAULT_BACKOFF, max_backoff=None):
+        if interval <= 0:
+            raise ValueError(f"فترة المهمة {name} يجب أن تكون موجبة")
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.offset = offset
+        self.align = align
+        self.backoff = backoff
+        self.max_backoff = max_backoff or interval
+        self.runs = 0
+        self.failures = 0
+        self.last_run = None
+        self.next_run = None
+
+    def as_dict(self):
+        return {
+            'interval': self.interval,
+            'offset': round(self.offset, 1),
+            'runs': self.runs,
+            'failures': self.failures,
+            'last_run': self.last_run.isoformat(timespec='seconds') if self.last_run else None,
+            'next_run': self.next_run.isoformat(timespec='seconds') if self.next_run else None
+        }
+
+
+class JobScheduler:
+    """مهام دورية محاذاة لساعة الحائط مع إزاحة وإعادة محاولة متدرجة"""
+
+    def __init__(self, events, rng=None):
+        self.events = events
+        self.jobs = {}
+        self._random = rng or random.Random()
+
+    def add(self, name, interval, func, jitter=0.0, align=True,
+            backoff=DEFAULT_BACKOFF, max_backoff=None):
+        """إضافة مهمة (أو استبدالها) وجدولة أول تنفيذ لها"""
+        offset = self._random.uniform(0, min(jitter, interval)) if jitter > 0 else 0.0
+        job = PeriodicJob(name, interval, func, offset, align, backoff, max_backoff)
+        self.jobs[name] = job
+        self._schedule(job, self.next_aligned(job))
+        return job
+
+    def remove(self, name):
+        if self.jobs.pop(name, None) is not None:
+            self.events.cancel(f'job:{name}')
+
+    def next_aligned(self, job, now=None):
+        """الموعد التالي: أول مضاعف للفترة منذ منتصف الليل بعد now، مع إزاحة المهمة"""
+        now = now or self.events.clock()
+        if not job.align:
+            return now + timedelta(seconds=job.interval + job.offset)
+
+        day_start = datetime.combine(now.date(), datetime.min.time())
+        elapsed = (now - day_start).total_seconds()
+        slot = (math.floor((elapsed - job.offset) / job.interval) + 1) * job.interval + job.offset
+        return day_start + timedelta(seconds=slot)
+
+    def _schedule(self, job, when):
+        job.next_run = when
+        self.events.schedule(when, lambda: self._run(job), f'job:{job.name}')
+
+    def _run(self, job):
+        """تنفيذ المهمة ثم جدولة موعدها التالي (أو إعادة المحاولة)"""
+        job.runs += 1
+        job.last_run = self.events.clock()
+        with span(f'job.{job.name}') as s:
+            try:
+                result = job.func()
+            except Exception as e:
+                log.warning(f"⚠️ خطأ في المهمة الدورية {job.name}: {e}")
+                result = False
+            if result is False:
+                s.outcome = 'failed'
+
+        if self.jobs.get(job.name) is not job:
+            return
+        if result is False:
+            self.report_failure(job.name)
+            return
+        if result is True:
+            job.failures = 0
+        self._schedule(job, self.next_aligned(job))
+
+    def report_failure(self, name):
+        """فشل المهمة (أو عملية خلفية بدأتها): إعادة المحاولة بعد مهلة متضاعفة"""
+        job = self.jobs.get(name)
+        if job is None:
+            return
+
+        job.failures += 1
+        delay = min(job.backoff * 2 ** (job.failures - 1), job.max_backoff)
+        # مهلة عشوائية بين النصف والكل، فلا تعيد الأجهزة المحاولة معاً بعد انقطاع الخدمة
+        delay = self._random.uniform(delay / 2, delay)
+        log.info(f"🔁 إعادة محاولة {name} بعد {delay:.0f} ثانية (فشل {job.failures})")
+        self._schedule(job, self.events.clock() + timedelta(seconds=delay))
+
+    def report_success(self, name):
+        """نجاح المهمة بعد فشل: العودة إلى المواعيد المحاذاة"""
+        job = self.jobs.get(name)
+        if job is None or not job.failures:
+            return
+
+        job.failures = 0
+        self._schedule(job, self.next_aligned(job))
+
+    def stats(self):
+        """حالة كل المهام"""
+        return {name: job.as_dict() for name, job in sorted(self.jobs.items())}
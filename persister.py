@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+💾 حفظ مؤجل وذري لملفات JSON
+Debounced Atomic Write-Behind Persister
+
+• save() لا تكتب شيئاً: تحفظ نسخة من البيانات وتؤجل الكتابة قليلاً،
+  فعدة تغييرات متتالية لنفس الملف تصبح كتابة واحدة
+• التحويل إلى JSON والكتابة في خيط خلفي، لا في خيط الواجهة
+• الكتابة ذرية: ملف مؤقت في نفس المجلد ثم fsync ثم os.replace،
+  فانقطاع التشغيل في منتصف الكتابة يترك الملف القديم سليماً
+• flush() تكتب كل ما هو معلق فوراً، وتُسجل مع atexit عبر install_exit_hook()
+"""
+
+import atexit
+import copy
+import json
+import os
+import threading
+
+from metrics import log
+
+DEFAULT_DELAY = 0.5
+
+
+def atomic_write_json(path, data, indent=2):
+    """كتابة JSON بشكل ذري (ملف مؤقت + fsync + استبدال)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    temp_path = f"{path}.tmp"
+
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+    # حفظ عملية الاستبدال نفسها في المجلد (غير متاح على ويندوز)
+    if hasattr(os, 'O_DIRECTORY'):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class WriteBehindPersister:
+    """دمج طلبات الحفظ المتتالية وكتابتها لاحقاً في الخلفية"""
+
+    def __init__(self, delay=DEFAULT_DELAY, writer=atomic_write_json):
+        self.delay = delay
+        self.writer = writer
+        self.requested = 0
+        self.writes = 0
+        self.failed = 0
+        self._pending = {}
+        self._timer = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def save(self, path, data):
+        """طلب حفظ data في path (تُحفظ نسخة منها الآن وتُكتب بعد delay ثانية)"""
+        snapshot = copy.deepcopy(data)
+        with self._lock:
+            self._pending[path] = snapshot
+            self.requested += 1
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    @property
+    def pending(self):
+        """عدد الملفات التي تنتظر الكتابة"""
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """كتابة كل ما هو معلق الآن (من أي خيط)"""
+        # قفل الكتابة يضمن ألا تُكتب نسخة أقدم فوق نسخة أحدث
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+
+            for path, data in pending.items():
+                try:
+                    self.writer(path, data)
+                    self.writes += 1
+                except Exception as e:
+                    self.failed += 1
+                    log.warning(f"⚠️ خطأ في حفظ {path}: {e}")
+
+        return len(pending)
+
+    def install_exit_hook(self):
+        """كتابة المعلق تلقائياً عند خروج البرنامج"""
+        atexit.register(self.flush)
+
+    def stats(self):
+        """إحصائيات الحفظ: الطلبات مقابل الكتابات الفعلية"""
+        return {
+            'requested': self.requested,
+            'writes': self.writes,
+            'failed': self.failed,
+            'pending': self.pending
+        }
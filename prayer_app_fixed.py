@@ -7,12 +7,12 @@ Advanced Prayer Times Application - Enhanced Version
 المكتبات المستخدمة:
 ✅ tkinter - واجهة المستخدم الرسومية (مدمجة مع Python)
 ✅ requests - للاتصال بـ APIs (اختيارية)
-✅ urllib - بديل requests (مدمج مع Python)
+✅ http.client - بديل requests باتصالات دائمة (مدمج مع Python)
 ✅ json - لمعالجة البيانات وحفظ الإعدادات
 ✅ threading - للعمليات المتوازية
 ✅ datetime - للتعامل مع التاريخ والوقت
 ✅ math - للحسابات الفلكية
-✅ webbrowser - لفتح الروابط
+✅ webbrowser - لفتح الروابط (تُستورد عند أول استخدام)
 ✅ os - للتعامل مع الملفات
 
 المميزات:
@@ -31,24 +31,45 @@ Advanced Prayer Times Application - Enhanced Version
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, timedelta
-import math
 import json
-import threading
-import webbrowser
 import os
-import urllib.request
-import urllib.parse
-import urllib.error
-import random
-
-# محاولة استيراد المكتبات الاختيارية
-try:
-    import requests
-    REQUESTS_AVAILABLE = True
-    print("✅ مكتبة requests متوفرة")
-except ImportError:
-    REQUESTS_AVAILABLE = False
-    print("⚠️ مكتبة requests غير متوفرة - سيتم استخدام urllib")
+import sys
+import time
+
+from prayer_engine import (
+    CALCULATION_METHODS, INVALID_MINUTES, PRAYER_NAMES_AR, QIBLA_DIRECTIONS_AR, SCHOOL_SHAFI,
+    DaySchedule, compute_prayer_times, qibla_info, system_utc_offset
+)
+from timetable_store import TimetableStore
+from http_cache import HttpCache, normalize_url
+from http_transport import REQUESTS_AVAILABLE, HttpTransport
+from singleflight import SingleFlight
+from fetch_orchestrator import FetchOrchestrator
+from hijri_calendar import format_hijri
+from event_scheduler import EventScheduler
+from periodic_jobs import DAY, HOUR, JobScheduler
+from prayer_log import PrayerLog
+from geocoder import get_gazetteer, nearest_city, system_timezone_name
+from location_grid import DEFAULT_GRID, LocationGrid
+from persister import WriteBehindPersister
+from metrics import configure_logging, log, metrics, span
+from ui_queue import UIUpdateQueue
+from weather_forecast import HourlyForecast, forecast_query
+
+# الرسائل بالمستوى الافتراضي حتى تُقرأ الإعدادات (PRAYER_LOG_LEVEL يتقدم عليها)
+configure_logging()
+
+# عناوين الخدمات الخارجية؛ تُغير لكل خدمة من api_endpoints في الإعدادات، أو كلها
+# معاً بمتغير البيئة PRAYER_API_BASE (مثلاً لخادم الاختبار api_stub_server.py)
+API_BASE_ENV = 'PRAYER_API_BASE'
+DEFAULT_API_ENDPOINTS = {
+    'location': 'http://ip-api.com',
+    'weather': 'https://api.open-meteo.com',
+    'aladhan': 'http://api.aladhan.com'
+}
+
+# إزاحة عشوائية ثابتة لمهمة الطقس حتى 5 دقائق بعد بداية الساعة، فلا تصل طلبات كل الأجهزة معاً
+WEATHER_JITTER_SECONDS = 5 * 60
 
 class PrayerTimesApp:
     def __init__(self, root):
@@ -69,7 +90,17 @@ class PrayerTimesApp:
         self.country = tk.StringVar(value="السعودية")
         self.latitude = tk.DoubleVar(value=24.7136)
         self.longitude = tk.DoubleVar(value=46.6753)
-        self.prayer_times = {}
+        self.prayer_times = None
+        self.tomorrow_prayer_times = None
+
+        # بطاقات الصلوات الدائمة (تُعدل في مكانها بدل إعادة البناء)
+        self.prayer_cards = {}
+        self.prayers_placeholder = None
+        self.render_stats = {'refreshes': 0, 'widgets_created': 0, 'labels_updated': 0, 'last_ms': 0.0}
+        # آخر نص للقبلة: (الموقع، الجهة، النص المعروض)
+        self.qibla_text = None
+        # توقعات الطقس بالساعة (weather_forecast.py)، والطقس الحالي يُحسب منها
+        self.forecast = None
         self.current_time = tk.StringVar()
         self.next_prayer = tk.StringVar()
         self.time_to_next = tk.StringVar()
@@ -94,11 +125,20 @@ class PrayerTimesApp:
         
         # إعدادات التطبيق
         self.settings = {
-            'calculation_method': 4,  # أم القرى
+            'calculation_method': 4,  # أم القرى (أرقام aladhan، انظر CALCULATION_METHODS)
+            'asr_school': SCHOOL_SHAFI,  # 0 الجمهور، 1 الحنفي
             'auto_location': True,
             'show_weather': True,
             'notifications': True,
-            'sounds': True
+            'sounds': True,
+            'timetable_file': None,  # جدول سنوي محسوب مسبقاً (timetable_store.py)
+            'last_location': None,   # آخر موقع محدد، للرسم الأول قبل الشبكة
+            'manual_location': None,  # {'lat': ..., 'lon': ...} عند إيقاف التحديد التلقائي
+            'location_grid': DEFAULT_GRID,  # خلية الموقع لمفاتيح الذاكرة: درجات أو 'geohash:N'
+            'api_endpoints': {},  # عناوين بديلة للخدمات: location و weather و aladhan
+            'log_level': 'INFO',  # DEBUG لزمن كل عملية، WARNING للتحذيرات فقط
+            'metrics_file': 'prayer_metrics.json',  # قياسات زمن العمليات (None للإيقاف)
+            'forecast_file': 'weather_forecast.json'  # آخر توقعات للطقس، للعرض بدون اتصال
         }
         
         # ألوان وأيقونات الصلوات
@@ -120,15 +160,63 @@ class PrayerTimesApp:
             'العشاء': '🌙'
         }
         
+        # الجدول السنوي المحسوب مسبقاً (إن وجد)
+        self.timetable = None
+
+        # سجل إتمام الصلوات (SQLite)
+        self.prayer_log = None
+
+        # حفظ الإعدادات مؤجلاً وذرياً في الخلفية (مع كتابة المعلق عند الخروج)
+        self.persister = WriteBehindPersister()
+        self.persister.install_exit_hook()
+
+        # ذاكرة التخزين المؤقت لاستجابات الشبكة
+        self.http_cache = HttpCache()
+
+        # ناقل HTTP مشترك باتصالات دائمة
+        self.transport = HttpTransport()
+
+        # دمج الطلبات المتطابقة قيد التنفيذ
+        self.single_flight = SingleFlight()
+
+        # منسق عمليات الشبكة (asyncio في خيط خلفي واحد)
+        self.orchestrator = FetchOrchestrator()
+        self.results_polling = False
+
+        # مجدول الأحداث (الصلاة التالية، تغير الدقيقة، منتصف الليل)
+        self.scheduler = EventScheduler(self.root)
+
+        # المهام الدورية فوقه (بداية اليوم، الطقس كل ساعة...)
+        self.jobs = JobScheduler(self.scheduler)
+
+        # تحديثات النصوص المعروضة: مجمعة ومطبقة مرة واحدة لكل إطار
+        self.ui = UIUpdateQueue(self.root)
+
         # تحميل الإعدادات والبيانات المحفوظة
         self.load_settings()
+        configure_logging(self.settings.get('log_level'))
+        self.load_location_grid()
+        self.restore_last_location()
         self.load_prayer_statistics()
+        self.load_timetable()
+        self.load_forecast()
         
         # إعداد الواجهة
         self.setup_ui()
-        
-        # بدء العمليات
-        self.start_operations()
+
+        # الرسم الأول من الحالة المحفوظة، ثم بدء العمليات الخلفية بعد ظهور النافذة
+        self.paint_cached_state()
+        self.root.after_idle(self.start_operations)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
+    def close(self):
+        """إغلاق النافذة بعد حفظ المعلق وإيقاف العمليات الخلفية"""
+        self.save_metrics()
+        self.persister.flush()
+        self.orchestrator.shutdown()
+        if self.prayer_log is not None:
+            self.prayer_log.close()
+        self.root.destroy()
     
     def load_settings(self):
         """تحميل الإعدادات المحفوظة"""
@@ -137,106 +225,240 @@ class PrayerTimesApp:
                 with open('prayer_settings.json', 'r', encoding='utf-8') as f:
                     saved_settings = json.load(f)
                     self.settings.update(saved_settings)
-                    print("✅ تم تحميل الإعدادات")
+                    log.info("✅ تم تحميل الإعدادات")
         except Exception as e:
-            print(f"⚠️ خطأ في تحميل الإعدادات: {e}")
+            log.warning(f"⚠️ خطأ في تحميل الإعدادات: {e}")
     
+    def save_metrics(self):
+        """حفظ قياسات زمن العمليات في metrics_file (مؤجلاً مع الإعدادات)"""
+        path = self.settings.get('metrics_file')
+        if path:
+            self.persister.save(path, metrics.snapshot())
+
     def save_settings(self):
-        """حفظ الإعدادات"""
+        """حفظ الإعدادات (تُدمج التغييرات المتتالية وتُكتب ذرياً في الخلفية)"""
+        self.persister.save('prayer_settings.json', self.settings)
+    
+    def load_location_grid(self):
+        """خلية الموقع: المواقع القريبة تشترك في نفس مفاتيح الذاكرة المؤقتة وروابط الشبكة"""
+        try:
+            self.location_grid = LocationGrid(self.settings.get('location_grid', DEFAULT_GRID))
+        except ValueError as e:
+            log.warning(f"⚠️ إعداد location_grid غير صحيح، تم استخدام الافتراضي: {e}")
+            self.location_grid = LocationGrid()
+
+    def restore_last_location(self):
+        """استعادة آخر موقع محفوظ حتى يُرسم الموقع الصحيح قبل تحديده من جديد"""
+        last = self.settings.get('last_location')
+        if not last:
+            return
+
         try:
-            with open('prayer_settings.json', 'w', encoding='utf-8') as f:
-                json.dump(self.settings, f, ensure_ascii=False, indent=2)
-                print("✅ تم حفظ الإعدادات")
+            self.latitude.set(last['lat'])
+            self.longitude.set(last['lon'])
+            self.city.set(last['city'])
+            self.country.set(last['country'])
+            self.ui.set(self.location_info, f"📍 {last['city']}, {last['country']}")
+        except (KeyError, TypeError) as e:
+            log.warning(f"⚠️ خطأ في استعادة آخر موقع: {e}")
+
+    def load_timetable(self):
+        """فتح الجدول السنوي المحسوب مسبقاً عبر mmap"""
+        path = self.settings.get('timetable_file')
+        if not path or not os.path.exists(path):
+            return
+
+        try:
+            self.timetable = TimetableStore(path)
+            log.info(f"✅ تم تحميل الجدول السنوي: {path}")
         except Exception as e:
-            print(f"⚠️ خطأ في حفظ الإعدادات: {e}")
-    
-    def load_prayer_statistics(self):
-        """تحميل إحصائيات الصلاة"""
+            log.warning(f"⚠️ خطأ في تحميل الجدول السنوي: {e}")
+            self.timetable = None
+
+    def load_forecast(self):
+        """قراءة آخر توقعات محفوظة للطقس (تُعرض قبل الشبكة وبدون اتصال)"""
+        path = self.settings.get('forecast_file')
+        if not path or not os.path.exists(path):
+            return
+
         try:
-            if os.path.exists('prayer_stats.json'):
-                with open('prayer_stats.json', 'r', encoding='utf-8') as f:
-                    stats = json.load(f)
-                    self.prayers_completed_today = stats.get('today', 0)
-                    self.total_prayers_month = stats.get('month', 0)
-                    self.streak_days = stats.get('streak', 0)
-                    print("✅ تم تحميل الإحصائيات")
-            self.update_prayer_counter()
+            with open(path, 'r', encoding='utf-8') as f:
+                self.forecast = HourlyForecast.from_dict(json.load(f))
         except Exception as e:
-            print(f"⚠️ خطأ في تحميل الإحصائيات: {e}")
-    
-    def save_prayer_statistics(self):
-        """حفظ إحصائيات الصلاة"""
+            log.warning(f"⚠️ خطأ في تحميل توقعات الطقس: {e}")
+            self.forecast = None
+
+    def load_prayer_statistics(self):
+        """فتح سجل الصلوات وقراءة إحصائيات اليوم والشهر والسلسلة"""
         try:
-            stats = {
-                'today': self.prayers_completed_today,
-                'month': self.total_prayers_month,
-                'streak': self.streak_days,
-                'last_update': datetime.now().isoformat()
-            }
-            with open('prayer_stats.json', 'w', encoding='utf-8') as f:
-                json.dump(stats, f, ensure_ascii=False, indent=2)
+            if self.prayer_log is None:
+                self.prayer_log = PrayerLog()
+                log.info("✅ تم تحميل الإحصائيات")
+
+            today = datetime.now().date()
+            self.prayers_completed_today = self.prayer_log.day_count(today)
+            self.total_prayers_month = self.prayer_log.month_count(today)
+            self.streak_days = self.prayer_log.streak(today)
         except Exception as e:
-            print(f"⚠️ خطأ في حفظ الإحصائيات: {e}")
+            log.warning(f"⚠️ خطأ في تحميل الإحصائيات: {e}")
+        self.update_prayer_counter()
     
     def update_prayer_counter(self):
         """تحديث عداد الصلوات"""
-        self.prayer_counter.set(f"📊 {self.prayers_completed_today}/5 صلوات اليوم")
+        counter = f"📊 {self.prayers_completed_today}/5 صلوات اليوم"
+        if self.streak_days:
+            counter += f" | 🔥 {self.streak_days} يوم متتالي"
+        self.ui.set(self.prayer_counter, counter)
     
-    def start_operations(self):
-        """بدء العمليات الأساسية"""
-        # تحديث الوقت
+    def paint_cached_state(self):
+        """رسم النافذة من البيانات المحلية والمحفوظة فقط (بدون شبكة أو خيوط)"""
         self.update_time()
-        
-        # حساب اتجاه القبلة
-        self.calculate_qibla_direction()
-        
-        # جلب التاريخ الهجري
+
+        # التاريخ الهجري محلي (لا يعتمد على الموقع)
         self.get_islamic_date()
+        self.calculate_qibla_direction()
+        if self.settings.get('show_weather', True):
+            self.show_forecast_weather()
+
+        # أوقات الصلاة من الجدول السنوي أو الحساب المحلي أو ذاكرة التخزين المؤقت
+        if not (self.use_timetable_prayer_times() or self.use_local_prayer_times()):
+            today = datetime.now().date()
+            prayer_times = self.cached_prayer_times(today)
+            if prayer_times:
+                self.apply_prayer_times(prayer_times, self.cached_prayer_times(today + timedelta(days=1)))
+            else:
+                self.update_prayers_display()
+
+        # الرسم الأول فوراً بدون انتظار الإطار التالي
+        self.ui.flush()
+        self.root.update_idletasks()
+
+    def start_operations(self):
+        """بدء العمليات الأساسية (بعد الرسم الأول)"""
+        # أحداث الدقيقة
+        self.schedule_minute_tick()
         
-        # تحديد الموقع أو حساب الأوقات
+        # الموقع أولاً، ثم كل ما يعتمد عليه مرة واحدة بعد تحديده
+        manual = self.settings.get('manual_location')
         if self.settings.get('auto_location', True):
             self.detect_location()
+        elif manual:
+            self.set_location(manual['lat'], manual['lon'])
         else:
-            self.get_prayer_times()
+            self.refresh_location_data()
         
-        # جلب معلومات الطقس
+        # بدء التحديثات الدورية (ومنها بداية اليوم الجديد)
+        self.schedule_updates()
+
+    def refresh_location_data(self):
+        """تحديث كل ما يعتمد على الموقع (القبلة والأوقات والطقس)"""
+        # نتائج الموقع السابق لم تعد مفيدة
+        self.orchestrator.cancel_group('location')
+
+        self.calculate_qibla_direction()
+        self.get_prayer_times()
         if self.settings.get('show_weather', True):
             self.get_weather_info()
-        
-        # بدء التحديثات الدورية
-        self.schedule_updates()
+
+    def run_in_background(self, key, target, on_done=None, on_error=None, group=None, timeout=None):
+        """تشغيل عملية في الخلفية، مع تجاهل التكرار إذا كان نفس المفتاح قيد التنفيذ
+
+        on_done و on_error تُنفذ في خيط الواجهة عبر طابور النتائج.
+        """
+        def start(run):
+            self.orchestrator.submit(
+                run, name=key[0], group=group, timeout=timeout,
+                on_done=on_done, on_error=on_error,
+                on_cancel=lambda: self.single_flight.cancel(key)
+            )
+
+        if self.single_flight.submit(key, target, start=start):
+            self.poll_results()
+        else:
+            log.debug(f"↪️ عملية مكررة قيد التنفيذ: {key[0]}")
+
+    def poll_results(self):
+        """تفريغ طابور النتائج في خيط الواجهة ما دامت هناك عمليات جارية"""
+        if self.results_polling:
+            return
+        self.results_polling = True
+
+        def poll():
+            try:
+                # كل نتائج هذه الدورة ثم تحديث واحد للواجهة
+                self.orchestrator.drain()
+                self.ui.flush()
+            finally:
+                # إعادة الجدولة حتى بعد خطأ، وإلا توقف تسليم النتائج لبقية الجلسة
+                if self.orchestrator.pending or not self.orchestrator.results.empty():
+                    self.root.after(50, poll)
+                else:
+                    self.results_polling = False
+                    stats = self.orchestrator.stats()
+                    if stats['last_batch_seconds'] is not None:
+                        log.info(f"⏱️ اكتملت دفعة التحديث في {stats['last_batch_seconds'] * 1000:.0f} ms")
+                    self.save_metrics()
+
+        self.root.after(50, poll)
     
     def detect_location(self):
         """تحديد الموقع الجغرافي تلقائياً"""
         def get_location():
-            try:
-                print("🔍 جاري تحديد الموقع...")
-                
+            log.info("🔍 جاري تحديد الموقع...")
+
+            with span('detect_location'):
                 # استخدام خدمة مجانية لتحديد الموقع
-                url = 'http://ip-api.com/json/?lang=ar'
-                
-                if REQUESTS_AVAILABLE:
-                    response = requests.get(url, timeout=10)
-                    if response.status_code == 200:
-                        data = response.json()
-                        if data['status'] == 'success':
-                            self.process_location_data(data)
-                            return
-                
-                # استخدام urllib كبديل
-                with urllib.request.urlopen(url, timeout=10) as response:
-                    data = json.loads(response.read().decode())
-                    if data['status'] == 'success':
-                        self.process_location_data(data)
-                    else:
-                        self.use_default_location()
-                        
-            except Exception as e:
-                print(f"⚠️ خطأ في تحديد الموقع: {e}")
-                self.use_default_location()
-        
-        threading.Thread(target=get_location, daemon=True).start()
+                url = self.api_url('location', '/json/?lang=ar')
+
+                data = self.fetch_json(url, 'location',
+                                       accept=lambda d: d.get('status') == 'success')
+                if data.get('status') != 'success':
+                    raise ValueError(data.get('message', 'فشل تحديد الموقع'))
+                return data
+
+        def location_failed(error):
+            log.warning(f"⚠️ خطأ في تحديد الموقع: {error}")
+            self.use_fallback_location()
+
+        self.run_in_background(('location',), get_location,
+                               on_done=self.process_location_data,
+                               on_error=location_failed, timeout=10)
     
+    def api_url(self, service, path):
+        """رابط كامل لخدمة خارجية (location أو weather أو aladhan)"""
+        base = (os.environ.get(API_BASE_ENV) or
+                self.settings.get('api_endpoints', {}).get(service) or
+                DEFAULT_API_ENDPOINTS[service])
+        return base.rstrip('/') + path
+
+    def fetch_json(self, url, kind, accept=None):
+        """جلب JSON من الذاكرة المؤقتة أو من الشبكة (مع حفظ الاستجابة المقبولة والتحقق المشروط)"""
+        def fetch():
+            with span(f'fetch.{kind}') as s:
+                cached = self.http_cache.get(url)
+                s.cache_hit = cached is not None
+                if cached is not None:
+                    log.debug(f"💾 من الذاكرة المؤقتة: {kind}")
+                    return cached
+
+                # مدخل منتهٍ بـ ETag أو Last-Modified: طلب مشروط، و 304 = نفس المحتوى
+                stale, conditional = self.http_cache.revalidation(url)
+                data, headers = self.transport.get_json_if_modified(url, conditional)
+                if data is None:
+                    s.outcome = 'not_modified'
+                    log.debug(f"💾 لم يتغير (304): {kind}")
+                    self.http_cache.renew(url, kind, headers)
+                    return stale
+
+                if accept is None or accept(data):
+                    self.http_cache.put(url, data, kind, headers)
+                else:
+                    s.outcome = 'rejected'
+                return data
+
+        # الطلبات المتطابقة في نفس الوقت تشترك في طلب شبكة واحد
+        return self.single_flight.do(('url', normalize_url(url)), fetch)
+
     def process_location_data(self, data):
         """معالجة بيانات الموقع"""
         try:
@@ -244,76 +466,141 @@ class PrayerTimesApp:
             self.longitude.set(data['lon'])
             self.city.set(data['city'])
             self.country.set(data['country'])
-            self.location_info.set(f"📍 {data['city']}, {data['country']}")
+            self.ui.set(self.location_info, f"📍 {data['city']}, {data['country']}")
             
-            print(f"✅ تم تحديد الموقع: {data['city']}, {data['country']}")
+            log.info(f"✅ تم تحديد الموقع: {data['city']}, {data['country']}")
+
+            # حفظ الموقع للرسم الأول في المرة القادمة
+            last_location = {key: data[key] for key in ('city', 'country', 'lat', 'lon')}
+            if self.settings.get('last_location') != last_location:
+                self.settings['last_location'] = last_location
+                self.save_settings()
             
             # تحديث البيانات المعتمدة على الموقع
-            self.root.after(0, self.get_prayer_times)
-            self.root.after(0, self.get_weather_info)
-            self.root.after(0, self.calculate_qibla_direction)
+            self.refresh_location_data()
             
         except Exception as e:
-            print(f"⚠️ خطأ في معالجة بيانات الموقع: {e}")
+            log.warning(f"⚠️ خطأ في معالجة بيانات الموقع: {e}")
             self.use_default_location()
     
+    def set_location(self, lat, lon):
+        """تحديد الموقع من إحداثيات، واسم أقرب مدينة من القائمة المضمنة (بدون شبكة)"""
+        def resolve():
+            city, distance = nearest_city(lat, lon)
+            if city is None:
+                raise LookupError("قائمة المدن فارغة")
+            log.info(f"🗺️ أقرب مدينة: {city.name} ({distance:.1f} كم)")
+            return {'lat': lat, 'lon': lon, 'city': city.name, 'country': city.country}
+
+        def resolve_failed(error):
+            log.warning(f"⚠️ تعذر تحديد اسم المدينة: {error}")
+            self.latitude.set(lat)
+            self.longitude.set(lon)
+            self.ui.set(self.location_info, f"📍 {lat:.4f}, {lon:.4f}")
+            self.refresh_location_data()
+
+        self.run_in_background(('geocode', self.location_grid.key(lat, lon)), resolve,
+                               on_done=self.process_location_data, on_error=resolve_failed)
+
+    def use_fallback_location(self):
+        """موقع بديل بدون شبكة: آخر موقع محفوظ، ثم أكبر مدينة في منطقة الجهاز الزمنية، ثم الرياض"""
+        last = self.settings.get('last_location')
+        if last:
+            self.restore_last_location()
+            self.ui.set(self.location_info, f"📍 {last['city']}, {last['country']} (آخر موقع)")
+            log.info(f"📍 تم استخدام آخر موقع محفوظ: {last['city']}")
+            self.refresh_location_data()
+            return
+
+        def guess_city():
+            zone = system_timezone_name()
+            city = get_gazetteer().largest_in_timezone(zone) if zone else None
+            if city is None:
+                raise LookupError(f"لا توجد مدينة للمنطقة الزمنية {zone}")
+            return city
+
+        def apply_city(city):
+            self.latitude.set(city.latitude)
+            self.longitude.set(city.longitude)
+            self.city.set(city.name)
+            self.country.set(city.country)
+            self.ui.set(self.location_info, f"📍 {city.name}, {city.country} (حسب المنطقة الزمنية)")
+            log.info(f"📍 تم استخدام {city.name} حسب المنطقة الزمنية للجهاز")
+            self.refresh_location_data()
+
+        self.run_in_background(('timezone-city',), guess_city, on_done=apply_city,
+                               on_error=lambda error: self.use_default_location())
+
     def use_default_location(self):
         """استخدام الموقع الافتراضي (الرياض)"""
         self.latitude.set(24.7136)
         self.longitude.set(46.6753)
         self.city.set("الرياض")
         self.country.set("السعودية")
-        self.location_info.set("📍 الرياض, السعودية (افتراضي)")
-        print("📍 تم استخدام الرياض كموقع افتراضي")
+        self.ui.set(self.location_info, "📍 الرياض, السعودية (افتراضي)")
+        log.info("📍 تم استخدام الرياض كموقع افتراضي")
         
         # تحديث البيانات
-        self.root.after(0, self.get_prayer_times)
-        self.root.after(0, self.get_weather_info)
-        self.root.after(0, self.calculate_qibla_direction)
-
-    def get_weather_info(self):
-        """الحصول على معلومات الطقس"""
-        def fetch_weather():
-            try:
-                lat = self.latitude.get()
-                lon = self.longitude.get()
-
-                # استخدام Open-Meteo API (مجاني 100%)
-                url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current_weather=true&timezone=auto"
-
-                if REQUESTS_AVAILABLE:
-                    response = requests.get(url, timeout=10)
-                    if response.status_code == 200:
-                        data = response.json()
-                        self.process_weather_data(data)
-                        return
+        self.refresh_location_data()
 
-                # استخدام urllib كبديل
-                with urllib.request.urlopen(url, timeout=10) as response:
-                    data = json.loads(response.read().decode())
-                    self.process_weather_data(data)
+    def weather_cell(self):
+        """مركز خلية الموقع، فيتطابق الرابط (والتوقعات) لكل المواقع القريبة"""
+        return self.location_grid.snap(self.latitude.get(), self.longitude.get())
 
-            except Exception as e:
-                print(f"⚠️ خطأ في جلب الطقس: {e}")
-                self.weather_info.set("🌤️ 25°C | صافي ☀️ (تقديري)")
+    def get_weather_info(self):
+        """الحصول على معلومات الطقس (من التوقعات المحفوظة، وجلبها مرة يومياً تقريباً)"""
+        lat, lon = self.weather_cell()
+        if self.forecast is not None and not self.forecast.needs_refresh(lat, lon):
+            self.show_forecast_weather()
+            return
 
-        threading.Thread(target=fetch_weather, daemon=True).start()
+        def fetch_forecast():
+            # استخدام Open-Meteo API (مجاني 100%): طلب واحد لتوقعات 48 ساعة
+            url = self.api_url('weather', f"/v1/forecast?{forecast_query(lat, lon)}")
+
+            data = self.fetch_json(url, 'forecast', accept=lambda d: 'hourly' in d)
+            return HourlyForecast.from_open_meteo(data, lat, lon)
+
+        def weather_failed(error):
+            log.warning(f"⚠️ خطأ في جلب الطقس: {error}")
+            self.jobs.report_failure('weather')
+            # التوقعات السابقة ما زالت صالحة للعرض إن كانت تغطي الوقت الحالي
+            if not self.show_forecast_weather():
+                self.ui.set(self.weather_info, "🌤️ 25°C | صافي ☀️ (تقديري)")
+
+        self.run_in_background(('weather', lat, lon), fetch_forecast,
+                               on_done=self.process_weather_data,
+                               on_error=weather_failed, group='location')
+
+    def process_weather_data(self, forecast):
+        """اعتماد توقعات الطقس الجديدة وحفظها وعرض الطقس الحالي منها"""
+        self.forecast = forecast
+        self.jobs.report_success('weather')
+        path = self.settings.get('forecast_file')
+        if path:
+            self.persister.save(path, forecast.to_dict())
+
+        weather_text = self.show_forecast_weather()
+        if weather_text:
+            log.info(f"✅ تم تحديث الطقس: {weather_text}")
+        else:
+            log.warning("⚠️ توقعات الطقس لا تغطي الوقت الحالي")
+            self.ui.set(self.weather_info, "🌤️ الطقس غير متوفر")
 
-    def process_weather_data(self, data):
-        """معالجة بيانات الطقس"""
-        try:
-            current = data.get('current_weather', {})
-            temp = current.get('temperature', 'N/A')
-            weather_code = current.get('weathercode', 0)
-            weather_desc = self.get_weather_description(weather_code)
+    def show_forecast_weather(self):
+        """عرض الطقس الحالي من التوقعات (بدون شبكة)؛ None إن لم تغطِ الموقع والوقت"""
+        forecast = self.forecast
+        if forecast is None or (forecast.latitude, forecast.longitude) != self.weather_cell():
+            return None
 
-            weather_text = f"🌡️ {temp}°C | {weather_desc}"
-            self.weather_info.set(weather_text)
-            print(f"✅ تم تحديث الطقس: {weather_text}")
+        current = forecast.at()
+        if current is None:
+            return None
 
-        except Exception as e:
-            print(f"⚠️ خطأ في معالجة بيانات الطقس: {e}")
-            self.weather_info.set("🌤️ الطقس غير متوفر")
+        temperature, weather_code = current
+        weather_text = f"🌡️ {temperature:.1f}°C | {self.get_weather_description(weather_code)}"
+        self.ui.set(self.weather_info, weather_text)
+        return weather_text
 
     def get_weather_description(self, code):
         """تحويل رمز الطقس إلى وصف عربي"""
@@ -339,344 +626,338 @@ class PrayerTimesApp:
 
     def calculate_qibla_direction(self):
         """حساب اتجاه القبلة من الموقع الحالي"""
-        try:
-            # إحداثيات الكعبة المشرفة
-            kaaba_lat = 21.4225
-            kaaba_lon = 39.8262
-
-            # إحداثيات الموقع الحالي
-            lat = math.radians(self.latitude.get())
-            lon = math.radians(self.longitude.get())
-            kaaba_lat_rad = math.radians(kaaba_lat)
-            kaaba_lon_rad = math.radians(kaaba_lon)
-
-            # حساب الاتجاه باستخدام الصيغة الكروية
-            dlon = kaaba_lon_rad - lon
-            y = math.sin(dlon) * math.cos(kaaba_lat_rad)
-            x = math.cos(lat) * math.sin(kaaba_lat_rad) - math.sin(lat) * math.cos(kaaba_lat_rad) * math.cos(dlon)
-
-            # تحويل إلى درجات
-            bearing = math.atan2(y, x)
-            bearing = math.degrees(bearing)
-            bearing = (bearing + 360) % 360
-
-            # تحديد الاتجاه النصي
-            directions = [
-                "شمال", "شمال شرق", "شرق", "جنوب شرق",
-                "جنوب", "جنوب غرب", "غرب", "شمال غرب"
-            ]
-            direction_index = round(bearing / 45) % 8
-            direction_text = directions[direction_index]
+        with span('calculate_qibla_direction') as s:
+            try:
+                # نفس الموقع: النص السابق كما هو، وإلا من الذاكرة لكل خلية موقع (qibla_info)
+                location = (self.latitude.get(), self.longitude.get())
+                if self.qibla_text is None or self.qibla_text[0] != location:
+                    bearing, distance, sector = qibla_info(*self.location_grid.snap(*location))
+                    direction_text = QIBLA_DIRECTIONS_AR[sector]
+                    self.qibla_text = (location, direction_text,
+                                       f"🧭 القبلة: {direction_text} ({bearing:.1f}°) | 🕋 {distance:,.0f} كم")
 
-            self.qibla_direction.set(f"🧭 القبلة: {direction_text} ({bearing:.1f}°)")
-            print(f"✅ تم حساب اتجاه القبلة: {direction_text}")
+                self.ui.set(self.qibla_direction, self.qibla_text[2])
+                log.info(f"✅ تم حساب اتجاه القبلة: {self.qibla_text[1]}")
 
-        except Exception as e:
-            print(f"⚠️ خطأ في حساب اتجاه القبلة: {e}")
-            self.qibla_direction.set("🧭 القبلة: غير محدد")
+            except Exception as e:
+                s.outcome = 'error'
+                log.warning(f"⚠️ خطأ في حساب اتجاه القبلة: {e}")
+                self.ui.set(self.qibla_direction, "🧭 القبلة: غير محدد")
 
     def get_islamic_date(self):
         """الحصول على التاريخ الهجري"""
-        def fetch_islamic_date():
-            try:
-                today = datetime.now().strftime("%d-%m-%Y")
-                url = f"http://api.aladhan.com/v1/gToH/{today}"
+        # التحويل المحلي بتقويم أم القرى (بدون شبكة)
+        try:
+            hijri_date = format_hijri(datetime.now().date())
+            self.ui.set(self.islamic_date, f"📅 {hijri_date}")
+            log.info(f"✅ تم تحديث التاريخ الهجري: {hijri_date}")
+            return
+        except ValueError as e:
+            log.warning(f"⚠️ {e} - سيتم استخدام API")
 
-                if REQUESTS_AVAILABLE:
-                    response = requests.get(url, timeout=10)
-                    if response.status_code == 200:
-                        data = response.json()
-                        self.process_islamic_date(data)
-                        return
+        today = datetime.now().strftime("%d-%m-%Y")
 
-                # استخدام urllib كبديل
-                with urllib.request.urlopen(url, timeout=10) as response:
-                    data = json.loads(response.read().decode())
-                    self.process_islamic_date(data)
+        def fetch_islamic_date():
+            url = self.api_url('aladhan', f"/v1/gToH/{today}")
+            return self.fetch_json(url, 'hijri', accept=lambda d: d.get('code') == 200)
 
-            except Exception as e:
-                print(f"⚠️ خطأ في جلب التاريخ الهجري: {e}")
-                self.islamic_date.set("📅 التاريخ الهجري غير متوفر")
+        def islamic_date_failed(error):
+            log.warning(f"⚠️ خطأ في جلب التاريخ الهجري: {error}")
+            self.ui.set(self.islamic_date, "📅 التاريخ الهجري غير متوفر")
 
-        threading.Thread(target=fetch_islamic_date, daemon=True).start()
+        self.run_in_background(('hijri', today), fetch_islamic_date,
+                               on_done=self.process_islamic_date,
+                               on_error=islamic_date_failed)
 
     def process_islamic_date(self, data):
         """معالجة بيانات التاريخ الهجري"""
         try:
             hijri = data['data']['hijri']
             hijri_date = f"{hijri['day']} {hijri['month']['ar']} {hijri['year']} هـ"
-            self.islamic_date.set(f"📅 {hijri_date}")
-            print(f"✅ تم تحديث التاريخ الهجري: {hijri_date}")
+            self.ui.set(self.islamic_date, f"📅 {hijri_date}")
+            log.info(f"✅ تم تحديث التاريخ الهجري: {hijri_date}")
         except Exception as e:
-            print(f"⚠️ خطأ في معالجة التاريخ الهجري: {e}")
-            self.islamic_date.set("📅 التاريخ الهجري غير متوفر")
+            log.warning(f"⚠️ خطأ في معالجة التاريخ الهجري: {e}")
+            self.ui.set(self.islamic_date, "📅 التاريخ الهجري غير متوفر")
 
     def get_prayer_times(self):
         """حساب أوقات الصلاة"""
-        def calculate_times():
-            try:
-                print("⏰ جاري حساب أوقات الصلاة...")
+        # الجدول المحسوب مسبقاً أولاً (بدون شبكة أو حسابات)، ثم الحساب المحلي
+        if self.use_timetable_prayer_times() or self.use_local_prayer_times():
+            return
+
+        # طريقة حساب غير معروفة محلياً: API مع الحساب المحلي الافتراضي كبديل
 
-                # محاولة استخدام API أولاً
-                if self.try_api_prayer_times():
-                    return
+        lat = self.latitude.get()
+        lon = self.longitude.get()
+        city = self.city.get()
+        country = self.country.get()
+        today = datetime.now().date()
+        tomorrow = today + timedelta(days=1)
 
+        def calculate_times():
+            log.debug("⏰ جاري حساب أوقات الصلاة...")
+
+            # محاولة استخدام API أولاً
+            today_times = self.try_api_prayer_times(city, country, today)
+            if today_times is None:
                 # حساب محلي كبديل
-                self.calculate_local_prayer_times()
+                return (self.calculate_local_prayer_times(lat, lon, today),
+                        self.calculate_local_prayer_times(lat, lon, tomorrow))
 
-            except Exception as e:
-                print(f"⚠️ خطأ في حساب أوقات الصلاة: {e}")
-                self.use_default_prayer_times()
+            # أوقات الغد لفجر الغد بعد العشاء
+            tomorrow_times = (self.try_api_prayer_times(city, country, tomorrow) or
+                              self.calculate_local_prayer_times(lat, lon, tomorrow))
+            return today_times, tomorrow_times
+
+        def prayer_times_failed(error):
+            log.warning(f"⚠️ خطأ في حساب أوقات الصلاة: {error}")
+            self.use_default_prayer_times()
 
-        threading.Thread(target=calculate_times, daemon=True).start()
+        key = ('prayer', self.location_grid.key(lat, lon), today)
+        self.run_in_background(key, calculate_times,
+                               on_done=lambda times: self.apply_prayer_times(*times),
+                               on_error=prayer_times_failed, group='location')
+
+    def use_timetable_prayer_times(self):
+        """قراءة أوقات اليوم من الجدول السنوي إن كان يغطي الموقع الحالي"""
+        if self.timetable is None:
+            return False
+
+        def times_for(day):
+            return DaySchedule(day, [INVALID_MINUTES if m is None else m
+                                     for m in self.timetable.minutes_for(day)])
 
-    def try_api_prayer_times(self):
-        """محاولة الحصول على أوقات الصلاة من API"""
         try:
-            city = self.city.get()
-            country = self.country.get()
+            lat = self.latitude.get()
+            lon = self.longitude.get()
             method = self.settings.get('calculation_method', 4)
+            school = self.settings.get('asr_school', SCHOOL_SHAFI)
+            today = datetime.now().date()
+            tomorrow = today + timedelta(days=1)
+
+            # فرق توقيت الجهاز لكل يوم (كالحساب المحلي)، فلا يُعتمد جدول بفرق آخر
+            def covers(day):
+                return self.timetable.covers(lat, lon, day, method=method, school=school,
+                                             tz_offset=system_utc_offset(day))
 
-            url = f"http://api.aladhan.com/v1/timingsByCity?city={city}&country={country}&method={method}"
+            if not covers(today):
+                return False
 
-            if REQUESTS_AVAILABLE:
-                response = requests.get(url, timeout=10)
-                if response.status_code == 200:
-                    data = response.json()
-                    if data['code'] == 200:
-                        self.process_api_prayer_times(data)
-                        return True
+            if covers(tomorrow):
+                tomorrow_times = times_for(tomorrow)
+            elif method in CALCULATION_METHODS:
+                tomorrow_times = self.calculate_local_prayer_times(lat, lon, tomorrow)
+            else:
+                tomorrow_times = None
+            self.apply_prayer_times(times_for(today), tomorrow_times)
 
-            # استخدام urllib كبديل
-            with urllib.request.urlopen(url, timeout=10) as response:
-                data = json.loads(response.read().decode())
-                if data['code'] == 200:
-                    self.process_api_prayer_times(data)
-                    return True
+            log.info("✅ تم قراءة أوقات الصلاة من الجدول السنوي")
+            return True
 
         except Exception as e:
-            print(f"⚠️ فشل في استخدام API: {e}")
+            log.warning(f"⚠️ خطأ في قراءة الجدول السنوي: {e}")
+            return False
 
-        return False
+    def use_local_prayer_times(self):
+        """حساب أوقات اليوم والغد محلياً إن كانت طريقة الحساب معروفة (بدون شبكة)"""
+        if self.settings.get('calculation_method', 4) not in CALCULATION_METHODS:
+            return False
 
-    def process_api_prayer_times(self, data):
-        """معالجة أوقات الصلاة من API"""
         try:
-            timings = data['data']['timings']
-
-            # أسماء الصلوات بالعربية
-            prayer_names = {
-                'Fajr': 'الفجر',
-                'Sunrise': 'الشروق',
-                'Dhuhr': 'الظهر',
-                'Asr': 'العصر',
-                'Maghrib': 'المغرب',
-                'Isha': 'العشاء'
-            }
-
-            self.prayer_times = {}
-            for eng_name, ar_name in prayer_names.items():
-                if eng_name in timings:
-                    time_str = timings[eng_name].split(' ')[0]  # إزالة المنطقة الزمنية
-                    self.prayer_times[ar_name] = time_str
-
-            print("✅ تم الحصول على أوقات الصلاة من API")
-            self.root.after(0, self.update_prayers_display)
-            self.root.after(0, self.update_next_prayer)
+            lat = self.latitude.get()
+            lon = self.longitude.get()
+            today = datetime.now().date()
+            self.apply_prayer_times(self.calculate_local_prayer_times(lat, lon, today),
+                                    self.calculate_local_prayer_times(lat, lon, today + timedelta(days=1)))
+            return True
 
         except Exception as e:
-            print(f"⚠️ خطأ في معالجة أوقات الصلاة: {e}")
-            self.calculate_local_prayer_times()
-
-    def calculate_local_prayer_times(self):
-        """حساب أوقات الصلاة محلياً باستخدام الحسابات الفلكية"""
+            log.warning(f"⚠️ خطأ في حساب أوقات الصلاة محلياً: {e}")
+            return False
+
+    def apply_prayer_times(self, prayer_times, tomorrow_prayer_times=None):
+        """اعتماد أوقات الصلاة وتحديث العرض وجدولة التنبيهات (في خيط الواجهة)"""
+        self.prayer_times = prayer_times
+        self.tomorrow_prayer_times = tomorrow_prayer_times
+        # عدة أوقات تصل في نفس الإطار ← تحديث واحد للبطاقات
+        self.ui.call('prayers_display', self.update_prayers_display)
+        self.update_next_prayer()
+        self.check_prayer_notifications()
+
+    def prayer_times_url(self, city, country, day):
+        """رابط أوقات الصلاة ليوم في API"""
+        method = self.settings.get('calculation_method', 4)
+        school = self.settings.get('asr_school', SCHOOL_SHAFI)
+        return self.api_url('aladhan', f"/v1/timingsByCity/{day.strftime('%d-%m-%Y')}"
+                                       f"?city={city}&country={country}&method={method}&school={school}")
+
+    def cached_prayer_times(self, day):
+        """أوقات يوم من ذاكرة التخزين المؤقت على القرص فقط (أو None)"""
+        data = self.http_cache.get(self.prayer_times_url(self.city.get(), self.country.get(), day))
+        if data and data.get('code') == 200:
+            return self.process_api_prayer_times(data, day)
+        return None
+
+    def try_api_prayer_times(self, city, country, day):
+        """محاولة الحصول على أوقات الصلاة ليوم من API (يرجع None عند الفشل)"""
         try:
-            print("🔢 حساب أوقات الصلاة محلياً...")
+            url = self.prayer_times_url(city, country, day)
 
-            now = datetime.now()
-            lat = self.latitude.get()
-            lon = self.longitude.get()
+            data = self.fetch_json(url, 'prayer', accept=lambda d: d.get('code') == 200)
+            if data['code'] == 200:
+                return self.process_api_prayer_times(data, day)
+
+        except Exception as e:
+            log.warning(f"⚠️ فشل في استخدام API: {e}")
+
+        return None
+
+    def process_api_prayer_times(self, data, day):
+        """معالجة أوقات الصلاة من API"""
+        try:
+            # تحليل النصوص مرة واحدة إلى دقائق (المنطقة الزمنية تُزال تلقائياً)
+            prayer_times = DaySchedule.from_strings(day, data['data']['timings'])
 
-            # حساب اليوم من السنة
-            day_of_year = now.timetuple().tm_yday
-
-            # حساب زاوية الشمس
-            P = math.asin(0.39795 * math.cos(0.98563 * (day_of_year - 173) * math.pi / 180))
-
-            # حساب معادلة الوقت
-            argument = 0.98563 * (day_of_year - 81) * math.pi / 180
-            equation_of_time = 4 * (0.000075 + 0.001868 * math.cos(argument) -
-                                  0.032077 * math.sin(argument) -
-                                  0.014615 * math.cos(2 * argument) -
-                                  0.040849 * math.sin(2 * argument))
-
-            # تحويل خط الطول إلى دقائق
-            longitude_minutes = lon * 4
-
-            # حساب الأوقات
-            lat_rad = lat * math.pi / 180
-
-            # زوايا الصلوات
-            fajr_angle = -18  # زاوية الفجر
-            isha_angle = -17  # زاوية العشاء
-
-            # حساب الفجر
-            fajr_hour_angle = math.acos((-math.sin(fajr_angle * math.pi / 180) -
-                                       math.sin(lat_rad) * math.sin(P)) /
-                                      (math.cos(lat_rad) * math.cos(P)))
-            fajr_time = 12 - (fajr_hour_angle * 180 / math.pi) / 15 - longitude_minutes / 60 + equation_of_time / 60
-
-            # حساب الشروق
-            sunrise_hour_angle = math.acos((-math.sin(-0.833 * math.pi / 180) -
-                                          math.sin(lat_rad) * math.sin(P)) /
-                                         (math.cos(lat_rad) * math.cos(P)))
-            sunrise_time = 12 - (sunrise_hour_angle * 180 / math.pi) / 15 - longitude_minutes / 60 + equation_of_time / 60
-
-            # حساب الظهر
-            dhuhr_time = 12 - longitude_minutes / 60 + equation_of_time / 60
-
-            # حساب العصر
-            asr_hour_angle = math.acos((math.sin(math.atan(1 / (2 + math.tan(abs(lat_rad - P))))) -
-                                      math.sin(lat_rad) * math.sin(P)) /
-                                     (math.cos(lat_rad) * math.cos(P)))
-            asr_time = 12 + (asr_hour_angle * 180 / math.pi) / 15 - longitude_minutes / 60 + equation_of_time / 60
-
-            # حساب المغرب
-            maghrib_time = 12 + (sunrise_hour_angle * 180 / math.pi) / 15 - longitude_minutes / 60 + equation_of_time / 60
-
-            # حساب العشاء
-            isha_hour_angle = math.acos((-math.sin(isha_angle * math.pi / 180) -
-                                       math.sin(lat_rad) * math.sin(P)) /
-                                      (math.cos(lat_rad) * math.cos(P)))
-            isha_time = 12 + (isha_hour_angle * 180 / math.pi) / 15 - longitude_minutes / 60 + equation_of_time / 60
-
-            # تحويل الأوقات إلى تنسيق 24 ساعة
-            def format_time(time_decimal):
-                hours = int(time_decimal) % 24
-                minutes = int((time_decimal - int(time_decimal)) * 60)
-                return f"{hours:02d}:{minutes:02d}"
-
-            self.prayer_times = {
-                'الفجر': format_time(fajr_time),
-                'الشروق': format_time(sunrise_time),
-                'الظهر': format_time(dhuhr_time),
-                'العصر': format_time(asr_time),
-                'المغرب': format_time(maghrib_time),
-                'العشاء': format_time(isha_time)
-            }
-
-            print("✅ تم حساب أوقات الصلاة محلياً")
-            self.root.after(0, self.update_prayers_display)
-            self.root.after(0, self.update_next_prayer)
+            log.info("✅ تم الحصول على أوقات الصلاة من API")
+            return prayer_times
 
         except Exception as e:
-            print(f"⚠️ خطأ في الحساب المحلي: {e}")
-            self.use_default_prayer_times()
+            log.warning(f"⚠️ خطأ في معالجة أوقات الصلاة: {e}")
+            return None
+
+    def calculate_local_prayer_times(self, lat, lon, day):
+        """حساب أوقات الصلاة ليوم محلياً باستخدام الحسابات الفلكية"""
+        log.debug("🔢 حساب أوقات الصلاة محلياً...")
+
+        with span('calculate_local_prayer_times'):
+            # طريقة غير معروفة محلياً (عند فشل API): أم القرى
+            method = self.settings.get('calculation_method', 4)
+            if method not in CALCULATION_METHODS:
+                method = 4
+            school = self.settings.get('asr_school', SCHOOL_SHAFI)
+
+            # نفس المعادلات الفلكية من محرك الحساب المشترك، بتوقيت الجهاز لذلك اليوم
+            prayer_times = DaySchedule.from_hours(
+                day, compute_prayer_times(lat, lon, day, system_utc_offset(day), method, school))
+
+        log.info("✅ تم حساب أوقات الصلاة محلياً")
+        return prayer_times
 
     def use_default_prayer_times(self):
         """استخدام أوقات افتراضية للرياض"""
-        self.prayer_times = {
-            'الفجر': '05:15',
-            'الشروق': '06:35',
-            'الظهر': '12:10',
-            'العصر': '15:25',
-            'المغرب': '17:45',
-            'العشاء': '19:15'
-        }
-        print("📍 تم استخدام أوقات الرياض الافتراضية")
-        self.root.after(0, self.update_prayers_display)
-        self.root.after(0, self.update_next_prayer)
+        log.info("📍 تم استخدام أوقات الرياض الافتراضية")
+        self.apply_prayer_times(DaySchedule.from_strings(datetime.now().date(), {
+            'Fajr': '05:15',
+            'Sunrise': '06:35',
+            'Dhuhr': '12:10',
+            'Asr': '15:25',
+            'Maghrib': '17:45',
+            'Isha': '19:15'
+        }))
 
     def update_time(self):
-        """تحديث الوقت الحالي"""
+        """تحديث الساعة المعروضة (أحداث الصلاة في مجدول الأحداث)"""
         now = datetime.now()
         current_time_str = now.strftime("%H:%M:%S")
         current_date_str = now.strftime("%Y-%m-%d")
 
-        self.current_time.set(f"{current_date_str}\n{current_time_str}")
+        self.ui.set(self.current_time, f"{current_date_str}\n{current_time_str}")
+
+        # الاستيقاظ عند بداية الثانية التالية بالضبط
+        self.root.after(1000 - now.microsecond // 1000, self.update_time)
 
-        # تحديث الصلاة القادمة كل دقيقة
-        if now.second == 0:
+    def schedule_minute_tick(self):
+        """تحديث العد التنازلي عند بداية كل دقيقة"""
+        next_minute = datetime.now().replace(second=0, microsecond=0) + timedelta(minutes=1)
+
+        def tick():
             self.update_next_prayer()
-            self.check_prayer_notifications()
+            # الحرارة مستوفاة بين الساعات، فتتغير تدريجياً
+            if self.settings.get('show_weather', True):
+                self.show_forecast_weather()
+            self.schedule_minute_tick()
+
+        self.scheduler.schedule(next_minute, tick, 'minute')
 
-        # جدولة التحديث التالي
-        self.root.after(1000, self.update_time)
+    def on_day_rollover(self):
+        """بداية يوم جديد: الأوقات والتاريخ الهجري وعداد الصلوات"""
+        log.info("🌙 بداية يوم جديد")
+
+        # أوقات الغد المحسوبة مسبقاً أصبحت أوقات اليوم حتى تصل الأوقات الجديدة
+        if self.tomorrow_prayer_times:
+            self.apply_prayer_times(self.tomorrow_prayer_times)
+        self.get_prayer_times()
+        self.get_islamic_date()
+
+        # عدادات اليوم الجديد (والشهر الجديد) من سجل الصلوات
+        self.load_prayer_statistics()
 
     def update_next_prayer(self):
         """تحديث معلومات الصلاة القادمة"""
         if not self.prayer_times:
-            self.next_prayer.set("⏳ جاري التحميل...")
-            self.time_to_next.set("")
+            self.ui.set(self.next_prayer, "⏳ جاري التحميل...")
+            self.ui.set(self.time_to_next, "")
             return
 
         now = datetime.now()
-        current_time = now.time()
-
-        # ترتيب الصلوات حسب الوقت (بدون الشروق)
-        prayer_order = ['الفجر', 'الظهر', 'العصر', 'المغرب', 'العشاء']
 
+        # بحث ثنائي في صلوات اليوم المرتبة (بدون الشروق)
+        next_key = self.prayer_times.next_prayer(now.hour * 60 + now.minute)
         next_prayer_name = None
-        next_prayer_time = None
+        next_prayer_datetime = None
 
-        for prayer_name in prayer_order:
-            if prayer_name in self.prayer_times:
-                try:
-                    prayer_time_str = self.prayer_times[prayer_name]
-                    prayer_time = datetime.strptime(prayer_time_str, "%H:%M").time()
-
-                    if prayer_time > current_time:
-                        next_prayer_name = prayer_name
-                        next_prayer_time = prayer_time
-                        break
-                except:
-                    continue
+        if next_key:
+            next_prayer_name = PRAYER_NAMES_AR[next_key]
+            next_prayer_datetime = self.prayer_times.datetime_for(next_key)
 
-        # إذا لم نجد صلاة اليوم، فالصلاة القادمة هي فجر الغد
-        if not next_prayer_name and 'الفجر' in self.prayer_times:
+        # إذا لم نجد صلاة اليوم، فالصلاة القادمة هي فجر الغد (من أوقات الغد إن توفرت)
+        elif self.tomorrow_prayer_times and self.tomorrow_prayer_times.get('Fajr') is not None:
             next_prayer_name = 'الفجر (غداً)'
-            try:
-                next_prayer_time = datetime.strptime(self.prayer_times['الفجر'], "%H:%M").time()
-                tomorrow = now + timedelta(days=1)
-                next_prayer_datetime = datetime.combine(tomorrow.date(), next_prayer_time)
-            except:
-                next_prayer_datetime = None
-        else:
-            next_prayer_datetime = datetime.combine(now.date(), next_prayer_time) if next_prayer_time else None
+            next_prayer_datetime = self.tomorrow_prayer_times.datetime_for('Fajr')
+        elif self.prayer_times.get('Fajr') is not None:
+            next_prayer_name = 'الفجر (غداً)'
+            next_prayer_datetime = self.prayer_times.datetime_for('Fajr') + timedelta(days=1)
 
         if next_prayer_name and next_prayer_datetime:
             time_diff = next_prayer_datetime - now
             hours, remainder = divmod(int(time_diff.total_seconds()), 3600)
             minutes, _ = divmod(remainder, 60)
 
-            self.next_prayer.set(f"⏰ {next_prayer_name}")
-            self.time_to_next.set(f"متبقي: {hours:02d}:{minutes:02d}")
+            self.ui.set(self.next_prayer, f"⏰ {next_prayer_name}")
+            self.ui.set(self.time_to_next, f"متبقي: {hours:02d}:{minutes:02d}")
         else:
-            self.next_prayer.set("⏰ غير محدد")
-            self.time_to_next.set("")
+            self.ui.set(self.next_prayer, "⏰ غير محدد")
+            self.ui.set(self.time_to_next, "")
 
     def check_prayer_notifications(self):
-        """فحص وإرسال تنبيهات الصلاة"""
-        if not self.notification_enabled.get() or not self.prayer_times:
+        """جدولة تنبيهات صلوات اليوم المتبقية في مجدول الأحداث"""
+        self.scheduler.cancel_prefix('prayer:')
+        if not self.prayer_times:
             return
 
         now = datetime.now()
-        current_time = now.time()
-
-        for prayer_name, prayer_time_str in self.prayer_times.items():
-            if prayer_name == 'الشروق':  # تخطي الشروق
-                continue
 
-            try:
-                prayer_time = datetime.strptime(prayer_time_str, "%H:%M").time()
+        # الصلوات فقط (بدون الشروق) بأوقاتها المحللة مسبقاً
+        for key, _ in self.prayer_times.prayers():
+            when = self.prayer_times.datetime_for(key)
+            if when > now:
+                self.scheduler.schedule(
+                    when,
+                    lambda p=PRAYER_NAMES_AR[key], w=when: self.notify_prayer(p, w),
+                    f'prayer:{key}'
+                )
+
+    def notify_prayer(self, prayer_name, scheduled_time):
+        """حدث دخول وقت الصلاة"""
+        self.update_next_prayer()
+
+        # لا تنبيه متأخر جداً (مثلاً بعد استيقاظ الجهاز من السكون)
+        if datetime.now() - scheduled_time > timedelta(minutes=10):
+            return
 
-                # تنبيه وقت الصلاة (مرة واحدة فقط في الدقيقة)
-                if (prayer_time.hour == current_time.hour and
-                    prayer_time.minute == current_time.minute):
-                    self.show_prayer_notification(prayer_name)
-
-            except Exception as e:
-                print(f"⚠️ خطأ في فحص التنبيهات: {e}")
+        if self.notification_enabled.get():
+            self.show_prayer_notification(prayer_name)
 
     def show_prayer_notification(self, prayer_name):
         """عرض تنبيه الصلاة"""
@@ -689,6 +970,7 @@ class PrayerTimesApp:
                 f"📿 صلاة {prayer_name} - بارك الله فيك"
             ]
 
+            import random
             message = random.choice(messages)
 
             # عرض رسالة منبثقة
@@ -699,7 +981,7 @@ class PrayerTimesApp:
                 self.play_notification_sound()
 
         except Exception as e:
-            print(f"⚠️ خطأ في عرض التنبيه: {e}")
+            log.warning(f"⚠️ خطأ في عرض التنبيه: {e}")
 
     def play_notification_sound(self):
         """تشغيل صوت التنبيه"""
@@ -713,15 +995,18 @@ class PrayerTimesApp:
             else:  # Linux/Mac
                 os.system('echo -e "\\a"')
         except Exception as e:
-            print(f"⚠️ لا يمكن تشغيل الصوت: {e}")
+            log.warning(f"⚠️ لا يمكن تشغيل الصوت: {e}")
 
     def mark_prayer_completed(self, prayer_name):
         """تسجيل إتمام صلاة"""
         if self.prayers_completed_today < 5:
-            self.prayers_completed_today += 1
-            self.total_prayers_month += 1
-            self.update_prayer_counter()
-            self.save_prayer_statistics()
+            try:
+                self.prayer_log.record(prayer_name)
+            except Exception as e:
+                log.warning(f"⚠️ خطأ في حفظ الإحصائيات: {e}")
+                messagebox.showerror("خطأ", f"تعذر تسجيل الصلاة:\n{e}")
+                return
+            self.load_prayer_statistics()
 
             # رسائل تشجيعية
             encouragement_messages = [
@@ -731,30 +1016,34 @@ class PrayerTimesApp:
                 f"🎉 ممتاز! تم تسجيل {prayer_name} بنجاح"
             ]
 
+            import random
             message = random.choice(encouragement_messages)
             messagebox.showinfo("تم التسجيل", message)
         else:
             messagebox.showinfo("مكتمل", "تم تسجيل جميع صلوات اليوم! 🎉")
 
     def schedule_updates(self):
-        """جدولة التحديثات الدورية"""
-        # تحديث كل 5 دقائق
-        self.root.after(300000, self.schedule_updates)
+        """جدولة التحديثات الدورية في أوقات محاذاة لساعة الحائط (periodic_jobs.py)"""
+        # منتصف الليل بالضبط: محلي بدون شبكة، فلا إزاحة
+        self.jobs.add('day_rollover', DAY, self.on_day_rollover)
 
-        now = datetime.now()
+        # الطقس كل ساعة (من التوقعات، والجلب عند الحاجة)، والفشل يُبلغ من العملية الخلفية
+        self.jobs.add('weather', HOUR, self.refresh_weather, jitter=WEATHER_JITTER_SECONDS)
 
-        # تحديث التاريخ الهجري يومياً في منتصف الليل
-        if now.hour == 0 and now.minute == 0:
-            self.get_islamic_date()
-            # إعادة تعيين عداد الصلوات
-            self.prayers_completed_today = 0
-            self.update_prayer_counter()
-            self.save_prayer_statistics()
+        self.jobs.add('connection_stats', HOUR, self.log_connection_stats)
 
-        # تحديث الطقس كل ساعة
-        if now.minute == 0:
-            if self.settings.get('show_weather', True):
-                self.get_weather_info()
+    def refresh_weather(self):
+        """مهمة الطقس الدورية"""
+        if self.settings.get('show_weather', True):
+            self.get_weather_info()
+
+    def log_connection_stats(self):
+        """إحصائيات إعادة استخدام الاتصالات (بمستوى DEBUG)"""
+        stats = self.transport.stats()
+        log.debug(f"🔌 الاتصالات: {stats['requests']} طلب، "
+                  f"{stats['new_connections']} اتصال جديد، "
+                  f"{stats['reused_connections']} معاد استخدامه، "
+                  f"{stats['not_modified']} بدون تغيير (304)")
 
     def setup_ui(self):
         """إعداد واجهة المستخدم"""
@@ -1075,7 +1364,7 @@ class PrayerTimesApp:
             btn = tk.Button(
                 links_frame,
                 text=text,
-                command=lambda u=url: webbrowser.open(u),
+                command=lambda u=url: self.open_link(u),
                 font=("Arial", 9),
                 bg='#065f46',
                 fg='white',
@@ -1084,28 +1373,64 @@ class PrayerTimesApp:
             btn.pack(side='left', padx=5)
 
     def update_prayers_display(self):
-        """تحديث عرض أوقات الصلاة"""
-        # مسح العرض السابق
-        for widget in self.prayers_frame.winfo_children():
-            widget.destroy()
+        """تحديث عرض أوقات الصلاة (تعديل البطاقات القائمة فقط عند تغير الوقت)"""
+        started = time.perf_counter()
+        created = updated = 0
 
         if not self.prayer_times:
-            no_data_label = tk.Label(
-                self.prayers_frame,
-                text="⏳ جاري تحميل أوقات الصلاة...",
-                font=("Arial", 14),
-                bg='#0f172a',
-                fg='#94a3b8'
-            )
-            no_data_label.pack(pady=20)
-            return
-
-        # إنشاء بطاقة لكل صلاة
-        for prayer_name, prayer_time in self.prayer_times.items():
-            self.create_prayer_card(prayer_name, prayer_time)
+            for card in self.prayer_cards.values():
+                card['frame'].destroy()
+            self.prayer_cards.clear()
+
+            if self.prayers_placeholder is None:
+                self.prayers_placeholder = tk.Label(
+                    self.prayers_frame,
+                    text="⏳ جاري تحميل أوقات الصلاة...",
+                    font=("Arial", 14),
+                    bg='#0f172a',
+                    fg='#94a3b8'
+                )
+                self.prayers_placeholder.pack(pady=20)
+                created += 1
+        else:
+            if self.prayers_placeholder is not None:
+                self.prayers_placeholder.destroy()
+                self.prayers_placeholder = None
+
+            times = {key: self.prayer_times.format(key) for key, _ in self.prayer_times.items()}
+
+            # حذف بطاقات الصلوات غير المعرفة في الأوقات الجديدة (خطوط العرض العالية)
+            for key in [k for k in self.prayer_cards if k not in times]:
+                self.prayer_cards.pop(key)['frame'].destroy()
+
+            first_build = not self.prayer_cards
+            for key, prayer_time in times.items():
+                card = self.prayer_cards.get(key)
+                if card is None:
+                    card = self.prayer_cards[key] = self.create_prayer_card(PRAYER_NAMES_AR[key], prayer_time)
+                    created += card['widgets']
+                elif card['text'] != prayer_time:
+                    card['time_label'].config(text=prayer_time)
+                    card['text'] = prayer_time
+                    updated += 1
+
+            # بطاقة أُضيفت بعد غيرها: إعادة الترتيب حسب وقت اليوم
+            if created and not first_build:
+                for key in times:
+                    frame = self.prayer_cards[key]['frame']
+                    frame.pack_forget()
+                    frame.pack(fill='x', pady=5, padx=5)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.render_stats['refreshes'] += 1
+        self.render_stats['widgets_created'] += created
+        self.render_stats['labels_updated'] += updated
+        self.render_stats['last_ms'] = elapsed_ms
+        metrics.record('update_prayers_display', elapsed_ms / 1000)
+        log.debug(f"🖼️ تحديث البطاقات: {elapsed_ms:.1f} ms (عناصر جديدة: {created}، أوقات معدلة: {updated})")
 
     def create_prayer_card(self, prayer_name, prayer_time):
-        """إنشاء بطاقة صلاة"""
+        """إنشاء بطاقة صلاة (يرجع العناصر التي تتغير لاحقاً)"""
         # إطار البطاقة
         card_frame = tk.Frame(
             self.prayers_frame,
@@ -1172,6 +1497,18 @@ class PrayerTimesApp:
             )
             mark_btn.pack(side='bottom', pady=(5, 0))
 
+        return {
+            'frame': card_frame,
+            'time_label': time_label,
+            'text': prayer_time,
+            'widgets': 8 if prayer_name != 'الشروق' else 7
+        }
+
+    def open_link(self, url):
+        """فتح رابط في المتصفح"""
+        import webbrowser
+        webbrowser.open(url)
+
     def show_settings(self):
         """عرض نافذة الإعدادات"""
         messagebox.showinfo("الإعدادات", "نافذة الإعدادات ستكون متوفرة قريباً!")
@@ -1198,7 +1535,7 @@ Advanced Prayer Times Application
 المكتبات المستخدمة:
 • tkinter - واجهة المستخدم
 • requests - الاتصال بالإنترنت (اختيارية)
-• urllib - بديل requests (مدمج)
+• http.client - بديل requests (مدمج)
 • json - معالجة البيانات
 • threading - العمليات المتوازية
 • datetime - التاريخ والوقت
@@ -1211,24 +1548,90 @@ Advanced Prayer Times Application
 def main():
     """الدالة الرئيسية لتشغيل التطبيق"""
     try:
-        print("🚀 بدء تشغيل تطبيق أوقات الصلاة المتقدم...")
-
         # إنشاء النافذة الرئيسية
         root = tk.Tk()
 
-        # إنشاء التطبيق
+        # إنشاء التطبيق (الرسم الأول قبل أي طباعة أو عملية خلفية)
         app = PrayerTimesApp(root)
 
-        print("✅ تم تشغيل التطبيق بنجاح!")
+        log.info("✅ تم تشغيل التطبيق بنجاح!")
+        if REQUESTS_AVAILABLE:
+            log.info("✅ مكتبة requests متوفرة")
+        else:
+            log.warning("⚠️ مكتبة requests غير متوفرة - سيتم استخدام http.client")
 
         # تشغيل حلقة الأحداث
         root.mainloop()
 
     except KeyboardInterrupt:
-        print("⏹️ تم إغلاق التطبيق بواسطة المستخدم")
+        log.info("⏹️ تم إغلاق التطبيق بواسطة المستخدم")
     except Exception as e:
-        print(f"❌ خطأ في تشغيل التطبيق: {e}")
+        log.error(f"❌ خطأ في تشغيل التطبيق: {e}")
         messagebox.showerror("خطأ", f"حدث خطأ في تشغيل التطبيق:\n{e}")
 
+def generate_timetables(argv=None):
+    """توليد جداول أوقات الصلاة لقائمة مدن (بدون واجهة)"""
+    import argparse
+    from bulk_timetables import DEFAULT_CHUNK_SIZE, FORMATS, generate, parse_date, read_locations
+    from prayer_engine import CALCULATION_METHODS, DEFAULT_METHOD, SCHOOL_HANAFI, SCHOOL_SHAFI
+
+    parser = argparse.ArgumentParser(
+        prog="prayer_app_fixed.py generate",
+        description="توليد جداول أوقات الصلاة لآلاف المدن بالحساب المحلي"
+    )
+    parser.add_argument('locations', help="ملف CSV بالأعمدة name,lat,lon,tz")
+    parser.add_argument('--tz', type=float, default=None,
+                        help="فرق التوقيت بالساعات للمواقع بدون قيمة في عمود tz (أو بدون العمود)")
+    parser.add_argument('--start', type=parse_date, required=True, help="تاريخ البداية YYYY-MM-DD")
+    parser.add_argument('--end', type=parse_date, required=True, help="تاريخ النهاية YYYY-MM-DD")
+    parser.add_argument('--format', choices=FORMATS, default='csv', help="صيغة الإخراج")
+    parser.add_argument('-o', '--output', default='-',
+                        help="ملف الإخراج (csv/jsonl، - للشاشة) أو مجلد (bin)")
+    parser.add_argument('--workers', type=int, default=None, help="عدد العمليات (افتراضياً كل الأنوية)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="عدد المدن في كل دفعة")
+    parser.add_argument('--method', type=int, default=DEFAULT_METHOD, choices=sorted(CALCULATION_METHODS),
+                        help="طريقة الحساب (أرقام aladhan)")
+    parser.add_argument('--school', type=int, default=SCHOOL_SHAFI, choices=(SCHOOL_SHAFI, SCHOOL_HANAFI),
+                        help="مذهب العصر: 0 الجمهور، 1 الحنفي")
+    parser.add_argument('--qibla', action='store_true',
+                        help="إضافة اتجاه القبلة والمسافة إلى الكعبة (csv و jsonl)")
+    args = parser.parse_args(argv)
+
+    if args.end < args.start:
+        parser.error("تاريخ النهاية قبل تاريخ البداية")
+    if args.qibla and args.format == 'bin':
+        parser.error("القبلة غير مدعومة في صيغة bin")
+
+    if args.format == 'bin' and args.output == '-':
+        parser.error("صيغة bin تحتاج مجلد إخراج")
+
+    # أخطاء ملف المواقع (tz ناقص، أرقام غير صالحة) تظهر رسالة لا traceback
+    try:
+        locations = read_locations(args.locations, args.tz)
+        if args.format == 'bin':
+            count = generate(locations, args.output, args.start, args.end, 'bin',
+                             args.workers, args.chunk_size, args.method, args.school)
+        elif args.output == '-':
+            count = generate(locations, sys.stdout, args.start, args.end, args.format,
+                             args.workers, args.chunk_size, args.method, args.school, args.qibla)
+        else:
+            with open(args.output, 'w', encoding='utf-8', newline='') as out:
+                count = generate(locations, out, args.start, args.end, args.format,
+                                 args.workers, args.chunk_size, args.method, args.school, args.qibla)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(f"✅ تم توليد جداول {count} موقع", file=sys.stderr)
+    return 0
+
+def serve_prayer_times(argv=None):
+    """تشغيل خادم JSON لأوقات الصلاة (بدون واجهة)"""
+    from prayer_server import main as serve
+    return serve(argv, prog="prayer_app_fixed.py serve")
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'generate':
+        sys.exit(generate_timetables(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        sys.exit(serve_prayer_times(sys.argv[2:]))
     main()
@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🔢 محرك حساب أوقات الصلاة (بدون واجهة)
+Headless Prayer Times Engine
+
+نفس المعادلات الفلكية التي يستخدمها aladhan (PrayTimes) لكل طرق الحساب
+المعروفة (CALCULATION_METHODS)، مفصولة عن tkinter حتى يمكن استخدامها في
+التطبيق وتوليد الجداول والخوادم بدون شبكة:
+• compute_prayer_times - حساب يوم واحد لموقع واحد (math فقط)
+• compute_prayer_times_batch - حساب متجه لمصفوفة مواقع × أيام (numpy)
+• DaySchedule - أوقات يوم واحد بالدقائق جاهزة للبحث (بدون تحليل نصوص)
+• qibla_bearing و qibla_info - اتجاه القبلة والمسافة إلى الكعبة من أي موقع
+• qibla_batch - القبلة لمصفوفة مواقع (numpy)
+
+كل الأوقات بالساعات العشرية منذ منتصف الليل، أو بالدقائق عبر hours_to_minutes.
+"""
+
+import functools
+import importlib.util
+import math
+from array import array
+from bisect import bisect_right
+from datetime import datetime, time, timedelta
+
+# numpy اختيارية، ولا تُستورد إلا عند أول حساب متجه (استيرادها يبطئ بدء التطبيق)
+NUMPY_AVAILABLE = importlib.util.find_spec('numpy') is not None
+
+# ترتيب الصلوات الثابت في كل المخرجات
+PRAYER_KEYS = ('Fajr', 'Sunrise', 'Dhuhr', 'Asr', 'Maghrib', 'Isha')
+
+PRAYER_NAMES_AR = {
+    'Fajr': 'الفجر',
+    'Sunrise': 'الشروق',
+    'Dhuhr': 'الظهر',
+    'Asr': 'العصر',
+    'Maghrib': 'المغرب',
+    'Isha': 'العشاء'
+}
+
+# الصلوات التي لها تنبيه وعد تنازلي (الشروق ليس صلاة)
+NOTIFY_KEYS = ('Fajr', 'Dhuhr', 'Asr', 'Maghrib', 'Isha')
+
+# طرق الحساب بأرقام aladhan (نفس المعاملات، حتى لا نحتاج الشبكة لأي طريقة منها):
+#   fajr / isha / maghrib: زاوية الشمس تحت الأفق بالدرجات
+#   isha_minutes / maghrib_minutes: دقائق ثابتة بعد المغرب / بعد الغروب
+#   ramadan_isha_minutes: دقائق العشاء في رمضان (أم القرى)
+CALCULATION_METHODS = {
+    0: {'name': 'Shia Ithna-Ashari, Leva Institute, Qum', 'fajr': 16, 'isha': 14, 'maghrib': 4},
+    1: {'name': 'University of Islamic Sciences, Karachi', 'fajr': 18, 'isha': 18},
+    2: {'name': 'Islamic Society of North America (ISNA)', 'fajr': 15, 'isha': 15},
+    3: {'name': 'Muslim World League', 'fajr': 18, 'isha': 17},
+    4: {'name': 'Umm Al-Qura University, Makkah', 'fajr': 18.5, 'isha_minutes': 90,
+        'ramadan_isha_minutes': 120},
+    5: {'name': 'Egyptian General Authority of Survey', 'fajr': 19.5, 'isha': 17.5},
+    7: {'name': 'Institute of Geophysics, University of Tehran', 'fajr': 17.7, 'isha': 14, 'maghrib': 4.5},
+    8: {'name': 'Gulf Region', 'fajr': 19.5, 'isha_minutes': 90},
+    9: {'name': 'Kuwait', 'fajr': 18, 'isha': 17.5},
+    10: {'name': 'Qatar', 'fajr': 18, 'isha_minutes': 90},
+    11: {'name': 'Majlis Ugama Islam Singapura, Singapore', 'fajr': 20, 'isha': 18},
+    12: {'name': 'Union Organization islamic de France', 'fajr': 12, 'isha': 12},
+    13: {'name': 'Diyanet İşleri Başkanlığı, Turkey', 'fajr': 18, 'isha': 17},
+    14: {'name': 'Spiritual Administration of Muslims of Russia', 'fajr': 16, 'isha': 15},
+    # لجنة رؤية الهلال تعدل الشفق حسب الفصل؛ هنا زاوية 18 الثابتة فقط (فرق دقائق قليلة)
+    15: {'name': 'Moonsighting Committee Worldwide', 'fajr': 18, 'isha': 18},
+    16: {'name': 'Dubai', 'fajr': 18.2, 'isha': 18.2},
+    17: {'name': 'Jabatan Kemajuan Islam Malaysia (JAKIM)', 'fajr': 20, 'isha': 18},
+    18: {'name': 'Tunisia', 'fajr': 18, 'isha': 18},
+    19: {'name': 'Algeria', 'fajr': 18, 'isha': 17},
+    20: {'name': 'Kementerian Agama Republik Indonesia', 'fajr': 20, 'isha': 18},
+    21: {'name': 'Morocco', 'fajr': 19, 'isha': 17},
+    22: {'name': 'Comunidade Islamica de Lisboa', 'fajr': 18, 'maghrib_minutes': 3, 'isha_minutes': 77},
+    23: {'name': 'Ministry of Awqaf, Islamic Affairs and Holy Places, Jordan', 'fajr': 18, 'isha': 18,
+         'maghrib_minutes': 5}
+}
+
+DEFAULT_METHOD = 4  # أم القرى
+
+# مذهب العصر (نفس قيم معامل school في aladhan): ظل الشيء مثله أو مثليه
+SCHOOL_SHAFI = 0
+SCHOOL_HANAFI = 1
+
+# زاوية الشروق والغروب (نصف قطر الشمس + الانكسار)
+SUNRISE_ANGLE = 0.833
+
+# إحداثيات الكعبة المشرفة
+KAABA_LAT = 21.4225
+KAABA_LON = 39.8262
+_SIN_KAABA_LAT = math.sin(math.radians(KAABA_LAT))
+_COS_KAABA_LAT = math.cos(math.radians(KAABA_LAT))
+
+# نصف القطر المتوسط للأرض (للمسافة إلى الكعبة)
+EARTH_RADIUS_KM = 6371.0088
+
+QIBLA_DIRECTIONS_AR = (
+    "شمال", "شمال شرق", "شرق", "جنوب شرق",
+    "جنوب", "جنوب غرب", "غرب", "شمال غرب"
+)
+
+# قيمة الدقائق للأوقات غير المعرفة (خطوط العرض العالية)
+INVALID_MINUTES = -1
+
+# عدد الخلايا (موقع × يوم) في كل كتلة من الحساب المتجه
+BATCH_BLOCK_CELLS = 1 << 15
+
+
+def get_method(method):
+    """معاملات طريقة حساب برقمها في aladhan (KeyError للطرق غير المعروفة)"""
+    if method not in CALCULATION_METHODS:
+        raise KeyError(f"طريقة حساب غير معروفة: {method}")
+    return CALCULATION_METHODS[method]
+
+
+def julian_day(day):
+    """اليوم اليولياني لمنتصف ليل تاريخ ميلادي"""
+    return day.toordinal() + 1721424.5
+
+
+def system_utc_offset(day):
+    """فرق توقيت الجهاز عن UTC بالساعات ظهر ذلك اليوم (يراعي التوقيت الصيفي)"""
+    return datetime.combine(day, time(12)).astimezone().utcoffset().total_seconds() / 3600
+
+
+def is_ramadan(day):
+    """هل اليوم في رمضان (تقويم أم القرى)؟"""
+    from hijri_calendar import gregorian_to_hijri
+
+    try:
+        return gregorian_to_hijri(day)[1] == 9
+    except ValueError:
+        return False
+
+
+def _fix(value, mod):
+    return value % mod  # في [0, mod) حتى للقيم السالبة، و NaN يبقى NaN
+
+
+def _sun_position(jd):
+    """ميل الشمس (درجات) ومعادلة الوقت (ساعات) ليوم يولياني"""
+    d = jd - 2451545.0
+    g = math.radians(_fix(357.529 + 0.98560028 * d, 360))
+    q = _fix(280.459 + 0.98564736 * d, 360)
+    ecliptic_lon = math.radians(_fix(q + 1.915 * math.sin(g) + 0.020 * math.sin(2 * g), 360))
+    obliquity = math.radians(23.439 - 0.00000036 * d)
+
+    right_ascension = math.degrees(math.atan2(math.cos(obliquity) * math.sin(ecliptic_lon),
+                                              math.cos(ecliptic_lon))) / 15
+    equation = q / 15 - _fix(right_ascension, 24)
+    declination = math.degrees(math.asin(math.sin(obliquity) * math.sin(ecliptic_lon)))
+    return declination, equation
+
+
+def compute_prayer_times(lat, lon, day, tz_offset=0.0, method=DEFAULT_METHOD, school=SCHOOL_SHAFI):
+    """حساب أوقات الصلاة ليوم واحد بالساعات العشرية (ترتيب PRAYER_KEYS)
+
+    نفس خوارزمية PrayTimes التي يستخدمها aladhan، مع تعديل خطوط العرض العالية
+    بطريقة الزاوية (الافتراضي في aladhan). الوقت غير المعرف (الشمس لا تشرق أو
+    لا تغرب) يكون NaN.
+    """
+    params = get_method(method)
+    jd = julian_day(day) - lon / (15 * 24)
+    sin_lat = math.sin(math.radians(lat))
+    cos_lat = math.cos(math.radians(lat))
+
+    def mid_day(guess):
+        return _fix(12 - _sun_position(jd + guess / 24)[1], 24)
+
+    def sun_angle_time(angle, guess, before_noon=False):
+        declination = math.radians(_sun_position(jd + guess / 24)[0])
+        ratio = ((-math.sin(math.radians(angle)) - math.sin(declination) * sin_lat) /
+                 (math.cos(declination) * cos_lat))
+        if not -1 <= ratio <= 1:
+            return math.nan
+        offset = math.degrees(math.acos(ratio)) / 15
+        noon = mid_day(guess)
+        return noon - offset if before_noon else noon + offset
+
+    def asr_time(factor, guess):
+        declination = _sun_position(jd + guess / 24)[0]
+        angle = -math.degrees(math.atan(1 / (factor + math.tan(math.radians(abs(lat - declination))))))
+        return sun_angle_time(angle, guess)
+
+    # التخمين الأولي لكل وقت كما في PrayTimes (تكرار واحد)
+    fajr = sun_angle_time(params['fajr'], 5, before_noon=True)
+    sunrise = sun_angle_time(SUNRISE_ANGLE, 6, before_noon=True)
+    dhuhr = mid_day(12)
+    asr = asr_time(school + 1, 13)
+    sunset = sun_angle_time(SUNRISE_ANGLE, 18)
+    maghrib = sun_angle_time(params['maghrib'], 18) if 'maghrib' in params else sunset
+    isha = sun_angle_time(params['isha'], 18) if 'isha' in params else math.nan
+
+    # من التوقيت الشمسي المحلي إلى المنطقة الزمنية
+    shift = tz_offset - lon / 15
+    fajr, sunrise, dhuhr, asr, sunset, maghrib, isha = (
+        t + shift for t in (fajr, sunrise, dhuhr, asr, sunset, maghrib, isha))
+
+    # خطوط العرض العالية: الفجر والعشاء لا يبعدان عن الشروق والغروب أكثر من جزء من الليل
+    night = _fix(sunrise - sunset, 24)
+
+    def adjust_high_lat(time_value, base, angle, before=False):
+        portion = angle / 60 * night
+        diff = _fix(base - time_value, 24) if before else _fix(time_value - base, 24)
+        if math.isnan(time_value) or diff > portion:
+            return base - portion if before else base + portion
+        return time_value
+
+    fajr = adjust_high_lat(fajr, sunrise, params['fajr'], before=True)
+    if 'isha' in params:
+        isha = adjust_high_lat(isha, sunset, params['isha'])
+    if 'maghrib' in params:
+        maghrib = adjust_high_lat(maghrib, sunset, params['maghrib'])
+
+    # الأوقات الثابتة بالدقائق
+    maghrib += params.get('maghrib_minutes', 0) / 60
+    if 'isha_minutes' in params:
+        minutes = params['isha_minutes']
+        if 'ramadan_isha_minutes' in params and is_ramadan(day):
+            minutes = params['ramadan_isha_minutes']
+        isha = maghrib + minutes / 60
+
+    return fajr, sunrise, dhuhr, asr, maghrib, isha
+
+
+def qibla_bearing(lat, lon):
+    """اتجاه القبلة بالدرجات من الشمال باتجاه عقارب الساعة (الصيغة الكروية)"""
+    lat_rad = math.radians(lat)
+    kaaba_lat_rad = math.radians(KAABA_LAT)
+    dlon = math.radians(KAABA_LON) - math.radians(lon)
+
+    y = math.sin(dlon) * math.cos(kaaba_lat_rad)
+    x = (math.cos(lat_rad) * math.sin(kaaba_lat_rad) -
+         math.sin(lat_rad) * math.cos(kaaba_lat_rad) * math.cos(dlon))
+
+    return (math.degrees(math.atan2(y, x)) + 360) % 360
+
+
+def qibla_sector(bearing):
+    """رقم الجهة (0-7، فهرس QIBLA_DIRECTIONS_AR) لزاوية القبلة"""
+    return round(bearing / 45) % 8
+
+
+def qibla_direction_ar(bearing):
+    """الاتجاه النصي (ثماني جهات) لزاوية القبلة"""
+    return QIBLA_DIRECTIONS_AR[qibla_sector(bearing)]
+
+
+@functools.lru_cache(maxsize=4096)
+def qibla_info(lat, lon):
+    """(الاتجاه بالدرجات، المسافة إلى الكعبة بالكيلومتر، رقم الجهة) لموقع
+
+    محفوظة لآخر 4096 موقع: تُستدعى بمركز خلية الموقع (LocationGrid.snap)
+    فتكون كل التحديثات في نفس الخلية بدون حساب.
+    """
+    lat_rad = math.radians(lat)
+    dlon = math.radians(KAABA_LON - lon)
+    sin_lat = math.sin(lat_rad)
+    cos_lat = math.cos(lat_rad)
+    cos_dlon = math.cos(dlon)
+
+    y = math.sin(dlon) * _COS_KAABA_LAT
+    x = cos_lat * _SIN_KAABA_LAT - sin_lat * _COS_KAABA_LAT * cos_dlon
+    bearing = math.degrees(math.atan2(y, x)) % 360
+
+    # الزاوية المركزية بصيغة atan2 (دقيقة للمسافات القريبة والبعيدة جداً)
+    central = math.atan2(math.hypot(y, x), sin_lat * _SIN_KAABA_LAT + cos_lat * _COS_KAABA_LAT * cos_dlon)
+    return bearing, EARTH_RADIUS_KM * central, qibla_sector(bearing)
+
+
+def qibla_batch(lats, lons):
+    """القبلة لمصفوفة مواقع بطول L: (الاتجاهات، المسافات بالكيلومتر، أرقام الجهات uint8)
+
+    نفس معادلات qibla_info بعمليات numpy على المصفوفة كلها.
+    """
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("الحساب المتجه يحتاج مكتبة numpy")
+
+    import numpy as np
+
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    dlon = np.radians(KAABA_LON - np.asarray(lons, dtype=np.float64))
+    sin_lat = np.sin(lat)
+    cos_lat = np.cos(lat)
+    cos_dlon = np.cos(dlon)
+
+    y = np.sin(dlon) * _COS_KAABA_LAT
+    x = cos_lat * _SIN_KAABA_LAT - sin_lat * _COS_KAABA_LAT * cos_dlon
+    bearings = np.degrees(np.arctan2(y, x)) % 360
+
+    central = np.arctan2(np.hypot(y, x), sin_lat * _SIN_KAABA_LAT + cos_lat * _COS_KAABA_LAT * cos_dlon)
+    sectors = (np.rint(bearings / 45).astype(np.int64) % 8).astype(np.uint8)
+    return bearings, EARTH_RADIUS_KM * central, sectors
+
+
+def hour_to_minutes(time_decimal):
+    """تحويل ساعة عشرية إلى دقائق منذ منتصف الليل (تقريب لأقرب دقيقة كما في aladhan)"""
+    return math.floor(time_decimal * 60 + 0.5) % 1440
+
+
+def format_minutes(minutes):
+    """تحويل الدقائق منذ منتصف الليل إلى نص HH:MM"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _ramadan_mask(dates):
+    """مصفوفة bool: أي الأيام في رمضان"""
+    import numpy as np
+    from hijri_calendar import gregorian_to_hijri_batch
+
+    try:
+        return gregorian_to_hijri_batch(dates)[1] == 9
+    except ValueError:
+        # بعض الأيام خارج مدى التقويم: يوماً بيوم
+        return np.array([is_ramadan(day) for day in dates.astype(object)], dtype=bool)
+
+
+def compute_prayer_times_batch(lats, lons, dates, tz_offsets=0.0,
+                               method=DEFAULT_METHOD, school=SCHOOL_SHAFI):
+    """حساب متجه لكل المواقع × كل الأيام
+
+    lats و lons و tz_offsets بطول L، و dates (datetime64 أو date) بطول D.
+    النتيجة مصفوفة float64 بالشكل (L, D, 6) بالساعات العشرية بترتيب PRAYER_KEYS،
+    بنفس خوارزمية compute_prayer_times، والقيم NaN حيث لا يوجد وقت معرف.
+    """
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("الحساب المتجه يحتاج مكتبة numpy")
+
+    import numpy as np
+
+    params = get_method(method)
+    lat = np.asarray(lats, dtype=np.float64).reshape(-1, 1)
+    lon = np.asarray(lons, dtype=np.float64).reshape(-1, 1)
+    tz = np.broadcast_to(np.asarray(tz_offsets, dtype=np.float64), (lon.shape[0],)).reshape(-1, 1)
+    dates = np.asarray(dates, dtype='datetime64[D]')
+
+    isha_minutes = None
+    if 'isha_minutes' in params:
+        isha_minutes = np.full(dates.shape, params['isha_minutes'], dtype=np.float64)
+        if 'ramadan_isha_minutes' in params:
+            isha_minutes[_ramadan_mask(dates)] = params['ramadan_isha_minutes']
+        isha_minutes = isha_minutes.reshape(1, -1)
+
+    # كتل من المواقع تبقى مصفوفاتها في الذاكرة المخبئية (أسرع من مصفوفة (L, D) كاملة)
+    result = np.empty((lat.shape[0], dates.shape[0], 6), dtype=np.float64)
+    days = dates.astype(np.int64).reshape(1, -1)
+    rows = max(1, BATCH_BLOCK_CELLS // max(dates.shape[0], 1))
+    for start in range(0, lat.shape[0], rows):
+        block = slice(start, start + rows)
+        _batch_block(result[block], lat[block], lon[block], tz[block], days, params, school, isha_minutes)
+    return result
+
+
+def _batch_block(out, lat, lon, tz, days, params, school, isha_minutes):
+    """compute_prayer_times_batch لكتلة مواقع: تكتب النتيجة في out بالشكل (l, D, 6)"""
+    import numpy as np
+
+    # اليوم اليولياني لكل (موقع، يوم): الشكل (l, D)
+    jd = days + 2440587.5 - lon / (15 * 24)
+    sin_lat = np.sin(np.radians(lat))
+    cos_lat = np.cos(np.radians(lat))
+
+    def fix(value, mod):
+        return value - mod * np.floor(value / mod)
+
+    # sin و cos على مصفوفة (l, D) كاملة هي أغلى ما في الحساب، فتُحسب مرة واحدة:
+    # التخمينات تزيد d بثابت (guess / 24) فيُشتق جيب g لكل تخمين بجمع الزوايا،
+    # والميل المحوري يتغير 0.00000036 درجة في اليوم فيُشتق جيبه من قيمة J2000
+    d0 = jd - 2451545.0
+    g0 = np.radians(fix(357.529 + 0.98560028 * d0, 360))
+    sin_g0 = np.sin(g0)
+    cos_g0 = np.cos(g0)
+    sin_obliquity0 = math.sin(math.radians(23.439))
+    cos_obliquity0 = math.cos(math.radians(23.439))
+
+    def sun_position(guess):
+        """جيب ميل الشمس ومعادلة الوقت (ساعات) لتخمين، بنفس معادلات _sun_position"""
+        d = d0 + guess / 24
+        step = math.radians(0.98560028 * guess / 24)
+        sin_g = sin_g0 * math.cos(step) + cos_g0 * math.sin(step)
+        cos_g = cos_g0 * math.cos(step) - sin_g0 * math.sin(step)
+        q = fix(280.459 + 0.98564736 * d, 360)
+        ecliptic_lon = np.radians(fix(q + 1.915 * sin_g + 0.040 * sin_g * cos_g, 360))
+        sin_ecliptic = np.sin(ecliptic_lon)
+        cos_ecliptic = np.cos(ecliptic_lon)
+
+        # جيب (23.439 - δ) وجيب تمامه بالدرجة الثانية في δ (أقل من 1e-6 راديان لقرون)
+        delta = np.radians(0.00000036 * d)
+        cos_delta = 1 - delta * delta / 2
+        sin_obliquity = sin_obliquity0 * cos_delta - cos_obliquity0 * delta
+        cos_obliquity = cos_obliquity0 * cos_delta + sin_obliquity0 * delta
+
+        right_ascension = np.degrees(np.arctan2(cos_obliquity * sin_ecliptic, cos_ecliptic)) / 15
+        equation = q / 15 - fix(right_ascension, 24)
+        return sin_obliquity * sin_ecliptic, equation
+
+    def solar_terms(guess):
+        """موقع الشمس مرة واحدة لكل تخمين: (جيب الميل، حدا معادلة الزاوية، الزوال)"""
+        sin_declination, equation = sun_position(guess)
+        cos_declination = np.sqrt(1 - sin_declination * sin_declination)  # الميل أقل من 24 درجة
+        return (sin_declination, sin_declination * sin_lat, cos_declination * cos_lat,
+                fix(12 - equation, 24))
+
+    def sun_angle_time(angle, terms, before_noon=False):
+        _, sin_sin, cos_cos, noon = terms
+        ratio = (-np.sin(np.radians(angle)) - sin_sin) / cos_cos
+        with np.errstate(invalid='ignore'):
+            offset = np.degrees(np.arccos(ratio)) / 15
+        return noon - offset if before_noon else noon + offset
+
+    def asr_time(factor, terms):
+        declination = np.degrees(np.arcsin(terms[0]))
+        angle = -np.degrees(np.arctan(1 / (factor + np.tan(np.radians(np.abs(lat - declination))))))
+        return sun_angle_time(angle, terms)
+
+    # موقع الشمس مرة واحدة لكل تخمين (5 مرات) يُمرر لكل الأوقات التي تستخدمه
+    evening = solar_terms(18)
+    shift = tz - lon / 15
+    fajr = sun_angle_time(params['fajr'], solar_terms(5), before_noon=True) + shift
+    sunrise = sun_angle_time(SUNRISE_ANGLE, solar_terms(6), before_noon=True) + shift
+    dhuhr = fix(12 - sun_position(12)[1], 24) + shift
+    asr = asr_time(school + 1, solar_terms(13)) + shift
+    sunset = sun_angle_time(SUNRISE_ANGLE, evening) + shift
+    maghrib = sun_angle_time(params['maghrib'], evening) + shift if 'maghrib' in params else sunset
+    isha = sun_angle_time(params['isha'], evening) + shift if 'isha' in params else None
+
+    # خطوط العرض العالية (طريقة الزاوية)
+    night = fix(sunrise - sunset, 24)
+
+    def adjust_high_lat(time_value, base, angle, before=False):
+        portion = angle / 60 * night
+        diff = fix(base - time_value, 24) if before else fix(time_value - base, 24)
+        with np.errstate(invalid='ignore'):
+            replace = np.isnan(time_value) | (diff > portion)
+        return np.where(replace, base - portion if before else base + portion, time_value)
+
+    fajr = adjust_high_lat(fajr, sunrise, params['fajr'], before=True)
+    if 'isha' in params:
+        isha = adjust_high_lat(isha, sunset, params['isha'])
+    if 'maghrib' in params:
+        maghrib = adjust_high_lat(maghrib, sunset, params['maghrib'])
+
+    maghrib = maghrib + params.get('maghrib_minutes', 0) / 60
+    if isha_minutes is not None:
+        isha = maghrib + isha_minutes / 60
+
+    out[..., 0] = fajr
+    out[..., 1] = sunrise
+    out[..., 2] = dhuhr
+    out[..., 3] = asr
+    out[..., 4] = maghrib
+    out[..., 5] = isha
+
+
+def hours_to_minutes(hours):
+    """تحويل مصفوفة ساعات عشرية إلى دقائق int16 (INVALID_MINUTES للقيم NaN)"""
+    import numpy as np
+    hours = np.asarray(hours, dtype=np.float64)
+    valid = np.isfinite(hours)
+    minutes = np.floor(np.where(valid, hours, 0.0) * 60 + 0.5) % 1440
+    return np.where(valid, minutes, INVALID_MINUTES).astype(np.int16)
+
+
+def parse_minutes(time_str):
+    """تحويل نص HH:MM (مع أي لاحقة مثل "(+03)") إلى دقائق منذ منتصف الليل"""
+    hours, minutes = time_str.split(' ')[0].split(':')[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+class DaySchedule:
+    """أوقات يوم واحد بالدقائق منذ منتصف الليل
+
+    minutes مصفوفة array('h') بترتيب PRAYER_KEYS (INVALID_MINUTES للمفقود)،
+    والصلوات (بدون الشروق) مرتبة زمنياً مرة واحدة للبحث الثنائي عن الصلاة التالية.
+    النصوص تُبنى فقط عند العرض عبر format.
+    """
+
+    __slots__ = ('day', 'minutes', '_order_minutes', '_order_keys')
+
+    def __init__(self, day, minutes):
+        self.day = day
+        self.minutes = array('h', minutes)
+
+        order = sorted(
+            (m, key) for key, m in zip(PRAYER_KEYS, self.minutes)
+            if m != INVALID_MINUTES and key in NOTIFY_KEYS
+        )
+        self._order_minutes = array('h', [m for m, _ in order])
+        self._order_keys = tuple(key for _, key in order)
+
+    @classmethod
+    def from_hours(cls, day, hours):
+        """من ساعات عشرية بترتيب PRAYER_KEYS (ناتج compute_prayer_times)"""
+        return cls(day, [hour_to_minutes(h) if math.isfinite(h) else INVALID_MINUTES
+                         for h in hours])
+
+    @classmethod
+    def from_strings(cls, day, timings):
+        """من قاموس مفاتيحه PRAYER_KEYS وقيمه نصوص HH:MM (مثل استجابة API)"""
+        return cls(day, [parse_minutes(timings[key]) if key in timings else INVALID_MINUTES
+                         for key in PRAYER_KEYS])
+
+    def __bool__(self):
+        return any(m != INVALID_MINUTES for m in self.minutes)
+
+    def get(self, key):
+        """دقائق صلاة معينة أو None"""
+        m = self.minutes[PRAYER_KEYS.index(key)]
+        return None if m == INVALID_MINUTES else m
+
+    def items(self):
+        """أزواج (المفتاح، الدقائق) المعرفة بترتيب PRAYER_KEYS"""
+        return [(key, m) for key, m in zip(PRAYER_KEYS, self.minutes) if m != INVALID_MINUTES]
+
+    def prayers(self):
+        """أزواج (المفتاح، الدقائق) للصلوات فقط مرتبة زمنياً"""
+        return list(zip(self._order_keys, self._order_minutes))
+
+    def next_prayer(self, minute_of_day):
+        """أول صلاة بعد الدقيقة المعطاة (بحث ثنائي) أو None إذا انتهت صلوات اليوم"""
+        index = bisect_right(self._order_minutes, minute_of_day)
+        return self._order_keys[index] if index < len(self._order_keys) else None
+
+    def datetime_for(self, key):
+        """وقت صلاة كـ datetime في يوم الجدول"""
+        return datetime.combine(self.day, time()) + timedelta(minutes=self.get(key))
+
+    def format(self, key):
+        """وقت صلاة كنص HH:MM للعرض"""
+        return format_minutes(self.get(key))
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📊 سجل إتمام الصلوات (SQLite بنمط WAL)
+Append-Only Prayer Statistics Log
+
+كل إتمام صلاة حدث يُضاف إلى جدول events ولا يُعدل أبداً، والإحصائيات
+تُحدث تدريجياً في نفس المعاملة:
+• daily: عدد الصلوات لكل يوم
+• monthly: عدد الصلوات لكل شهر
+• meta: السلسلة الحالية (أيام متتالية مكتملة) وأطولها والإجمالي
+
+فالكتابة O(1) (إدراج + تحديث صفين) والاستعلام عن اليوم أو الشهر أو
+السلسلة O(1) مهما طال التاريخ، بدلاً من إعادة كتابة ملف JSON كاملاً.
+"""
+
+import json
+import os
+import sqlite3
+from datetime import date, datetime, timedelta
+
+from metrics import log
+
+DEFAULT_DB_PATH = 'prayer_stats.db'
+LEGACY_STATS_PATH = 'prayer_stats.json'
+
+# اليوم المكتمل (يدخل في السلسلة) = خمس صلوات
+DAILY_TARGET = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    recorded_at TEXT NOT NULL,
+    day TEXT NOT NULL,
+    prayer TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS daily (
+    day TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS monthly (
+    month TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+) WITHOUT ROWID;
+"""
+
+
+def month_key(day):
+    """مفتاح الشهر YYYY-MM"""
+    return day.isoformat()[:7]
+
+
+class PrayerLog:
+    """سجل أحداث إتمام الصلوات مع إحصائيات تراكمية"""
+
+    def __init__(self, path=DEFAULT_DB_PATH, legacy_path=LEGACY_STATS_PATH):
+        self.path = path
+        created = not os.path.exists(path)
+        self._db = sqlite3.connect(path)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(SCHEMA)
+        self._meta = dict(self._db.execute('SELECT key, value FROM meta'))
+
+        if created and legacy_path and os.path.exists(legacy_path):
+            self.import_legacy(legacy_path)
+
+    def _get_meta(self, key, default=None):
+        return self._meta.get(key, default)
+
+    def _set_meta(self, key, value):
+        self._meta[key] = str(value)
+        self._db.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, str(value)))
+
+    def _bump(self, table, column, key, amount=1):
+        """زيادة عداد وإرجاع قيمته الجديدة"""
+        self._db.execute(f'INSERT OR IGNORE INTO {table} ({column}, count) VALUES (?, 0)', (key,))
+        self._db.execute(f'UPDATE {table} SET count = count + ? WHERE {column} = ?', (amount, key))
+        return self._db.execute(f'SELECT count FROM {table} WHERE {column} = ?', (key,)).fetchone()[0]
+
+    def _day_completed(self, day):
+        """تحديث السلسلة عند اكتمال يوم (يوم لاحق لآخر يوم مكتمل يمدها)"""
+        last = self._get_meta('streak_end')
+        current = int(self._get_meta('streak', 0))
+        if last == (day - timedelta(days=1)).isoformat():
+            current += 1
+        elif last != day.isoformat():
+            current = 1
+
+        self._set_meta('streak', current)
+        self._set_meta('streak_end', day.isoformat())
+        if current > int(self._get_meta('best_streak', 0)):
+            self._set_meta('best_streak', current)
+
+    def record(self, prayer, when=None):
+        """إضافة حدث إتمام صلاة وتحديث الإحصائيات، ويرجع عدد صلوات ذلك اليوم"""
+        when = when or datetime.now()
+        day = when.date()
+
+        with self._db:
+            self._db.execute('INSERT INTO events (recorded_at, day, prayer) VALUES (?, ?, ?)',
+                             (when.isoformat(timespec='seconds'), day.isoformat(), prayer))
+            count = self._bump('daily', 'day', day.isoformat())
+            self._bump('monthly', 'month', month_key(day))
+            self._set_meta('total', int(self._get_meta('total', 0)) + 1)
+            if count == DAILY_TARGET:
+                self._day_completed(day)
+
+        return count
+
+    def day_count(self, day):
+        """عدد صلوات يوم"""
+        row = self._db.execute('SELECT count FROM daily WHERE day = ?', (day.isoformat(),)).fetchone()
+        return row[0] if row else 0
+
+    def month_count(self, day):
+        """عدد صلوات شهر اليوم المعطى"""
+        row = self._db.execute('SELECT count FROM monthly WHERE month = ?', (month_key(day),)).fetchone()
+        return row[0] if row else 0
+
+    def streak(self, today=None):
+        """عدد الأيام المكتملة المتتالية حتى اليوم (أو أمس إن لم يكتمل اليوم بعد)"""
+        today = today or date.today()
+        last = self._get_meta('streak_end')
+        if last in (today.isoformat(), (today - timedelta(days=1)).isoformat()):
+            return int(self._get_meta('streak', 0))
+        return 0
+
+    def best_streak(self):
+        """أطول سلسلة أيام مكتملة"""
+        return int(self._get_meta('best_streak', 0))
+
+    def total(self):
+        """إجمالي الصلوات المسجلة"""
+        return int(self._get_meta('total', 0))
+
+    def history(self, start, end):
+        """عدد الصلوات لكل يوم في المدى [start, end] كقاموس {date: count}"""
+        rows = self._db.execute('SELECT day, count FROM daily WHERE day BETWEEN ? AND ?',
+                                (start.isoformat(), end.isoformat()))
+        return {date.fromisoformat(day): count for day, count in rows}
+
+    def import_legacy(self, path):
+        """نقل عدادات prayer_stats.json القديمة (بدون أحداث مفصلة)"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                stats = json.load(f)
+            updated = datetime.fromisoformat(stats['last_update']).date()
+            today_count = int(stats.get('today', 0))
+            month_count = int(stats.get('month', 0))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log.warning(f"⚠️ تعذر نقل الإحصائيات القديمة: {e}")
+            return
+
+        with self._db:
+            if today_count:
+                self._bump('daily', 'day', updated.isoformat(), today_count)
+            if month_count:
+                self._bump('monthly', 'month', month_key(updated), month_count)
+            self._set_meta('total', month_count)
+            streak = int(stats.get('streak', 0))
+            if streak:
+                self._set_meta('streak', streak)
+                self._set_meta('best_streak', streak)
+                self._set_meta('streak_end', updated.isoformat())
+        log.info("✅ تم نقل الإحصائيات القديمة إلى سجل الصلوات")
+
+    def close(self):
+        """إغلاق قاعدة البيانات"""
+        self._db.close()
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🌐 خادم أوقات الصلاة (بدون واجهة)
+Headless Prayer Times JSON Server
+
+خادم HTTP محلي واحد يخدم كل الشاشات بدلاً من أن تشغل كل شاشة تطبيق Tk
+وتسأل aladhan بنفسها. نفس معادلات prayer_engine و hijri_calendar، والنتائج
+محفوظة في الذاكرة حسب (خلية الموقع، التاريخ، المنطقة الزمنية، الطريقة، المذهب).
+خلية الموقع من location_grid (--grid 0.01 أو --grid geohash:6)، والإحداثيات في
+الردود هي مركز الخلية.
+method بأرقام aladhan (افتراضياً 4، أم القرى)، و school: 0 الجمهور، 1 الحنفي.
+بدون tz تُستخدم المنطقة الزمنية لأقرب مدينة (geocoder، بدون شبكة).
+
+المسارات (كلها GET وترجع JSON):
+    /times?lat=24.71&lon=46.68&tz=3[&date=2026-10-18][&method=4][&school=0]
+    /next?lat=24.71&lon=46.68&tz=3[&method=4][&school=0]
+    /qibla?lat=24.71&lon=46.68
+    /city?lat=24.71&lon=46.68
+    /hijri[?date=2026-10-18]
+    /stats
+    /metrics   (زمن كل مسار ونتائجه من metrics.py)
+
+الاستخدام:
+    python prayer_server.py --port 8765
+    python prayer_app_fixed.py serve --port 8765
+"""
+
+import argparse
+import json
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from geocoder import nearest_city, utc_offset
+from hijri_calendar import HIJRI_MONTHS_AR, gregorian_to_hijri
+from location_grid import DEFAULT_GRID, LocationGrid, error_report, sample_points
+from metrics import configure_logging, log, metrics
+from prayer_engine import (
+    CALCULATION_METHODS, DEFAULT_METHOD, PRAYER_KEYS, PRAYER_NAMES_AR, QIBLA_DIRECTIONS_AR,
+    SCHOOL_HANAFI, SCHOOL_SHAFI, DaySchedule, compute_prayer_times, format_minutes, qibla_info
+)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_MAX_ENTRIES = 50000
+
+
+class RequestError(Exception):
+    """طلب لا يمكن خدمته، مع حالة HTTP المناسبة"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _float_param(params, name, low, high, default=None):
+    value = params.get(name)
+    if value is None:
+        if default is None:
+            raise RequestError(400, f"المعامل {name} مطلوب")
+        return default
+    try:
+        number = float(value)
+    except ValueError:
+        raise RequestError(400, f"قيمة غير صحيحة للمعامل {name}: {value}")
+    if not low <= number <= high:
+        raise RequestError(400, f"المعامل {name} خارج المدى [{low}, {high}]")
+    return number
+
+
+def _choice_param(params, name, choices, default):
+    value = params.get(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        number = None
+    if number not in choices:
+        raise RequestError(400, f"قيمة غير مدعومة للمعامل {name}: {value}")
+    return number
+
+
+def _date_param(params, tz_offset):
+    value = params.get('date')
+    if value is None:
+        return (datetime.now(timezone.utc) + timedelta(hours=tz_offset)).date()
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise RequestError(400, f"تاريخ غير صحيح (YYYY-MM-DD): {value}")
+
+
+class ResponseCache:
+    """ذاكرة LRU في الذاكرة محدودة بعدد المدخلات"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class PrayerService:
+    """منطق المسارات بدون HTTP (كل دالة ترجع محتوى JSON بالبايت)"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, grid=None):
+        self.cache = ResponseCache(max_entries)
+        self.grid = grid or LocationGrid()
+        self.requests = 0
+        self._grid_error = None
+        self.routes = {
+            '/times': self.times,
+            '/next': self.next_prayer,
+            '/qibla': self.qibla,
+            '/city': self.city,
+            '/hijri': self.hijri,
+            '/stats': self.stats,
+            '/metrics': self.metrics_snapshot
+        }
+
+    def handle(self, path, params):
+        """تنفيذ مسار وإرجاع (الحالة، المحتوى)"""
+        self.requests += 1
+        route = self.routes.get(path)
+        if route is None:
+            return 404, _dump({'error': f"مسار غير معروف: {path}"})
+        with metrics.span(path) as s:
+            try:
+                return 200, route(params)
+            except RequestError as e:
+                s.outcome = str(e.status)
+                return e.status, _dump({'error': str(e)})
+            except Exception as e:
+                # خطأ غير متوقع: رد 500 بدلاً من قطع الاتصال بدون رد
+                s.outcome = '500'
+                log.error(f"❌ خطأ في المسار {path}: {e!r}")
+                return 500, _dump({'error': f"خطأ داخلي: {e}"})
+
+    def _location(self, params):
+        lat = _float_param(params, 'lat', -90, 90)
+        lon = _float_param(params, 'lon', -180, 180)
+        # كل من في الخلية يشترك في نفس النتيجة
+        return self.grid.snap(lat, lon)
+
+    def _nearest_city(self, lat, lon):
+        key = ('city', lat, lon)
+        entry = self.cache.get(key)
+        if entry is None:
+            entry = nearest_city(lat, lon)
+            if entry[0] is None:
+                raise RequestError(404, "لا توجد مدينة قريبة")
+            self.cache.put(key, entry)
+        return entry
+
+    def _timezone(self, params, lat, lon, day=None):
+        """فرق التوقيت من المعامل tz، أو من المنطقة الزمنية لأقرب مدينة في اليوم day (اليوم إن لم يُحدد)"""
+        if 'tz' in params:
+            return _float_param(params, 'tz', -12, 14)
+        city = self._nearest_city(lat, lon)[0]
+        offset = utc_offset(city.timezone, day or datetime.now(timezone.utc).date())
+        return offset if offset is not None else 0.0
+
+    def _method(self, params):
+        return (_choice_param(params, 'method', CALCULATION_METHODS, DEFAULT_METHOD),
+                _choice_param(params, 'school', (SCHOOL_SHAFI, SCHOOL_HANAFI), SCHOOL_SHAFI))
+
+    def day_schedule(self, lat, lon, day, tz_offset, method=DEFAULT_METHOD, school=SCHOOL_SHAFI):
+        """أوقات يوم لخلية موقع: (DaySchedule، محتوى JSON جاهز) من الذاكرة أو بالحساب"""
+        key = ('times', lat, lon, day, tz_offset, method, school)
+        entry = self.cache.get(key)
+        if entry is not None:
+            return entry
+
+        # الوقت غير المعرف (خطوط العرض العالية) يظهر null
+        with metrics.span('compute_prayer_times'):
+            schedule = DaySchedule.from_hours(
+                day, compute_prayer_times(lat, lon, day, tz_offset, method, school))
+
+        body = _dump({
+            'lat': lat,
+            'lon': lon,
+            'tz': tz_offset,
+            'method': method,
+            'school': school,
+            'date': day.isoformat(),
+            'timings': {
+                key: schedule.format(key) if schedule.get(key) is not None else None
+                for key in PRAYER_KEYS
+            }
+        })
+        entry = (schedule, body)
+        self.cache.put(key, entry)
+        return entry
+
+    def times(self, params):
+        lat, lon = self._location(params)
+        # فرق التوقيت لليوم المطلوب لا لليوم الحالي (التوقيت الصيفي)
+        day = _date_param(params, 0.0) if 'date' in params else None
+        tz_offset = self._timezone(params, lat, lon, day)
+        if day is None:
+            day = _date_param(params, tz_offset)
+        return self.day_schedule(lat, lon, day, tz_offset, *self._method(params))[1]
+
+    def next_prayer(self, params):
+        lat, lon = self._location(params)
+        tz_offset = self._timezone(params, lat, lon)
+        method = self._method(params)
+        now = (datetime.now(timezone.utc) + timedelta(hours=tz_offset)).replace(tzinfo=None)
+
+        schedule = self.day_schedule(lat, lon, now.date(), tz_offset, *method)[0]
+        key = schedule.next_prayer(now.hour * 60 + now.minute)
+        if key is None:
+            # انتهت صلوات اليوم: فجر الغد
+            schedule = self.day_schedule(lat, lon, now.date() + timedelta(days=1), tz_offset, *method)[0]
+            key = 'Fajr'
+            if schedule.get(key) is None:
+                raise RequestError(422, "فجر الغد غير معرف لهذا الموقع")
+
+        when = schedule.datetime_for(key)
+        return _dump({
+            'prayer': key,
+            'name_ar': PRAYER_NAMES_AR[key],
+            'date': schedule.day.isoformat(),
+            'time': format_minutes(schedule.get(key)),
+            'minutes_left': int((when - now).total_seconds() // 60)
+        })
+
+    def qibla(self, params):
+        lat, lon = self._location(params)
+        key = ('qibla', lat, lon)
+        body = self.cache.get(key)
+        if body is None:
+            bearing, distance, sector = qibla_info(lat, lon)
+            body = _dump({
+                'lat': lat,
+                'lon': lon,
+                'bearing': round(bearing, 1),
+                'distance_km': round(distance, 1),
+                'sector': sector,
+                'direction_ar': QIBLA_DIRECTIONS_AR[sector]
+            })
+            self.cache.put(key, body)
+        return body
+
+    def city(self, params):
+        lat, lon = self._location(params)
+        city, distance = self._nearest_city(lat, lon)
+        return _dump({
+            'lat': lat,
+            'lon': lon,
+            'city': city.name,
+            'country': city.country,
+            'country_code': city.country_code,
+            'timezone': city.timezone,
+            'utc_offset': utc_offset(city.timezone, datetime.now(timezone.utc).date()),
+            'distance_km': round(distance, 1)
+        })
+
+    def hijri(self, params):
+        day = _date_param(params, _float_param(params, 'tz', -12, 14, default=0.0))
+        key = ('hijri', day)
+        body = self.cache.get(key)
+        if body is None:
+            try:
+                year, month, day_of_month = gregorian_to_hijri(day)
+            except ValueError as e:
+                raise RequestError(422, str(e))
+            body = _dump({
+                'date': day.isoformat(),
+                'year': year,
+                'month': month,
+                'day': day_of_month,
+                'formatted': f"{day_of_month} {HIJRI_MONTHS_AR[month - 1]} {year} هـ"
+            })
+            self.cache.put(key, body)
+        return body
+
+    def grid_error_minutes(self):
+        """أقصى خطأ بالدقائق بسبب الخلية (عينة صغيرة من المدن، يُحسب مرة واحدة)"""
+        if self._grid_error is None:
+            year = date.today().year
+            days = [date(year, month, 15) for month in (3, 6, 9, 12)]
+            report = error_report(self.grid, sample_points(100), days)
+            self._grid_error = round(max(error['max'] for error in report.values()), 2)
+        return self._grid_error
+
+    def metrics_snapshot(self, params):
+        return _dump(metrics.snapshot())
+
+    def stats(self, params):
+        return _dump({
+            'requests': self.requests,
+            'cache_entries': len(self.cache),
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses,
+            'grid': self.grid.spec,
+            'grid_max_error_minutes': self.grid_error_minutes()
+        })
+
+
+def _dump(data):
+    return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+class PrayerRequestHandler(BaseHTTPRequestHandler):
+    """معالج HTTP/1.1 باتصالات دائمة (keep-alive)"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'PrayerTimesServer/1.0'
+
+    # الترويسات والمحتوى في كتابة واحدة، بدون انتظار Nagle (~40 ms لكل طلب)
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        status, body = self.server.service.handle(parts.path, dict(parse_qsl(parts.query)))
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class PrayerServer(ThreadingHTTPServer):
+    """خادم بخيط لكل اتصال وخدمة مشتركة"""
+
+    daemon_threads = True
+
+    def __init__(self, address, service=None, verbose=False):
+        super().__init__(address, PrayerRequestHandler)
+        self.service = service or PrayerService()
+        self.verbose = verbose
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="خادم JSON لأوقات الصلاة والقبلة والتاريخ الهجري")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="عنوان الاستماع")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="منفذ الاستماع")
+    parser.add_argument('--max-entries', type=int, default=DEFAULT_MAX_ENTRIES,
+                        help="أقصى عدد نتائج محفوظة في الذاكرة")
+    parser.add_argument('--grid', default=DEFAULT_GRID,
+                        help="خلية الموقع للذاكرة: حجم بالدرجات (0.01) أو geohash:N")
+    parser.add_argument('--verbose', action='store_true', help="طباعة كل طلب")
+    args = parser.parse_args(argv)
+
+    try:
+        grid = LocationGrid(args.grid)
+    except ValueError as e:
+        parser.error(str(e))
+
+    configure_logging()
+    service = PrayerService(args.max_entries, grid)
+    server = PrayerServer((args.host, args.port), service, args.verbose)
+    print(f"🌐 خادم أوقات الصلاة يعمل على http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("⏹️ تم إيقاف الخادم")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+✈️ دمج الطلبات المتطابقة قيد التنفيذ (Single-Flight)
+
+إذا طُلبت نفس العملية (نفس المفتاح) وهي ما زالت قيد التنفيذ، لا تبدأ
+عملية ثانية: ينتظر الطالب الجديد نتيجة العملية الأولى ويشاركها.
+"""
+
+import threading
+from concurrent.futures import CancelledError
+
+
+class _Call:
+    """عملية واحدة قيد التنفيذ ونتيجتها"""
+
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _start_thread(target):
+    def run():
+        try:
+            target()
+        except Exception:
+            pass  # الخطأ محفوظ في call.error للمنتظرين
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+class SingleFlight:
+    """تنفيذ عملية واحدة فقط لكل مفتاح في نفس الوقت"""
+
+    def __init__(self):
+        self.executed = 0
+        self.shared = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _release(self, key, call):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.event.set()
+
+    def _run(self, key, call, fn):
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._release(key, call)
+
+    def do(self, key, fn):
+        """تنفيذ fn أو انتظار التنفيذ الجاري لنفس المفتاح ومشاركة نتيجته"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if leader:
+            return self._run(key, call, fn)
+
+        call.event.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def submit(self, key, fn, start=_start_thread):
+        """تشغيل fn في الخلفية إلا إذا كان نفس المفتاح قيد التنفيذ
+
+        يرجع True إذا بدأ تنفيذ جديد، و False إذا انضم الطلب لتنفيذ جارٍ.
+        """
+        with self._lock:
+            if key in self._calls:
+                self.shared += 1
+                return False
+            call = self._calls[key] = _Call()
+            self.executed += 1
+
+        start(lambda: self._run(key, call, fn))
+        return True
+
+    def cancel(self, key):
+        """تحرير مفتاح لن يكتمل تنفيذه (مثلاً عملية أُلغيت قبل أن تبدأ)"""
+        with self._lock:
+            call = self._calls.get(key)
+        if call is not None:
+            if call.error is None and not call.event.is_set():
+                call.error = CancelledError(f"أُلغيت العملية: {key}")
+            self._release(key, call)
+
+    def in_flight(self, key):
+        """هل المفتاح قيد التنفيذ الآن؟"""
+        with self._lock:
+            return key in self._calls
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""وحدات المشروع في المجلد الرئيسي (بدون حزمة)، فيُضاف إلى sys.path للاختبارات"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
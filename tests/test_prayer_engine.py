@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+اختبارات محرك الحساب والتقويم الهجري
+• الحساب المتجه (numpy) يطابق الحساب العادي لكل الطرق والمذهبين
+• يوم مرجعي لكل عائلة طرق (زوايا، دقائق ثابتة، مغرب بزاوية أو بدقائق، عصر حنفي)
+• تواريخ هجرية معروفة في تقويم أم القرى
+
+    python -m pytest -q tests
+"""
+
+import math
+from datetime import date, timedelta
+
+import pytest
+
+from hijri_calendar import gregorian_to_hijri, gregorian_to_hijri_batch, hijri_to_gregorian
+from prayer_engine import (
+    CALCULATION_METHODS, NUMPY_AVAILABLE, SCHOOL_HANAFI, SCHOOL_SHAFI, compute_prayer_times,
+    compute_prayer_times_batch, format_minutes, hour_to_minutes, hours_to_minutes
+)
+
+# (الاسم، خط العرض، خط الطول، فرق التوقيت): شمال وجنوب، شرق وغرب، وخط عرض عالٍ
+LOCATIONS = (
+    ('makkah', 21.4225, 39.8262, 3.0),
+    ('london', 51.5074, -0.1278, 0.0),
+    ('oslo', 59.9139, 10.7522, 1.0),
+    ('new_york', 40.7128, -74.0060, -5.0),
+    ('jakarta', -6.2088, 106.8456, 7.0),
+    ('cape_town', -33.9249, 18.4241, 2.0)
+)
+
+# الانقلابان والاعتدالان، ويوم في رمضان 1447 (عشاء أم القرى 120 دقيقة)
+DAYS = (date(2026, 3, 1), date(2026, 3, 20), date(2026, 6, 21), date(2026, 10, 18), date(2026, 12, 21))
+
+requires_numpy = pytest.mark.skipif(not NUMPY_AVAILABLE, reason="الحساب المتجه يحتاج numpy")
+
+
+def as_strings(times):
+    return [format_minutes(hour_to_minutes(t)) if math.isfinite(t) else None for t in times]
+
+
+@requires_numpy
+@pytest.mark.parametrize('school', (SCHOOL_SHAFI, SCHOOL_HANAFI))
+@pytest.mark.parametrize('method', sorted(CALCULATION_METHODS))
+def test_batch_matches_scalar(method, school):
+    import numpy as np
+
+    lats, lons, tzs = ([loc[i] for loc in LOCATIONS] for i in (1, 2, 3))
+    batch = compute_prayer_times_batch(lats, lons, list(DAYS), tzs, method, school)
+    scalar = np.array([[compute_prayer_times(lat, lon, day, tz, method, school) for day in DAYS]
+                       for lat, lon, tz in zip(lats, lons, tzs)])
+
+    assert batch.shape == scalar.shape
+    np.testing.assert_allclose(batch, scalar, rtol=0, atol=1e-9, equal_nan=True)
+    np.testing.assert_array_equal(hours_to_minutes(batch), hours_to_minutes(scalar))
+
+
+# يوم مرجعي لكل عائلة طرق: (المدينة، lat، lon، فرق التوقيت، الطريقة، المذهب، اليوم،
+# الفجر، الشروق، الظهر، العصر، المغرب، العشاء)
+REFERENCE_DAYS = (
+    # أم القرى: العشاء بعد المغرب بـ 90 دقيقة، و 120 في رمضان
+    ('Makkah', 21.4225, 39.8262, 3.0, 4, SCHOOL_SHAFI, date(2026, 10, 18),
+     '05:01', '06:17', '12:06', '15:26', '17:54', '19:24'),
+    ('Makkah', 21.4225, 39.8262, 3.0, 4, SCHOOL_SHAFI, date(2026, 3, 1),
+     '05:25', '06:41', '12:33', '15:54', '18:25', '20:25'),
+    # زاويتا الفجر والعشاء، مع تعديل خطوط العرض العالية في الصيف
+    ('London', 51.5074, -0.1278, 1.0, 3, SCHOOL_SHAFI, date(2026, 6, 21),
+     '02:31', '04:43', '13:02', '17:25', '21:22', '23:27'),
+    ('New York', 40.7128, -74.0060, -4.0, 2, SCHOOL_SHAFI, date(2026, 10, 18),
+     '05:55', '07:11', '12:41', '15:43', '18:11', '19:26'),
+    ('Cairo', 30.0444, 31.2357, 3.0, 5, SCHOOL_SHAFI, date(2026, 10, 18),
+     '05:32', '06:59', '12:40', '15:55', '18:21', '19:39'),
+    # المغرب بزاوية بعد الغروب
+    ('Tehran', 35.6892, 51.3890, 3.5, 7, SCHOOL_SHAFI, date(2026, 10, 18),
+     '04:50', '06:13', '11:50', '14:59', '17:44', '18:31'),
+    # العصر الحنفي (ظل الشيء مثليه)
+    ('Karachi', 24.8607, 67.0011, 5.0, 1, SCHOOL_HANAFI, date(2026, 10, 18),
+     '05:15', '06:31', '12:17', '16:25', '18:03', '19:19'),
+    # المغرب بعد الغروب بدقائق ثابتة والعشاء بدقائق ثابتة
+    ('Lisbon', 38.7223, -9.1393, 1.0, 22, SCHOOL_SHAFI, date(2026, 10, 18),
+     '06:20', '07:49', '13:22', '16:27', '18:57', '20:14')
+)
+
+
+@pytest.mark.parametrize('case', REFERENCE_DAYS, ids=lambda case: f"{case[0]}-m{case[4]}-{case[6]}")
+def test_reference_days(case):
+    _, lat, lon, tz, method, school, day, *expected = case
+    assert as_strings(compute_prayer_times(lat, lon, day, tz, method, school)) == expected
+
+
+def test_method_family_rules():
+    """القواعد التي تميز كل عائلة (مستقلة عن قيم الأيام المرجعية)"""
+    lat, lon, tz, day = 24.7136, 46.6753, 3.0, date(2026, 10, 18)
+    ramadan_day = hijri_to_gregorian(1447, 9, 10)
+
+    def minutes(method, school=SCHOOL_SHAFI, when=day):
+        return [hour_to_minutes(t) for t in compute_prayer_times(lat, lon, when, tz, method, school)]
+
+    sunset = minutes(3)[4]
+    assert minutes(4)[5] - minutes(4)[4] == 90
+    assert minutes(4, when=ramadan_day)[5] - minutes(4, when=ramadan_day)[4] == 120
+    assert minutes(22)[4] - sunset == 3 and minutes(22)[5] - minutes(22)[4] == 77
+    assert minutes(23)[4] - sunset == 5
+    assert minutes(7)[4] > sunset
+    assert minutes(3, SCHOOL_HANAFI)[3] > minutes(3, SCHOOL_SHAFI)[3]
+
+
+@pytest.mark.parametrize('hijri, gregorian', (
+    ((1447, 9, 1), date(2026, 2, 18)),   # رمضان 1447
+    ((1447, 10, 1), date(2026, 3, 20)),  # عيد الفطر 1447
+    ((1446, 12, 10), date(2025, 6, 6)),  # عيد الأضحى 1446
+    ((1446, 1, 1), date(2024, 7, 7)),    # رأس السنة 1446
+    ((1445, 9, 1), date(2024, 3, 11)),   # رمضان 1445
+    ((1445, 1, 1), date(2023, 7, 19))    # رأس السنة 1445
+))
+def test_hijri_anchors(hijri, gregorian):
+    assert hijri_to_gregorian(*hijri) == gregorian
+    assert gregorian_to_hijri(gregorian) == hijri
+
+
+def test_hijri_round_trip_and_batch():
+    first = date(2025, 1, 1)
+    days = [first + timedelta(days=i) for i in range(800)]
+    converted = [gregorian_to_hijri(day) for day in days]
+    assert [hijri_to_gregorian(*h) for h in converted] == days
+
+    if NUMPY_AVAILABLE:
+        import numpy as np
+        years, months, day_numbers = gregorian_to_hijri_batch(np.array(days, dtype='datetime64[D]'))
+        assert list(zip(years.tolist(), months.tolist(), day_numbers.tolist())) == converted
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📦 جداول أوقات الصلاة السنوية المحسوبة مسبقاً
+Precomputed Yearly Timetable Store
+
+صيغة ثنائية ثابتة العرض تُقرأ عبر mmap بدون أي تحليل:
+
+    الترويسة (34 بايت، little-endian):
+        magic 'PTTB' | version u16 | year u16 | days u16 | prayers u8
+        method u8 | school u8 | reserved u8 | latitude f64 | longitude f64 | tz_offset f32
+    البيانات:
+        days × prayers × uint16 (دقائق منذ منتصف الليل، 0xFFFF = غير معرف)
+
+قراءة أي يوم = struct.unpack_from واحد عند إزاحة محسوبة، أي O(1).
+
+الاستخدام:
+    python timetable_store.py --lat 24.7136 --lon 46.6753 --year 2026 --tz 3 --method 4 --out riyadh.ptt
+"""
+
+import argparse
+import math
+import mmap
+import os
+import struct
+from datetime import date, timedelta
+
+from prayer_engine import (
+    CALCULATION_METHODS, DEFAULT_METHOD, NUMPY_AVAILABLE, PRAYER_KEYS, SCHOOL_HANAFI,
+    SCHOOL_SHAFI, compute_prayer_times, compute_prayer_times_batch, hour_to_minutes,
+    hours_to_minutes
+)
+
+MAGIC = b'PTTB'
+VERSION = 2
+HEADER = struct.Struct('<4sHHHBBBBddf')
+INVALID = 0xFFFF
+# فرق التوقيت محفوظ f32، فالمقارنة بتسامح صغير (أقل من دقيقة)
+TZ_TOLERANCE = 0.01
+DAY_FORMAT = '<%dH' % len(PRAYER_KEYS)
+DAY = struct.Struct(DAY_FORMAT)
+
+
+def days_in_year(year):
+    """عدد أيام السنة الميلادية"""
+    return (date(year + 1, 1, 1) - date(year, 1, 1)).days
+
+
+def build_year_minutes(lat, lon, year, tz_offset=0.0, method=DEFAULT_METHOD, school=SCHOOL_SHAFI):
+    """حساب دقائق كل صلوات السنة كقائمة صفوف (صف لكل يوم)"""
+    if NUMPY_AVAILABLE:
+        import numpy as np
+        dates = np.arange(np.datetime64(f'{year}-01-01'), np.datetime64(f'{year + 1}-01-01'))
+        minutes = hours_to_minutes(
+            compute_prayer_times_batch([lat], [lon], dates, tz_offset, method, school))[0]
+        minutes = np.where(minutes < 0, INVALID, minutes).astype('<u2')
+        return minutes.tolist()
+
+    first = date(year, 1, 1)
+    rows = []
+    for offset in range(days_in_year(year)):
+        times = compute_prayer_times(lat, lon, first + timedelta(days=offset), tz_offset, method, school)
+        # خطوط العرض العالية: الوقت غير المعرف يبقى INVALID
+        rows.append([hour_to_minutes(t) if math.isfinite(t) else INVALID for t in times])
+    return rows
+
+
+def write_timetable(path, lat, lon, year, tz_offset=0.0, method=DEFAULT_METHOD, school=SCHOOL_SHAFI):
+    """كتابة جدول سنة كاملة لموقع واحد في ملف ثنائي"""
+    rows = build_year_minutes(lat, lon, year, tz_offset, method, school)
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, year, len(rows), len(PRAYER_KEYS), method, school, 0,
+                            lat, lon, tz_offset))
+        for row in rows:
+            f.write(DAY.pack(*row))
+
+    return path
+
+
+class TimetableStore:
+    """قراءة جدول سنوي عبر mmap والوصول لأي يوم في O(1)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+        # ملف أقصر من الترويسة: unpack_from يرفع struct.error ويبقى الملف مفتوحاً
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise ValueError(f"ملف جدول غير صالح: {path}")
+
+        (magic, version, self.year, self.days, prayers, self.method, self.school, _,
+         self.latitude, self.longitude, self.tz_offset) = HEADER.unpack_from(self._map, 0)
+
+        if magic != MAGIC or version != VERSION or prayers != len(PRAYER_KEYS):
+            self.close()
+            raise ValueError(f"ملف جدول غير صالح: {path}")
+
+        if len(self._map) < HEADER.size + self.days * DAY.size:
+            self.close()
+            raise ValueError(f"ملف جدول ناقص: {path}")
+
+    def covers(self, lat, lon, day, tolerance=0.05, method=None, school=None, tz_offset=None):
+        """هل يغطي الجدول هذا الموقع وهذا اليوم (وطريقة الحساب والمذهب وفرق التوقيت إن حُددت)؟
+
+        الجدول بفرق توقيت ثابت، فأيام التوقيت الصيفي (فرق مختلف) لا يغطيها.
+        """
+        return (day.year == self.year and
+                method in (None, self.method) and
+                school in (None, self.school) and
+                (tz_offset is None or abs(tz_offset - self.tz_offset) < TZ_TOLERANCE) and
+                abs(lat - self.latitude) <= tolerance and
+                abs(lon - self.longitude) <= tolerance)
+
+    def minutes_for(self, day):
+        """دقائق صلوات يوم (بترتيب PRAYER_KEYS، None للوقت غير المعرف)"""
+        index = day.timetuple().tm_yday - 1
+        if day.year != self.year or not 0 <= index < self.days:
+            raise KeyError(f"اليوم {day} خارج الجدول {self.year}")
+
+        row = DAY.unpack_from(self._map, HEADER.size + index * DAY.size)
+        return tuple(None if m == INVALID else m for m in row)
+
+    def close(self):
+        """إغلاق الملف"""
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    """أداة سطر الأوامر لتوليد جدول سنوي لموقع واحد"""
+    parser = argparse.ArgumentParser(description="توليد جدول أوقات صلاة سنوي ثنائي")
+    parser.add_argument('--lat', type=float, required=True, help="خط العرض")
+    parser.add_argument('--lon', type=float, required=True, help="خط الطول")
+    parser.add_argument('--year', type=int, default=date.today().year, help="السنة الميلادية")
+    parser.add_argument('--tz', type=float, required=True,
+                        help="فرق التوقيت بالساعات عن UTC (أيام فرق آخر، كالتوقيت الصيفي، تُحسب بالمحرك)")
+    parser.add_argument('--method', type=int, default=DEFAULT_METHOD, choices=sorted(CALCULATION_METHODS),
+                        help="طريقة الحساب (أرقام aladhan)")
+    parser.add_argument('--school', type=int, default=SCHOOL_SHAFI, choices=(SCHOOL_SHAFI, SCHOOL_HANAFI),
+                        help="مذهب العصر: 0 الجمهور، 1 الحنفي")
+    parser.add_argument('--out', required=True, help="مسار ملف الإخراج")
+    args = parser.parse_args(argv)
+
+    write_timetable(args.out, args.lat, args.lon, args.year, args.tz, args.method, args.school)
+    size = os.path.getsize(args.out)
+    print(f"✅ تم حفظ جدول {args.year} في {args.out} ({size} بايت)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧵 طابور تحديثات الواجهة المجمعة
+Coalescing UI Update Queue
+
+Tk لا يقبل الاستدعاء من أكثر من خيط، وكل set() على متغير نصي تعيد رسم عنصره.
+بدلاً من ذلك تُجمع التحديثات هنا وتُطبق مرة واحدة لكل إطار (frame_ms) في خيط الواجهة:
+• عدة قيم لنفس المتغير قبل الإطار التالي ← set() واحدة بآخر قيمة
+• قيمة مساوية للمعروضة ← لا شيء (بدون إعادة رسم ولا إطار)، فكل تغيير للمتغيرات
+  المعروضة يجب أن يمر من هنا
+• call(key, func) لعمليات الواجهة الأخرى، واحدة لكل مفتاح في الإطار
+
+يُستدعى set() و call() من أي خيط: من خيط الواجهة يُجدول الإطار التالي بـ after،
+ومن الخيوط الأخرى يُطبق مع أول flush() (طابور نتائج المنسق يستدعيها بعد كل تفريغ).
+"""
+
+import threading
+
+from metrics import log
+
+DEFAULT_FRAME_MS = 16
+_MISSING = object()
+
+
+class UIUpdateQueue:
+    """تجميع تحديثات متغيرات الواجهة وتطبيقها مرة واحدة لكل إطار"""
+
+    def __init__(self, root, frame_ms=DEFAULT_FRAME_MS):
+        self.root = root
+        self.frame_ms = frame_ms
+        self.requested = 0
+        self.applied = 0
+        self.coalesced = 0
+        self.unchanged = 0
+        self.failed = 0
+        self.flushes = 0
+        self.max_batch = 0
+        # المتغيرات غير قابلة للتجزئة (Variable تعرّف __eq__)، فالمفتاح id()
+        self._values = {}
+        self._shown = {}
+        self._calls = {}
+        self._scheduled = False
+        self._owner = threading.get_ident()
+        self._lock = threading.Lock()
+
+    def set(self, var, value):
+        """طلب var.set(value) في الإطار التالي (آخر قيمة هي التي تُطبق)"""
+        with self._lock:
+            key = id(var)
+            if key in self._values:
+                self.coalesced += 1
+            elif self._shown.get(key, _MISSING) == value:
+                self.requested += 1
+                self.unchanged += 1
+                return
+            self._values[key] = (var, value)
+            self.requested += 1
+            schedule = self._arm()
+        if schedule:
+            self.root.after(self.frame_ms, self.flush)
+
+    def call(self, key, func, *args):
+        """طلب func(*args) في الإطار التالي (مرة واحدة لكل key)"""
+        with self._lock:
+            if key in self._calls:
+                self.coalesced += 1
+            self._calls[key] = (func, args)
+            self.requested += 1
+            schedule = self._arm()
+        if schedule:
+            self.root.after(self.frame_ms, self.flush)
+
+    def _arm(self):
+        """هل يجب جدولة إطار الآن؟ (داخل القفل، ومن خيط الواجهة فقط)"""
+        if self._scheduled or threading.get_ident() != self._owner:
+            return False
+        self._scheduled = True
+        return True
+
+    @property
+    def pending(self):
+        """عدد التحديثات التي تنتظر الإطار التالي"""
+        with self._lock:
+            return len(self._values) + len(self._calls)
+
+    def flush(self):
+        """تطبيق كل التحديثات المعلقة الآن (من خيط الواجهة فقط)"""
+        with self._lock:
+            values, self._values = self._values, {}
+            calls, self._calls = self._calls, {}
+            self._scheduled = False
+
+        # تحديث فاشل لا يسقط بقية تحديثات الإطار ولا يصل إلى after
+        for key, (var, value) in values.items():
+            try:
+                if var.get() != value:
+                    var.set(value)
+                    self.applied += 1
+                else:
+                    self.unchanged += 1
+            except Exception as e:
+                self.failed += 1
+                log.warning(f"⚠️ خطأ في تحديث الواجهة: {e!r}")
+                continue
+            self._shown[key] = value
+        for func, args in calls.values():
+            try:
+                func(*args)
+            except Exception as e:
+                self.failed += 1
+                log.warning(f"⚠️ خطأ في تحديث الواجهة {getattr(func, '__name__', func)}: {e!r}")
+                continue
+            self.applied += 1
+
+        batch = len(values) + len(calls)
+        if batch:
+            self.flushes += 1
+            self.max_batch = max(self.max_batch, batch)
+        return batch
+
+    def stats(self):
+        """الطلبات مقابل ما طُبق فعلاً"""
+        return {
+            'requested': self.requested,
+            'applied': self.applied,
+            'coalesced': self.coalesced,
+            'unchanged': self.unchanged,
+            'failed': self.failed,
+            'flushes': self.flushes,
+            'max_batch': self.max_batch,
+            'pending': self.pending
+        }
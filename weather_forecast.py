@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🌤️ توقعات الطقس بالساعة محفوظة محلياً
+Locally Served Hourly Weather Forecast
+
+بدلاً من طلب الطقس الحالي كل ساعة، يُجلب طلب واحد بتوقعات الـ 48 ساعة القادمة
+(Open-Meteo hourly)، ثم يُحسب "الطقس الحالي" محلياً منه:
+• درجة الحرارة بالاستيفاء الخطي بين الساعتين المحيطتين بالوقت الحالي
+• حالة الطقس (weathercode) من أقرب ساعة، فهي تصنيف لا يُستوفى
+
+التوقعات تُحفظ في ملف JSON، فيظهر الطقس عند التشغيل وبدون اتصال ما دامت تغطي
+الوقت الحالي. تُجدد مرة يومياً تقريباً (needs_refresh)، أي نحو 24 مرة أقل من طلب كل ساعة.
+
+الأوقات في رد Open-Meteo محلية لمنطقة الموقع (timezone=auto)، فتُحول إلى ثوانٍ
+منذ epoch بـ utc_offset_seconds، ولا يهم بعدها اختلاف منطقة الجهاز عن الموقع.
+"""
+
+import time
+from bisect import bisect_right
+from datetime import datetime, timezone
+
+FORECAST_HOURS = 48
+HOURLY_FIELDS = ('temperature_2m', 'weathercode')
+# تجديد التوقعات بعد يوم، أو قبل ذلك إن بقي أقل من 12 ساعة منها
+DEFAULT_MAX_AGE = 24 * 3600
+DEFAULT_MIN_REMAINING = 12 * 3600
+
+
+def forecast_query(lat, lon, hours=FORECAST_HOURS):
+    """معاملات طلب Open-Meteo للتوقعات بالساعة (بدون ? في البداية)"""
+    return (f"latitude={lat}&longitude={lon}&hourly={','.join(HOURLY_FIELDS)}"
+            f"&past_hours=1&forecast_hours={hours}&timezone=auto")
+
+
+class HourlyForecast:
+    """سلسلة توقعات بالساعة: الحرارة والحالة في أي لحظة تغطيها"""
+
+    def __init__(self, times, temperatures, codes, latitude=None, longitude=None, fetched_at=None):
+        if not times or not len(times) == len(temperatures) == len(codes):
+            raise ValueError("توقعات الطقس فارغة أو غير متطابقة الطول")
+        self.times = list(times)
+        self.temperatures = list(temperatures)
+        self.codes = list(codes)
+        self.latitude = latitude
+        self.longitude = longitude
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+
+    @classmethod
+    def from_open_meteo(cls, data, latitude=None, longitude=None, fetched_at=None):
+        """من رد Open-Meteo (hourly) مع تجاهل الساعات الناقصة"""
+        try:
+            hourly = data['hourly']
+            offset = data.get('utc_offset_seconds', 0)
+            rows = zip(hourly['time'], hourly['temperature_2m'], hourly['weathercode'])
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"رد التوقعات غير مكتمل: {e}") from e
+
+        times, temperatures, codes = [], [], []
+        for stamp, temperature, code in rows:
+            if temperature is None:
+                continue
+            local = datetime.fromisoformat(stamp).replace(tzinfo=timezone.utc)
+            times.append(local.timestamp() - offset)
+            temperatures.append(float(temperature))
+            codes.append(int(code or 0))
+        return cls(times, temperatures, codes, latitude, longitude, fetched_at)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['times'], data['temperatures'], data['codes'],
+                   data.get('latitude'), data.get('longitude'), data.get('fetched_at'))
+
+    def to_dict(self):
+        return {
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'fetched_at': self.fetched_at,
+            'times': self.times,
+            'temperatures': self.temperatures,
+            'codes': self.codes
+        }
+
+    def covers(self, moment=None):
+        """هل الوقت داخل مدة التوقعات؟"""
+        moment = time.time() if moment is None else moment
+        return self.times[0] <= moment <= self.times[-1]
+
+    def remaining(self, moment=None):
+        """الثواني المتبقية من التوقعات"""
+        moment = time.time() if moment is None else moment
+        return max(0.0, self.times[-1] - moment)
+
+    def needs_refresh(self, latitude, longitude, moment=None,
+                      max_age=DEFAULT_MAX_AGE, min_remaining=DEFAULT_MIN_REMAINING):
+        """هل يجب جلب توقعات جديدة؟ (موقع آخر، أو قديمة، أو توشك على الانتهاء)"""
+        moment = time.time() if moment is None else moment
+        return ((latitude, longitude) != (self.latitude, self.longitude)
+                or moment - self.fetched_at >= max_age
+                or self.remaining(moment) < min_remaining)
+
+    def at(self, moment=None):
+        """(الحرارة، رمز الحالة) في لحظة معينة، أو None خارج مدة التوقعات"""
+        moment = time.time() if moment is None else moment
+        if not self.covers(moment):
+            return None
+
+        times = self.times
+        index = bisect_right(times, moment) - 1
+        if index >= len(times) - 1:
+            return self.temperatures[-1], self.codes[-1]
+
+        start, end = times[index], times[index + 1]
+        fraction = (moment - start) / (end - start)
+        first, second = self.temperatures[index], self.temperatures[index + 1]
+        code = self.codes[index] if fraction < 0.5 else self.codes[index + 1]
+        return first + (second - first) * fraction, code